@@ -0,0 +1,3 @@
+module="${1:-suite}"
+[ $# -gt 0 ] && shift
+cd src && python3 -m "benchmarks.$module" "$@"
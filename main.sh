@@ -1,3 +1 @@
-python3 src/main.py
-cd public && python3 -m http.server 8888
-
+python3 src/main.py serve --watch --port 8888
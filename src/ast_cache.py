@@ -0,0 +1,102 @@
+import hashlib
+import marshal
+import os
+
+from htmlnode import LeafNode, ParentNode
+
+# Bump whenever parsing changes the tree produced for the same markdown.
+PARSER_VERSION = "2"
+
+
+# On-disk cache of parsed HTMLNode trees keyed by a hash of the markdown,
+# so pages whose source did not change (e.g. after a template edit) skip
+# parsing entirely. Entries are nested tuples in marshal format; hits bump
+# the entry's mtime and evict() drops the least recently used entries once
+# the cache grows past max_bytes. written counts the bytes put() since the
+# last evict(), which has nothing to do while it is 0.
+class ASTCache():
+    def __init__(self, dir_path, max_bytes=256 * 1024 * 1024):
+        self.dir_path = dir_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.written = 0
+
+    def entry_path(self, markdown):
+        digest = hashlib.sha256(
+            f"{PARSER_VERSION}:{marshal.version}:".encode() + markdown.encode()
+        ).hexdigest()
+        return os.path.join(self.dir_path, digest[:2], digest[2:])
+
+    def get(self, markdown):
+        data = self.get_encoded(markdown)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return decode_node(data)
+
+    # The cached tree as encode_node() tuples, or None, without counting a
+    # hit or miss; for stages that only read the tree.
+    def get_encoded(self, markdown):
+        path = self.entry_path(markdown)
+        try:
+            with open(path, "rb") as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, markdown, node):
+        path = self.entry_path(markdown)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            marshal.dump(encode_node(node), f)
+            self.written += f.tell()
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        if not self.written or not os.path.isdir(self.dir_path):
+            return 0
+        self.written = 0
+        entries = []
+        total = 0
+        for root, _, filenames in os.walk(self.dir_path):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self.evictions += 1
+        return self.evictions
+
+    def summary(self):
+        return f"{self.hits} hits, {self.misses} misses, {self.evictions} evicted"
+
+
+def encode_node(node):
+    props = tuple(node.props.items()) if node.props is not None else None
+    if node.children is None:
+        return (node.tag, node.value, None, props)
+    return (node.tag, None, tuple(encode_node(child) for child in node.children), props)
+
+
+def decode_node(data):
+    tag, value, children, props = data
+    if props is not None:
+        props = dict(props)
+    if children is None:
+        return LeafNode(tag, value, props)
+    return ParentNode(tag, [decode_node(child) for child in children], props)
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import gencontent
+from gencontent import generate_page_streamed, parse_page, write_output
+from metadata import page_template
+from template import load_template
+
+logger = logging.getLogger(__name__)
+
+
+# Builds pages as three overlapping stages: reads and writes run on a
+# thread pool while the event loop renders whatever has been read so far.
+# At most max_in_flight pages are between their read and the end of their
+# write, which also bounds both queues, and at most max_open_files reads
+# and writes hold a descriptor at once (a streamed page holds two).
+class AsyncPipeline():
+    def __init__(self, max_in_flight=64, max_open_files=32):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_open_files = max(1, max_open_files)
+        # Outputs of the last run that already held the rendered bytes.
+        self.unchanged = 0
+
+    def run(self, pages, template_path, ast_cache=None, compressor=None):
+        return asyncio.run(self.build(pages, template_path, ast_cache, compressor))
+
+    # compressor, when given, is handed each page from the I/O threads,
+    # where waiting for a free compression slot does not block the loop.
+    async def build(self, pages, template_path, ast_cache=None, compressor=None):
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        open_files = asyncio.Semaphore(self.max_open_files)
+        read_queue = asyncio.Queue(self.max_in_flight)
+        write_queue = asyncio.Queue(self.max_in_flight)
+        errors = []
+        self.unchanged = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_open_files)
+
+        def fail(from_path, e):
+            errors.append((from_path, f"{type(e).__name__}: {e}"))
+            in_flight.release()
+
+        async def read(from_path, dest_path):
+            try:
+                async with open_files:
+                    markdown_content = await loop.run_in_executor(
+                        executor, self.read_source, from_path, template_path, dest_path
+                    )
+            except Exception as e:
+                fail(from_path, e)
+                return
+            if markdown_content is None:
+                if compressor is not None:
+                    await loop.run_in_executor(executor, compressor.add_file, dest_path)
+                in_flight.release()
+                return
+            await read_queue.put((from_path, dest_path, markdown_content))
+
+        async def reader():
+            reads = []
+            for from_path, dest_path in pages:
+                await in_flight.acquire()
+                reads.append(asyncio.create_task(read(from_path, dest_path)))
+            await asyncio.gather(*reads)
+            await read_queue.put(None)
+
+        async def renderer():
+            while True:
+                item = await read_queue.get()
+                if item is None:
+                    break
+                from_path, dest_path, markdown_content = item
+                logger.debug(" * %s %s -> %s", from_path, template_path, dest_path)
+                try:
+                    meta, title, node = parse_page(markdown_content, ast_cache=ast_cache)
+                    template = load_template(page_template(meta, template_path))
+                    page = template.render({"Title": title, "Content": node})
+                except Exception as e:
+                    fail(from_path, e)
+                    continue
+                await write_queue.put((from_path, dest_path, page))
+                # get() and put() do not yield while items are ready, so
+                # hand the loop to the readers and writers between pages.
+                await asyncio.sleep(0)
+            for _ in range(self.max_open_files):
+                await write_queue.put(None)
+
+        async def writer():
+            while True:
+                item = await write_queue.get()
+                if item is None:
+                    return
+                from_path, dest_path, page = item
+                try:
+                    async with open_files:
+                        written = await loop.run_in_executor(executor, self.write_output, dest_path, page)
+                    if not written:
+                        self.unchanged += 1
+                    if compressor is not None:
+                        await loop.run_in_executor(executor, compressor.add, dest_path, page)
+                except Exception as e:
+                    fail(from_path, e)
+                    continue
+                in_flight.release()
+
+        try:
+            writers = [writer() for _ in range(self.max_open_files)]
+            await asyncio.gather(reader(), renderer(), *writers)
+        finally:
+            executor.shutdown()
+        return errors
+
+    # Returns the page's markdown, or None when the page was large enough
+    # to be streamed straight to its output instead.
+    def read_source(self, from_path, template_path, dest_path):
+        if os.path.getsize(from_path) >= gencontent.stream_threshold:
+            generate_page_streamed(from_path, template_path, dest_path)
+            return None
+        with open(from_path, "r") as f:
+            return f.read()
+
+    # Returns False when dest_path already held page.
+    def write_output(self, dest_path, page):
+        return write_output(dest_path, page)
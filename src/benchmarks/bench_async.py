@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import time
+
+from async_build import AsyncPipeline
+from benchmarks.corpus import generate_corpus
+from gencontent import collect_pages
+
+
+# Adds a fixed delay to every read and write, like a network filesystem.
+class SlowDiskPipeline(AsyncPipeline):
+    def __init__(self, latency, *args):
+        super().__init__(*args)
+        self.latency = latency
+
+    def read_source(self, *args):
+        time.sleep(self.latency)
+        return super().read_source(*args)
+
+    def write_output(self, *args):
+        time.sleep(self.latency)
+        return super().write_output(*args)
+
+
+def main(latency_ms=2.0, scale=0.1):
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, "small-pages", scale)
+        template_path = os.path.join(root, "template.html")
+        pages = collect_pages(os.path.join(root, "content"), os.path.join(root, "public"))
+        for max_in_flight, max_open_files in ((1, 1), (64, 8), (64, 32)):
+            pipeline = SlowDiskPipeline(latency_ms / 1e3, max_in_flight, max_open_files)
+            started = time.perf_counter()
+            pipeline.run(pages, template_path)
+            elapsed = time.perf_counter() - started
+            print(
+                f"{len(pages)} pages, {latency_ms} ms I/O latency  in flight {max_in_flight:>3}"
+                f"  open files {max_open_files:>3}  {elapsed * 1e3:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import time
+
+from block_scanner import iter_blocks, scan_blocks
+from inline_markdown import block_to_block_type, markdown_to_blocks
+
+SECTION = (
+    "## Heading {i}\n\n"
+    "A paragraph of prose with **bold** text\nthat wraps over a second line.\n\n"
+    "* first item\n* second item\n* third item\n\n"
+    "1. one\n2. two\n3. three\n\n"
+    "> a quote\n> over two lines\n\n"
+    "```\ncode line\n```\n\n"
+)
+
+
+def document(megabytes):
+    sections = []
+    size = 0
+    i = 0
+    while size < megabytes * 1024 * 1024:
+        section = SECTION.format(i=i)
+        sections.append(section)
+        size += len(section)
+        i += 1
+    return "".join(sections)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main(megabytes=4):
+    text = document(megabytes)
+    existing = timed(lambda: [(block_to_block_type(block), block) for block in markdown_to_blocks(text)])
+    scanned = timed(lambda: scan_blocks(text))
+    print(f"{len(text) / 1024 / 1024:.1f} MB in memory  existing {existing * 1e3:8.1f} ms"
+          f"  scan {scanned * 1e3:8.1f} ms  speedup {existing / scanned:5.2f}x")
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "huge.md")
+        with open(path, "w") as f:
+            f.write(text)
+
+        def stream():
+            with open(path) as f:
+                for _ in iter_blocks(f):
+                    pass
+
+        print(f"{len(text) / 1024 / 1024:.1f} MB from file    scan {timed(stream) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,72 @@
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from compress import Precompressor
+from gencontent import generate_pages_recursive
+
+
+# The separate step --precompress replaces: read every output back and
+# compress it.
+def compress_afterwards(dir_path):
+    for root, _, filenames in os.walk(dir_path):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            with open(path, "rb") as f:
+                data = f.read()
+            with open(path + ".gz", "wb") as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(int(repeat)):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(scale=0.5, jobs=0, repeat=3):
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, "small-pages", scale, static_files=0)
+        content = os.path.join(root, "content")
+        template_path = os.path.join(root, "template.html")
+        public = os.path.join(root, "public")
+        index_path = os.path.join(root, "compressed.json")
+        # Warm the inline cache so every variant renders at the same speed.
+        generate_pages_recursive(content, template_path, public)
+
+        def post_step():
+            shutil.rmtree(public)
+            generate_pages_recursive(content, template_path, public)
+            compress_afterwards(public)
+
+        def precompressed(keep_index):
+            if not keep_index:
+                shutil.rmtree(public)
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+            compressor = Precompressor.load(index_path, jobs=int(jobs) or None)
+            generate_pages_recursive(content, template_path, public, compressor=compressor)
+            compressor.wait()
+            compressor.save()
+            return compressor
+
+        results = [
+            ("build, then compress every output", best_of(repeat, post_step)),
+            ("build with --precompress", best_of(repeat, lambda: precompressed(False))),
+            ("rebuild, outputs unchanged", best_of(repeat, lambda: precompressed(True))),
+        ]
+        print(f"{precompressed(False).summary()}")
+        for name, elapsed in results:
+            print(f"{name:<36} {elapsed * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
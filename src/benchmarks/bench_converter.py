@@ -0,0 +1,52 @@
+import sys
+import timeit
+
+from converter import text_node_to_html_node, text_nodes_to_html
+from htmlnode import LeafNode
+from textnode import TextNode, TextType
+
+NODES = [
+    TextNode("plain words ", TextType.TEXT),
+    TextNode("bold", TextType.BOLD),
+    TextNode(" and ", TextType.TEXT),
+    TextNode("italic", TextType.ITALIC),
+    TextNode("code", TextType.CODE),
+    TextNode("a link", TextType.LINK, "/docs/page"),
+    TextNode("pic.png", TextType.IMAGE, "a picture"),
+] * 100
+
+
+# The converter as it was before the dispatch tables, kept for comparison.
+def match_text_node_to_html_node(text_node):
+    match(text_node.text_type):
+        case (TextType.TEXT):
+            return LeafNode(tag=None, value=text_node.text)
+        case (TextType.BOLD):
+            return LeafNode(tag="b", value=text_node.text)
+        case (TextType.ITALIC):
+            return LeafNode(tag="i", value=text_node.text)
+        case (TextType.CODE):
+            return LeafNode(tag="code", value=text_node.text)
+        case (TextType.LINK):
+            return LeafNode(tag="a", value=text_node.text, props={"href": f"{text_node.url}"})
+        case (TextType.IMAGE):
+            return LeafNode(tag="img", value="", props={"src": f"{text_node.text}", "alt": f"{text_node.url}"})
+        case _:
+            raise Exception("Invalid Text Type")
+
+
+def main(number=2000):
+    cases = {
+        "match + to_html": lambda: "".join([match_text_node_to_html_node(node).to_html() for node in NODES]),
+        "table + to_html": lambda: "".join([text_node_to_html_node(node).to_html() for node in NODES]),
+        "emitters": lambda: text_nodes_to_html(NODES),
+    }
+    baseline = None
+    for name, fn in cases.items():
+        per_node = timeit.timeit(fn, number=number) / number / len(NODES)
+        baseline = baseline or per_node
+        print(f"{name:<16} {per_node * 1e9:7.1f} ns/node  speedup {baseline / per_node:5.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
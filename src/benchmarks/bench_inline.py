@@ -0,0 +1,51 @@
+import sys
+import timeit
+
+import inline_markdown
+from inline_markdown import markdown_to_html_node, text_to_textnodes
+from inline_scanner import scan_inline
+
+SAMPLES = {
+    "prose": "This is **text** with an *italic* word and a `code block` and plain words. " * 20,
+    **{
+        f"links-{count}": " ".join(f"[link {i}](/page/{i}) and ![img {i}](/img/{i}.png)" for i in range(count))
+        for count in (200, 2000, 10000)
+    },
+    "plain": "Just a long run of plain words without any inline markup at all. " * 50,
+}
+
+
+# Pages that share a footer, an admonition and a link list, as real sites do.
+BOILERPLATE = (
+    "> **Note:** this page is part of the *reference* docs, see [the guide](/guide) first.\n\n"
+    "* [Home](/)\n* [Guide](/guide)\n* [Reference](/reference)\n* [Changelog](/changelog)\n\n"
+    "Copyright the authors. Built with `main.py`, licensed under [MIT](/license)."
+)
+
+
+def site(pages):
+    return [
+        f"# Page {i}\n\nA paragraph that only page {i} has, with **bold** text.\n\n{BOILERPLATE}"
+        for i in range(pages)
+    ]
+
+
+def main(number=200):
+    for name, text in SAMPLES.items():
+        chained = timeit.timeit(lambda: text_to_textnodes(text), number=number) / number
+        scan = timeit.timeit(lambda: scan_inline(text), number=number) / number
+        print(
+            f"{name:<12} {len(text):>7} chars  chained {chained * 1e6:9.1f} us"
+            f"  scan {scan * 1e6:9.1f} us  speedup {chained / scan:5.2f}x"
+        )
+
+    documents = site(number * 5)
+    for size in (0, 4096):
+        inline_markdown.use_inline_cache(size)
+        elapsed = timeit.timeit(lambda: [markdown_to_html_node(document) for document in documents], number=1)
+        stats = inline_markdown.inline_cache.summary() if size else "disabled"
+        print(f"site of {len(documents)} pages  inline cache {size:>5}  {elapsed * 1e3:8.1f} ms  ({stats})")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from builder import BuildConfig, Builder
+
+
+def main(*page_counts):
+    for page_count in page_counts or (2_000, 20_000):
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, "small-pages", page_count / 2000, static_files=0, front_matter=True)
+            lines = []
+            builder = Builder(BuildConfig(root, listings=True), lines.append)
+
+            started = time.perf_counter()
+            builder.build()
+            full = time.perf_counter() - started
+            first = next(line for line in lines if line.startswith("Listings:"))
+
+            with open(os.path.join(root, "content", "new-post.md"), "w") as f:
+                f.write("---\ndate: 2030-01-01\ntags: [ring, shire]\n---\n# A new post\n\nIts summary.\n")
+            lines.clear()
+            started = time.perf_counter()
+            builder.build()
+            incremental = time.perf_counter() - started
+            second = next(line for line in lines if line.startswith("Listings:"))
+
+            print(f"{page_count:>7} pages  full build {full:6.2f} s  ({first})")
+            print(f"{'':>7}        one post added {incremental:6.2f} s  ({second})")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
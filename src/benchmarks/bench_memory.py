@@ -0,0 +1,111 @@
+import gc
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+
+import gencontent
+from htmlnode import HTMLNode, LeafNode
+from inline_markdown import markdown_to_html_node
+from textnode import TextNode, TextType
+
+PARAGRAPH = (
+    "This is **bold** text with an *italic* word, some `code`, a [link](/docs/page) "
+    "and an ![image](/images/pic.png) followed by plain words."
+)
+
+
+def synthetic_document(paragraphs):
+    blocks = []
+    for i in range(paragraphs):
+        blocks.append(f"## Section {i}")
+        blocks.append(PARAGRAPH)
+        blocks.append("\n".join(f"* item {j} with **bold** and *italic*" for j in range(5)))
+    return "# Synthetic\n\n" + "\n\n".join(blocks)
+
+
+def count_nodes(node):
+    total = 1
+    for child in node.children or []:
+        total += count_nodes(child)
+    return total
+
+
+# Same attributes as the real classes but with a per-instance __dict__,
+# to show what the slots save.
+class DictTextNode():
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictLeafNode():
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+def traced_bytes(factory, count):
+    gc.collect()
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current
+
+
+def page_peak_bytes(markdown, threshold):
+    with tempfile.TemporaryDirectory() as root:
+        from_path = os.path.join(root, "page.md")
+        template_path = os.path.join(root, "template.html")
+        with open(from_path, "w") as f:
+            f.write(markdown)
+        with open(template_path, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        gencontent.use_stream_threshold(threshold)
+        gc.collect()
+        tracemalloc.start()
+        gencontent.generate_page(from_path, template_path, os.path.join(root, "page.html"))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+
+def main(paragraphs=5000, instances=100000):
+    markdown = synthetic_document(paragraphs)
+
+    gc.collect()
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    tree_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    html = node.to_html()
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"document        {len(markdown) / 1e6:.1f} MB markdown -> {len(html) / 1e6:.1f} MB html")
+    print(f"html nodes      {count_nodes(node)}")
+    print(f"tree memory     {tree_bytes / 1e6:.1f} MB (parse peak {peak_bytes / 1e6:.1f} MB)")
+    print(f"peak rss        {rss_kb / 1e3:.1f} MB")
+
+    comparisons = (
+        ("TextNode", lambda i: TextNode("text", TextType.TEXT), lambda i: DictTextNode("text", TextType.TEXT)),
+        ("LeafNode", lambda i: LeafNode("b", "text"), lambda i: DictLeafNode("b", "text")),
+    )
+    for name, slotted, unslotted in comparisons:
+        with_slots = traced_bytes(slotted, instances) / instances
+        with_dict = traced_bytes(unslotted, instances) / instances
+        print(f"{name:<15} {with_slots:6.1f} bytes/instance slotted vs {with_dict:6.1f} with __dict__")
+    print(f"HTMLNode has __dict__: {hasattr(HTMLNode(), '__dict__')}")
+
+    in_memory = page_peak_bytes(markdown, float("inf"))
+    streamed = page_peak_bytes(markdown, 0)
+    print(f"page peak       {in_memory / 1e6:.1f} MB in memory vs {streamed / 1e6:.2f} MB streamed")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
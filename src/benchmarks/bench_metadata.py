@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from gencontent import collect_pages, generate_page
+from metadata import MetadataIndex
+
+
+# Rendering every page of the larger corpora takes minutes, so the render
+# time is extrapolated from a sample of render_sample pages.
+def main(*page_counts, render_sample=2000):
+    for page_count in page_counts or (10_000, 100_000):
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, "small-pages", page_count / 2000, static_files=0, front_matter=True)
+            public = os.path.join(root, "public")
+            template = os.path.join(root, "template.html")
+            path = os.path.join(root, "metadata.json")
+            pages = collect_pages(os.path.join(root, "content"), public)
+
+            started = time.perf_counter()
+            index = MetadataIndex(path)
+            published = index.published(pages)
+            listing = index.listing()
+            index.save()
+            cold = time.perf_counter() - started
+
+            started = time.perf_counter()
+            index = MetadataIndex.load(path)
+            index.published(pages)
+            index.listing()
+            index.save()
+            warm = time.perf_counter() - started
+
+            sample = published[:render_sample]
+            started = time.perf_counter()
+            for from_path, dest_path in sample:
+                generate_page(from_path, template, dest_path)
+            render = (time.perf_counter() - started) * len(published) / len(sample)
+
+            print(
+                f"{len(pages):>7} pages ({len(pages) - len(published)} drafts, newest {listing[0][1]['date']})"
+                f"  collect cold {cold:6.2f} s  warm {warm:6.2f} s  full render {render:7.2f} s"
+                f"  ({cold / render:.1%} / {warm / render:.1%})"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from gencontent import collect_pages
+from search_index import SearchIndex
+
+
+def dir_size(dir_path):
+    return sum(
+        os.path.getsize(os.path.join(root, filename))
+        for root, _, filenames in os.walk(dir_path)
+        for filename in filenames
+    )
+
+
+def main(*page_counts):
+    for page_count in page_counts or (10_000, 100_000):
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, "small-pages", page_count / 2000, static_files=0)
+            public = os.path.join(root, "public")
+            cache = os.path.join(root, "cache")
+            pages = collect_pages(os.path.join(root, "content"), public)
+
+            started = time.perf_counter()
+            index = SearchIndex(cache, os.path.join(public, "search"))
+            index.update(pages, public)
+            index.save()
+            full = time.perf_counter() - started
+
+            with open(pages[len(pages) // 2][0], "a") as f:
+                f.write("\n\nA freshly edited paragraph.\n")
+            started = time.perf_counter()
+            index = SearchIndex(cache, os.path.join(public, "search"))
+            index.update(pages, public)
+            index.save()
+            incremental = time.perf_counter() - started
+
+            print(
+                f"{len(pages):>7} pages  full {full:7.2f} s  one page changed {incremental:6.2f} s"
+                f"  shards {len(index.state['shards']):>4}  public/search {dir_size(os.path.join(public, 'search')) / 1e6:7.1f} MB"
+                f"  cache {dir_size(cache) / 1e6:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.suite import run_main
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+# Shards run one after another here, so each is timed alone as if it had a
+# machine to itself; with one node per shard the wall time of a build is
+# the slowest shard plus the merge.
+def main(scale=1.0, *shard_counts):
+    for count in [int(count) for count in shard_counts] or (2, 4, 8):
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, "small-pages", scale)
+            single = timed(lambda: run_main(root, "--clean", "--no-cache"))
+            shards = [
+                timed(lambda: run_main(root, "--clean", "--no-cache", "--shard", f"{index}/{count}"))
+                for index in range(count)
+            ]
+            merge = timed(lambda: run_main(root, "--clean", "--no-cache", "--merge-shards", str(count)))
+            pages = sum(len(filenames) for _, _, filenames in os.walk(os.path.join(root, "content")))
+            print(
+                f"{pages} pages, {count} shards: single node {single:6.2f} s  slowest shard {max(shards):6.2f} s"
+                f"  merge {merge:6.2f} s  distributed {max(shards) + merge:6.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
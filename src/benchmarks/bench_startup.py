@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.suite import MAIN, best_of, run_main
+from builder import BuildConfig, Builder
+
+
+def touch_page(root):
+    content = os.path.join(root, "content")
+    path = min(os.path.join(dir_path, name) for dir_path, _, names in os.walk(content) for name in names)
+    with open(path, "a") as f:
+        f.write("\nOne more line.\n")
+
+
+def main(scale=0.1, repeat=5):
+    repeat = int(repeat)
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, "small-pages", scale)
+        run_main(root)
+        builder = Builder(BuildConfig(root), None)
+        builder.build()
+
+        def edit_then(build):
+            touch_page(root)
+            build()
+
+        results = [
+            ("import main", best_of(lambda: subprocess.run([sys.executable, "-c", "import main"], check=True), repeat)),
+            ("cold CLI, nothing changed", best_of(lambda: run_main(root), repeat)),
+            ("warm Builder, nothing changed", best_of(builder.build, repeat)),
+            ("cold CLI, one page changed", best_of(lambda: edit_then(lambda: run_main(root)), repeat)),
+            ("warm Builder, one page changed", best_of(lambda: edit_then(builder.build), repeat)),
+        ]
+        pages = sum(len(filenames) for _, _, filenames in os.walk(os.path.join(root, "content")))
+        print(f"{pages} pages, {os.path.basename(MAIN)} run with {sys.executable}")
+        for name, elapsed in results:
+            print(f"{name:<32} {elapsed * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,31 @@
+import os
+import sys
+import timeit
+
+from template import load_template
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), "..", "..", "template.html")
+CONTENT = "<div>" + "<p>Some rendered paragraph text with <b>markup</b>.</p>" * 200 + "</div>"
+
+
+def render_reread(template_path, title, html):
+    template_file = open(template_path, "r")
+    template = template_file.read()
+    template_file.close()
+    template = template.replace("{{ Title }}", title)
+    return template.replace("{{ Content }}", html)
+
+
+def render_compiled(template_path, title, html):
+    return load_template(template_path).render({"Title": title, "Content": html})
+
+
+def main(pages=2000):
+    assert render_reread(TEMPLATE, "Title", CONTENT) == render_compiled(TEMPLATE, "Title", CONTENT)
+    for name, render in (("re-read + replace", render_reread), ("compiled", render_compiled)):
+        seconds = timeit.timeit(lambda: render(TEMPLATE, "Title", CONTENT), number=pages)
+        print(f"{name:<18} {pages} pages  {seconds * 1e3:8.1f} ms  {seconds / pages * 1e6:7.1f} us/page")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,101 @@
+import os
+import random
+
+WORDS = (
+    "the ring hobbit wizard elf dwarf shire mountain river forest tower king road "
+    "journey fellowship shadow light ancient realm sword song council harbour"
+).split()
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title> {{ Title }} </title></head>
+<body><article>{{ Content }}</article></body>
+</html>"""
+
+# Page count, sections per page and directory depth for each corpus shape.
+# scale multiplies the page count, or the section count for huge-pages.
+PROFILES = {
+    "small-pages": {"pages": 2000, "sections": 3, "depth": 2, "style": "prose"},
+    "huge-pages": {"pages": 3, "sections": 6000, "depth": 1, "style": "prose", "scale": "sections"},
+    "link-dense": {"pages": 300, "sections": 20, "depth": 2, "style": "links"},
+    "list-heavy": {"pages": 300, "sections": 20, "depth": 2, "style": "lists"},
+    "deep-nesting": {"pages": 400, "sections": 3, "depth": 12, "style": "prose"},
+}
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def inline_text(rng, style):
+    if style == "links":
+        return " ".join(
+            f"[{rng.choice(WORDS)}](/{rng.choice(WORDS)}/{rng.randrange(1000)}) and "
+            f"![{rng.choice(WORDS)}](/images/{rng.randrange(100)}.png)"
+            for _ in range(8)
+        )
+    return (
+        f"{sentence(rng)} **{sentence(rng, 2)}** {sentence(rng, 6)} *{sentence(rng, 2)}* "
+        f"`{rng.choice(WORDS)}` {sentence(rng, 8)} [{rng.choice(WORDS)}](/{rng.choice(WORDS)})"
+    )
+
+
+def section(rng, style, index):
+    blocks = [f"## {sentence(rng, 4)} {index}", inline_text(rng, style)]
+    if style == "lists":
+        blocks.append("\n".join(f"* {inline_text(rng, 'prose')}" for _ in range(10)))
+        blocks.append("\n".join(f"{i}. {sentence(rng, 6)}" for i in range(1, 11)))
+    else:
+        blocks.append(f"> {sentence(rng)}\n> {sentence(rng)}")
+        blocks.append(f"```\n{sentence(rng)}\n{sentence(rng)}\n```")
+        blocks.append("\n".join(f"- {sentence(rng, 5)}" for _ in range(3)))
+    return "\n\n".join(blocks)
+
+
+def generate_page(rng, style, sections):
+    parts = [f"# {sentence(rng, 5)}"]
+    parts.extend(section(rng, style, i) for i in range(sections))
+    return "\n\n".join(parts) + "\n"
+
+
+def page_front_matter(rng):
+    date = f"20{rng.randrange(10, 25)}-{rng.randrange(1, 13):02}-{rng.randrange(1, 29):02}"
+    tags = ", ".join(sorted({rng.choice(WORDS) for _ in range(3)}))
+    return f"---\ndate: {date}\ntags: [{tags}]\ndraft: {'true' if rng.random() < 0.05 else 'false'}\n---\n"
+
+
+def page_dir(rng, depth):
+    return os.path.join(*(f"{rng.choice(WORDS)}{rng.randrange(3)}" for _ in range(depth)))
+
+
+# Writes a content/, static/ and template.html tree under root. The same
+# profile, scale and seed always produce byte-identical files. With
+# front_matter every page starts with a date and tags.
+def generate_corpus(root, profile, scale=1.0, seed=0, static_files=50, front_matter=False):
+    settings = PROFILES[profile]
+    rng = random.Random(f"{profile}:{seed}")
+    pages = settings["pages"]
+    sections = settings["sections"]
+    if settings.get("scale") == "sections":
+        sections = max(1, int(sections * scale))
+    else:
+        pages = max(1, int(pages * scale))
+
+    content = os.path.join(root, "content")
+    for i in range(pages):
+        dir_path = os.path.join(content, page_dir(rng, settings["depth"]))
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, f"page{i}.md"), "w") as f:
+            if front_matter:
+                f.write(page_front_matter(rng))
+            f.write(generate_page(rng, settings["style"], sections))
+
+    static = os.path.join(root, "static", "images")
+    os.makedirs(static, exist_ok=True)
+    for i in range(static_files):
+        with open(os.path.join(static, f"{i}.png"), "wb") as f:
+            f.write(rng.randbytes(rng.randrange(4096, 65536)))
+
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(TEMPLATE)
+    return pages
@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import PROFILES, generate_corpus
+from block_scanner import scan_blocks
+from copystatic import copy_files_recursive, sync_static
+from inline_markdown import block_to_block_type, markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+from inline_scanner import scan_inline
+
+MAIN = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "main.py"))
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def read_markdown(content_dir):
+    documents = []
+    for root, _, filenames in os.walk(content_dir):
+        for filename in sorted(filenames):
+            with open(os.path.join(root, filename)) as f:
+                documents.append(f.read())
+    return documents
+
+
+def run_main(root, *args):
+    subprocess.run([sys.executable, MAIN, *args], cwd=root, check=True, stdout=subprocess.DEVNULL)
+
+
+def bench_profile(profile, scale, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, profile, scale)
+        documents = read_markdown(os.path.join(root, "content"))
+        blocks = [block for document in documents for block in markdown_to_blocks(document)]
+        texts = [line for block in blocks for line in block.split("\n")]
+        trees = [markdown_to_html_node(document) for document in documents]
+
+        results["main"] = best_of(lambda: run_main(root, "--clean"), repeat)
+        results["main_noop"] = best_of(lambda: run_main(root), repeat)
+        results["main_async"] = best_of(lambda: run_main(root, "--clean", "--async"), repeat)
+        results["main_staging_noop"] = best_of(lambda: run_main(root, "--staging"), repeat)
+        results["text_to_textnodes"] = best_of(lambda: [text_to_textnodes(text) for text in texts], repeat)
+        results["scan_inline"] = best_of(lambda: [scan_inline(text) for text in texts], repeat)
+        results["markdown_to_blocks"] = best_of(
+            lambda: [[(block_to_block_type(block), block) for block in markdown_to_blocks(document)] for document in documents],
+            repeat,
+        )
+        results["scan_blocks"] = best_of(lambda: [scan_blocks(document) for document in documents], repeat)
+        results["block_to_block_type"] = best_of(lambda: [block_to_block_type(block) for block in blocks], repeat)
+        results["to_html"] = best_of(lambda: [tree.to_html() for tree in trees], repeat)
+
+        static = os.path.join(root, "static")
+        dest = os.path.join(root, "static_copy")
+
+        def copy_static():
+            shutil.rmtree(dest, ignore_errors=True)
+            copy_files_recursive(static, dest)
+
+        def sync_static_fresh():
+            shutil.rmtree(dest, ignore_errors=True)
+            sync_static(static, dest)
+
+        results["static_copy"] = best_of(copy_static, repeat)
+        results["static_sync"] = best_of(sync_static_fresh, repeat)
+    return results
+
+
+# Benchmarks slower than baseline * (1 + threshold) count as regressions.
+def compare(baseline, current, threshold):
+    regressions = []
+    for name, seconds in sorted(current.items()):
+        if name not in baseline:
+            print(f"  {name:<36} {seconds * 1e3:10.2f} ms  (new)")
+            continue
+        ratio = seconds / baseline[name] if baseline[name] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<36} {baseline[name] * 1e3:10.2f} -> {seconds * 1e3:10.2f} ms  {ratio:5.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline on synthetic corpora")
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=list(PROFILES))
+    parser.add_argument("--scale", type=float, default=0.25, help="corpus size multiplier")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the best is kept")
+    parser.add_argument("--out", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before failing")
+    args = parser.parse_args()
+
+    results = {}
+    for profile in args.profiles:
+        print(f"{profile}...")
+        for name, seconds in bench_profile(profile, args.scale, args.repeat).items():
+            results[f"{profile}/{name}"] = seconds
+            print(f"  {name:<20} {seconds * 1e3:10.2f} ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(
+                {"python": platform.python_version(), "scale": args.scale, "results": results},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"warning: baseline was run at scale {baseline.get('scale')}, not {args.scale}")
+        print("Comparison:")
+        regressions = compare(baseline["results"], results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
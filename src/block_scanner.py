@@ -0,0 +1,90 @@
+import io
+import re
+
+# A line-at-a-time replacement for markdown_to_blocks + block_to_block_type
+# in inline_markdown, producing the same blocks and types. markdown_to_blocks
+# splits on "\n\n", so a block boundary is a run of two or more newlines;
+# lines holding only spaces do not end a block, they are stripped to "" inside
+# it. Blocks are yielded as soon as their boundary is seen, so a file object
+# can be scanned without reading it into memory.
+
+_HEADING_RE = re.compile(r"#{1,6} ")
+
+
+def iter_blocks(lines):
+    for block_lines in iter_block_lines(lines):
+        yield block_type_of_lines(block_lines), "\n".join(block_lines)
+
+
+def scan_blocks(markdown):
+    return list(iter_blocks(io.StringIO(markdown)))
+
+
+# Yields each block as a list of stripped lines. lines is any iterable of
+# "\n"-terminated strings, such as a text file or io.StringIO.
+def iter_block_lines(lines):
+    group = []
+    seen_text = False
+    # Empty lines since the last line with any text on it.
+    blank = 0
+    for line in lines:
+        if line == "\n":
+            blank += 1
+            continue
+        if blank and group:
+            seen_text = True
+            yield trim_block(group)
+            group = []
+        group.append(line.strip())
+        blank = 0
+    if group:
+        seen_text = True
+        yield trim_block(group)
+    # split("\n\n") leaves the odd newline of a trailing run as a chunk of
+    # its own, which strips to an empty block. With no text at all, one
+    # newline is enough.
+    if seen_text:
+        if blank >= 2 and blank % 2 == 0:
+            yield [""]
+    elif blank % 2 == 1:
+        yield [""]
+
+
+def trim_block(stripped_lines):
+    start = 0
+    end = len(stripped_lines)
+    while start < end and stripped_lines[start] == "":
+        start += 1
+    while end > start and stripped_lines[end - 1] == "":
+        end -= 1
+    if start == end:
+        return [""]
+    return stripped_lines[start:end]
+
+
+# Classifies a block from its lines in one pass. Only the first line can
+# make a quote or list possible, so at most one kind is checked and the
+# check stops at the first line that rules it out.
+def block_type_of_lines(lines):
+    first = lines[0]
+    if first[:1] == "#" and _HEADING_RE.match(first):
+        return "heading"
+    if first.startswith("```") and lines[-1].endswith("```"):
+        return "code"
+    if first.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return "paragraph"
+        return "quote"
+    stripped = first.strip()
+    if stripped.startswith(("* ", "- ")):
+        for line in lines:
+            if not line.strip().startswith(("* ", "- ")):
+                return "paragraph"
+        return "unordered_list"
+    if stripped.startswith("1. "):
+        for number, line in enumerate(lines, 1):
+            if not line.strip().startswith(f"{number}. "):
+                return "paragraph"
+        return "ordered_list"
+    return "paragraph"
@@ -0,0 +1,359 @@
+import json
+import os
+import shutil
+import time
+
+from ast_cache import ASTCache
+from copystatic import sync_static
+from dependencies import PageDependencies
+from gencontent import collect_pages, generate_pages_recursive, use_stream_threshold
+import inline_markdown
+from inline_markdown import use_inline_cache, use_inline_tokenizer
+from manifest import BuildManifest
+from metadata import MetadataIndex
+from profiling import BuildProfiler
+from references import ReferenceIndex
+from shard import mark_shard_built, merge_shards, shard_dir_path, unmark_shard
+
+# Build options and their defaults, the same as the command line's.
+DEFAULT_OPTIONS = {
+    "clean": False,
+    "jobs": 1,
+    "async_io": False,
+    "max_in_flight": 64,
+    "max_open_files": 32,
+    "inline_tokenizer": "scan",
+    "inline_cache_size": 4096,
+    "static_mode": "auto",
+    "static_check": "stat",
+    "static_jobs": 8,
+    "no_cache": False,
+    "cache_size": 256,
+    "stream_threshold": 32,
+    "explain": False,
+    "check_links": False,
+    "links_json": None,
+    "fail_on_broken_links": False,
+    "precompress": False,
+    "precompress_min_size": 1024,
+    "precompress_level": 9,
+    "precompress_jobs": None,
+    "search_index": False,
+    "staging": False,
+    "drafts": False,
+    "listings": False,
+    "per_page": 10,
+    "shard": None,
+    "merge_shards": None,
+    "profile": False,
+    "profile_json": None,
+    "profile_slowest": 10,
+}
+
+# Options that work on the whole site and so cannot be given to a shard.
+SITE_WIDE_OPTIONS = (
+    "staging", "precompress", "search_index", "check_links", "links_json", "fail_on_broken_links", "merge_shards",
+    "listings",
+)
+
+
+# Where a site lives and how to build it. Every path is under root, so a
+# process can build several sites without changing directory.
+class BuildConfig():
+    def __init__(self, root=".", **options):
+        unknown = set(options) - set(DEFAULT_OPTIONS)
+        if unknown:
+            raise TypeError(f"Unknown build options: {', '.join(sorted(unknown))}")
+        for name, default in DEFAULT_OPTIONS.items():
+            setattr(self, name, options.get(name, default))
+        if self.async_io and self.jobs > 1:
+            raise ValueError("async_io cannot be combined with jobs")
+        if self.per_page < 1:
+            raise ValueError("per_page must be at least 1")
+
+        self.root = root
+        self.dir_path_content = os.path.join(root, "content")
+        self.dir_path_static = os.path.join(root, "static")
+        self.dir_path_public = os.path.join(root, "public")
+        self.template_path = os.path.join(root, "template.html")
+        self.cache_dir = os.path.join(root, ".cache")
+        # A shard renders its pages into a directory of its own and keeps
+        # its state there, so N shards can build side by side in one
+        # checkout. Everything that needs the whole site is left to the
+        # build that merges them.
+        if self.shard is not None:
+            index, count = self.shard
+            if not 0 <= index < count:
+                raise ValueError(f"shard {index}/{count} is out of range")
+            site_wide = [name for name in SITE_WIDE_OPTIONS if getattr(self, name)]
+            if site_wide:
+                raise ValueError(f"shard builds cannot use {', '.join(site_wide)}; pass them to the merging build")
+            self.cache_dir = shard_dir_path(self.cache_dir, index, count)
+            self.dir_path_public = os.path.join(self.cache_dir, "public")
+        self.manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        self.ast_cache_path = os.path.join(self.cache_dir, "ast")
+        self.references_path = os.path.join(self.cache_dir, "references.json")
+        self.search_cache_path = os.path.join(self.cache_dir, "search")
+        self.compressed_path = os.path.join(self.cache_dir, "compressed.json")
+        self.metadata_path = os.path.join(self.cache_dir, "metadata.json")
+
+    @classmethod
+    def from_args(cls, args, root="."):
+        return cls(root, **{name: getattr(args, name) for name in DEFAULT_OPTIONS})
+
+
+# Builds one site, as many times as asked. The parse cache, inline cache
+# and compiled templates stay warm between builds, so a long-lived process
+# such as a watch daemon pays interpreter startup and imports once. The
+# inline tokenizer, inline cache and stream threshold are process-wide and
+# are set up when the Builder is created. log receives every progress and
+# summary line; None keeps the builder quiet.
+class Builder():
+    def __init__(self, config, log=print):
+        self.config = config
+        self.log = log if log is not None else (lambda line: None)
+        use_inline_tokenizer(config.inline_tokenizer)
+        use_inline_cache(config.inline_cache_size)
+        use_stream_threshold(config.stream_threshold * 1024 * 1024)
+        # The MetadataIndex of the last build, for a watch daemon to keep up.
+        self.metadata = None
+        self.ast_cache = None
+        if not config.no_cache:
+            self.ast_cache = ASTCache(config.ast_cache_path, config.cache_size * 1024 * 1024)
+
+    # Returns the build's manifest, its page errors and its broken
+    # references (None unless links were checked).
+    def build(self):
+        config = self.config
+        log = self.log
+        ast_cache = self.ast_cache
+        profiler = BuildProfiler() if config.profile or config.profile_json else None
+
+        if config.clean:
+            log("Deleting public directory..." if not config.staging else "Deleting build state...")
+            self.clean()
+
+        if config.shard is not None:
+            unmark_shard(config.cache_dir)
+
+        # With staging the whole build writes into a copy of public/, and
+        # every path-keyed record is moved there and back around it.
+        dir_path_public = config.dir_path_public
+        staging = None
+        if config.staging:
+            from staging import StagingDir
+
+            log("Staging public directory...")
+            staging = StagingDir(config.dir_path_public)
+            staging.prepare(clone=not config.clean)
+            dir_path_public = staging.path
+
+        manifest = BuildManifest.load(config.manifest_path)
+        references = ReferenceIndex.load(config.references_path)
+        metadata = self.metadata = MetadataIndex.load(config.metadata_path, config.drafts)
+        # Optional stages are imported only when enabled, which keeps
+        # startup fast for the common build.
+        pipeline = None
+        if config.async_io:
+            from async_build import AsyncPipeline
+
+            pipeline = AsyncPipeline(config.max_in_flight, config.max_open_files)
+        dependencies = PageDependencies(config.dir_path_content, config.dir_path_static, references)
+        compressor = self.load_compressor()
+        # What an earlier --precompress build left, for a build without it.
+        stale_compressor = None
+        if compressor is None and os.path.exists(config.compressed_path):
+            from compress import Precompressor
+
+            stale_compressor = Precompressor.load(config.compressed_path)
+        # And what an earlier --search-index build left.
+        stale_search = not config.search_index and os.path.exists(
+            os.path.join(config.search_cache_path, "state.marshal")
+        )
+        if staging is not None:
+            manifest.rebase(config.dir_path_public, dir_path_public)
+            if compressor is not None:
+                compressor.rebase(config.dir_path_public, dir_path_public)
+            if stale_compressor is not None:
+                stale_compressor.rebase(config.dir_path_public, dir_path_public)
+        if ast_cache is not None:
+            ast_cache.hits = ast_cache.misses = ast_cache.evictions = 0
+
+        started = time.perf_counter()
+        merge = None
+        if config.merge_shards:
+            log(f"Merging {config.merge_shards} shards...")
+            merge = merge_shards(
+                config.cache_dir, config.merge_shards, dir_path_public, manifest, config.root, compressor
+            )
+        # Static files are left to the merging build.
+        static_stats = None
+        if config.shard is None:
+            log("Copying static files to public directory...")
+            static_stats = sync_static(
+                config.dir_path_static, dir_path_public, manifest, config.static_mode, config.static_check,
+                config.static_jobs, compressor,
+            )
+        static_done = time.perf_counter()
+
+        log("Generating content...")
+        errors = generate_pages_recursive(
+            config.dir_path_content, config.template_path, dir_path_public, manifest, jobs=config.jobs,
+            profiler=profiler, ast_cache=ast_cache, pipeline=pipeline, dependencies=dependencies,
+            compressor=compressor, shard=config.shard, metadata=metadata,
+        )
+        listings = None
+        if config.listings:
+            from listings import build_listings
+
+            log("Generating listing pages...")
+            listings, listing_errors = build_listings(
+                metadata, config.dir_path_content, dir_path_public, config.template_path, manifest, config.per_page,
+                compressor,
+            )
+            errors.extend(listing_errors)
+        pages_done = time.perf_counter()
+
+        log("Removing orphaned files...")
+        manifest.remove_orphans()
+        if compressor is not None:
+            compressor.wait()
+            compressor.prune()
+        if stale_compressor is not None:
+            stale_compressor.discard()
+        if ast_cache is not None:
+            ast_cache.evict()
+        broken = None
+        if config.check_links or config.links_json or config.fail_on_broken_links:
+            log("Checking links...")
+            generated = listings.outputs if listings is not None else ()
+            broken = references.check(
+                built_pages(config, dir_path_public, metadata, manifest, errors), config.dir_path_static,
+                dir_path_public, generated,
+            )
+        search = None
+        if config.search_index:
+            from search_index import SearchIndex
+
+            log("Updating search index...")
+            search = SearchIndex(config.search_cache_path, os.path.join(dir_path_public, "search"))
+            search.update(
+                built_pages(config, dir_path_public, metadata, manifest, errors), dir_path_public,
+                manifest.file_hash, ast_cache,
+            )
+            errors.extend(search.errors)
+        elif stale_search:
+            search_output_path = os.path.join(dir_path_public, "search")
+            if os.path.exists(search_output_path):
+                shutil.rmtree(search_output_path)
+
+        # State is saved only once its outputs are live, so a build that
+        # dies before the swap leaves nothing claiming outputs public/ lacks.
+        if staging is not None:
+            log("Swapping staged build into place...")
+            staging.swap()
+            manifest.rebase(dir_path_public, config.dir_path_public)
+            if compressor is not None:
+                compressor.rebase(dir_path_public, config.dir_path_public)
+        manifest.save()
+        if compressor is not None:
+            compressor.save()
+        if stale_compressor is not None:
+            os.remove(config.compressed_path)
+        references.save()
+        metadata.save()
+        if search is not None:
+            search.save()
+        if stale_search:
+            shutil.rmtree(config.search_cache_path)
+        if config.shard is not None:
+            mark_shard_built(config.cache_dir, config.shard, config.root)
+        finished = time.perf_counter()
+
+        log(f"Build complete: {manifest.summary()}")
+        if config.explain:
+            for dest_path, reasons in sorted(manifest.reasons.items()):
+                log(f" * {dest_path}: {'; '.join(reasons)}")
+        log(f"Metadata: {metadata.summary()}")
+        if listings is not None:
+            log(f"Listings: {listings.summary()}")
+        if merge is not None:
+            log(f"Merged: {merge.summary()}")
+        if static_stats is not None:
+            log(f"Static files: {static_stats.summary()}")
+        if staging is not None:
+            log(f"Staging: {staging.summary()}")
+        if compressor is not None:
+            log(f"Precompressed: {compressor.summary()}")
+        if stale_compressor is not None:
+            log(f"Precompressed: {stale_compressor.stats.removed} .gz files removed")
+        if ast_cache is not None:
+            log(f"Parse cache: {ast_cache.summary()}")
+        if inline_markdown.inline_cache is not None:
+            log(f"Inline cache: {inline_markdown.inline_cache.summary()}")
+        if search is not None:
+            log(f"Search index: {search.summary()}")
+        if stale_search:
+            log("Search index: removed")
+        if profiler is not None:
+            profiler.add_phase("static", static_done - started)
+            profiler.add_phase("pages", pages_done - static_done)
+            profiler.add_phase("cleanup", finished - pages_done)
+            log("Profile:")
+            log(profiler.summary(config.profile_slowest))
+            if config.profile_json:
+                profiler.write_trace(config.profile_json)
+        if broken is not None:
+            log(f"Links: {references.checked} internal references, {len(broken)} broken")
+            for reference in broken:
+                log(f" * {reference['page']}:{reference['line']}: {reference['kind']} {reference['url']}")
+            if config.links_json:
+                with open(config.links_json, "w") as f:
+                    json.dump(broken, f, indent=2)
+        if errors:
+            log(f"{len(errors)} page(s) failed:")
+            for from_path, message in errors:
+                log(f" * {from_path}: {message}")
+        return manifest, errors, broken
+
+    # With staging public/ stays up until the empty-started build replaces
+    # it, except for the search index, whose shards are known only to the
+    # cache removed here.
+    def clean(self):
+        config = self.config
+        if os.path.exists(config.dir_path_public) and not config.staging:
+            shutil.rmtree(config.dir_path_public)
+        search_output_path = os.path.join(config.dir_path_public, "search")
+        if os.path.exists(search_output_path):
+            shutil.rmtree(search_output_path)
+        for path in (config.manifest_path, config.references_path, config.compressed_path, config.metadata_path):
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.exists(config.search_cache_path):
+            shutil.rmtree(config.search_cache_path)
+
+    def load_compressor(self):
+        config = self.config
+        if not config.precompress:
+            return None
+        from compress import Precompressor
+
+        return Precompressor.load(
+            config.compressed_path, min_size=config.precompress_min_size, level=config.precompress_level,
+            jobs=config.precompress_jobs,
+        )
+
+
+# The published pages that have an output in this build. A page that failed
+# to render is left out, as its source may not even be readable.
+def built_pages(config, dir_path_public, metadata, manifest, errors):
+    failed = {os.path.normpath(from_path) for from_path, _ in errors}
+    return [
+        (from_path, dest_path)
+        for from_path, dest_path in metadata.published(collect_pages(config.dir_path_content, dir_path_public))
+        if os.path.normpath(from_path) not in failed and os.path.normpath(dest_path) in manifest.new_entries
+    ]
+
+
+def build(config, log=print):
+    return Builder(config, log).build()
@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from copystatic import format_bytes
+from manifest import hash_file, rebase_path
+
+logger = logging.getLogger(__name__)
+
+# Outputs worth a .gz sibling; images and archives are already compressed.
+COMPRESSIBLE = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map", ".wasm"}
+
+# Bytes read at a time from an output compressed from disk.
+CHUNK_SIZE = 1 << 16
+
+
+class CompressStats():
+    def __init__(self):
+        self.compressed = 0
+        self.unchanged = 0
+        self.small = 0
+        self.removed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def add(self, result, size=0, compressed_size=0, seconds=0.0):
+        if result == "compressed":
+            self.compressed += 1
+            self.bytes_in += size
+            self.bytes_out += compressed_size
+        elif result == "unchanged":
+            self.unchanged += 1
+        else:
+            self.small += 1
+        self.seconds += seconds
+
+    def summary(self):
+        ratio = self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+        return (
+            f"{self.compressed} compressed, {self.unchanged} unchanged, {self.small} below min size; "
+            f"{format_bytes(self.bytes_in)} -> {format_bytes(self.bytes_out)} ({ratio:.0%}) "
+            f"in {self.seconds:.2f} s"
+        )
+
+
+# Writes a gzip sibling (index.html -> index.html.gz) next to each output
+# for servers that send precompressed files. Outputs are handed over as the
+# build writes them and compressed on a thread pool, since zlib releases
+# the GIL. The sha256 of every compressed output is kept in the file at
+# path between builds, so output whose bytes did not change keeps its .gz
+# and outputs smaller than min_size get none.
+class Precompressor():
+    def __init__(self, path, hashes=None, min_size=1024, level=9, jobs=None):
+        self.path = path
+        # dest path -> sha256 of the bytes its .gz was made from, or None
+        # when the output was too small to compress.
+        self.hashes = hashes if hashes is not None else {}
+        self.min_size = min_size
+        self.level = level
+        # More threads than cores only fight over the GIL between the
+        # stretches zlib and hashlib spend without it.
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.stats = CompressStats()
+        self.executor = None
+        self.futures = []
+        # Bounds the outputs held in memory while they wait for a thread.
+        self.slots = threading.BoundedSemaphore(self.jobs * 4)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        if not os.path.exists(path):
+            return cls(path, **kwargs)
+        with open(path, "r") as f:
+            return cls(path, json.load(f), **kwargs)
+
+    def compressible(self, dest_path):
+        return os.path.splitext(dest_path)[1].lower() in COMPRESSIBLE
+
+    # data is the output's content, as just written to dest_path.
+    def add(self, dest_path, data):
+        if not self.compressible(dest_path):
+            return
+        if isinstance(data, str):
+            data = data.encode()
+        self.submit(self.compress, os.path.normpath(dest_path), data)
+
+    # For outputs not held in memory: streamed pages and static files. An
+    # output that was not rebuilt is only read if it has no .gz yet.
+    def add_file(self, dest_path, changed=True):
+        if not self.compressible(dest_path):
+            return
+        dest_path = os.path.normpath(dest_path)
+        if not changed and dest_path in self.hashes:
+            if self.hashes[dest_path] is None or os.path.exists(dest_path + ".gz"):
+                self.stats.add("unchanged")
+                return
+        self.submit(self.compress_file, dest_path)
+
+    def submit(self, fn, *args):
+        if self.jobs == 1:
+            # A single thread beside the renderer cannot overlap anything
+            # and would only pass the GIL back and forth.
+            future = Future()
+            future.set_result(fn(*args))
+            self.futures.append(future)
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.jobs)
+        self.slots.acquire()
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+
+    # Reads the output a chunk at a time, so a page streamed to disk because
+    # it is too large to hold in memory is not loaded whole here either.
+    def compress_file(self, dest_path):
+        started = time.perf_counter()
+        size = os.path.getsize(dest_path)
+        if size < self.min_size:
+            return self.drop(dest_path)
+
+        def copy(gz):
+            with open(dest_path, "rb") as f:
+                shutil.copyfileobj(f, gz, CHUNK_SIZE)
+
+        return self.write_gz(dest_path, hash_file(dest_path), size, copy, started)
+
+    def compress(self, dest_path, data):
+        started = time.perf_counter()
+        if len(data) < self.min_size:
+            return self.drop(dest_path)
+        digest = hashlib.sha256(data).hexdigest()
+        return self.write_gz(dest_path, digest, len(data), lambda gz: gz.write(data), started)
+
+    def drop(self, dest_path):
+        gz_path = dest_path + ".gz"
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+        return dest_path, None, "small", 0, 0, 0.0
+
+    # write(gz) writes the output's bytes to the gzip stream gz, which is
+    # only done when digest differs from the one its .gz was made from.
+    def write_gz(self, dest_path, digest, size, write, started):
+        gz_path = dest_path + ".gz"
+        if self.hashes.get(dest_path) == digest and os.path.exists(gz_path):
+            return dest_path, digest, "unchanged", 0, 0, time.perf_counter() - started
+        logger.debug(" * %s -> %s", dest_path, gz_path)
+        tmp_path = f"{gz_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            # No name or mtime in the header, so the same output always
+            # compresses to the same bytes.
+            with gzip.GzipFile(filename="", mode="wb", compresslevel=self.level, fileobj=f, mtime=0) as gz:
+                write(gz)
+            compressed_size = f.tell()
+        os.replace(tmp_path, gz_path)
+        return dest_path, digest, "compressed", size, compressed_size, time.perf_counter() - started
+
+    # Waits for every queued output and records what was done with it.
+    def wait(self):
+        futures, self.futures = self.futures, []
+        try:
+            for future in futures:
+                dest_path, digest, result, size, compressed_size, seconds = future.result()
+                self.hashes[dest_path] = digest
+                self.stats.add(result, size, compressed_size, seconds)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+    # Forgets the .gz made for dest_path, for an output replaced outside the
+    # build, so add_file() compresses it again even if it was not rebuilt.
+    def invalidate(self, dest_path):
+        self.hashes.pop(os.path.normpath(dest_path), None)
+
+    # Like BuildManifest.rebase().
+    def rebase(self, old_dir_path, new_dir_path):
+        self.hashes = {rebase_path(path, old_dir_path, new_dir_path): digest for path, digest in self.hashes.items()}
+
+    # Drops the .gz of every output that no longer exists.
+    def prune(self):
+        for dest_path in [path for path in self.hashes if not os.path.exists(path)]:
+            del self.hashes[dest_path]
+            if os.path.exists(dest_path + ".gz"):
+                os.remove(dest_path + ".gz")
+
+    # Removes every .gz this Precompressor made, for a build that no longer
+    # precompresses: a sibling left behind would be served in place of an
+    # output the build changes.
+    def discard(self):
+        for dest_path in self.hashes:
+            if os.path.exists(dest_path + ".gz"):
+                os.remove(dest_path + ".gz")
+                self.stats.removed += 1
+        self.hashes = {}
+
+    def save(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.hashes, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        return self.stats.summary()
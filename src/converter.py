@@ -1,25 +1,39 @@
 from textnode import TextType, TextNode
 from htmlnode import LeafNode
-    
+
+# TextType -> the LeafNode a TextNode becomes. Images keep the original
+# src=text, alt=url mapping.
+NODE_BUILDERS = {
+    TextType.TEXT: lambda node: LeafNode(None, node.text),
+    TextType.BOLD: lambda node: LeafNode("b", node.text),
+    TextType.ITALIC: lambda node: LeafNode("i", node.text),
+    TextType.CODE: lambda node: LeafNode("code", node.text),
+    TextType.LINK: lambda node: LeafNode("a", node.text, {"href": f"{node.url}"}),
+    TextType.IMAGE: lambda node: LeafNode("img", "", {"src": f"{node.text}", "alt": f"{node.url}"}),
+}
+
+# TextType -> the HTML text_node_to_html_node(node).to_html() returns,
+# written out directly so no LeafNode is built at all.
+HTML_EMITTERS = {
+    TextType.TEXT: lambda node: node.text,
+    TextType.BOLD: lambda node: f"<b>{node.text}</b>",
+    TextType.ITALIC: lambda node: f"<i>{node.text}</i>",
+    TextType.CODE: lambda node: f"<code>{node.text}</code>",
+    TextType.LINK: lambda node: f"<a href=\"{node.url}\">{node.text}</a>",
+    TextType.IMAGE: lambda node: f"<img src=\"{node.text}\" alt=\"{node.url}\"></img>",
+}
+
+
 def text_node_to_html_node(text_node):
-    match(text_node.text_type):
-        case (TextType.TEXT):
-            return LeafNode(tag=None, value=text_node.text)
-            
-        case (TextType.BOLD):
-            return LeafNode(tag="b", value=text_node.text)
-            
-        case (TextType.ITALIC):
-            return LeafNode(tag="i", value=text_node.text)
-            
-        case (TextType.CODE):
-            return LeafNode(tag="code", value=text_node.text)
-        
-        case (TextType.LINK):
-            return LeafNode(tag="a", value=text_node.text, props={"href": f"{text_node.url}"})
-            
-        case (TextType.IMAGE):
-            return LeafNode(tag="img", value="", props={"src": f"{text_node.text}",
-                                                    "alt": f"{text_node.url}"})
-        case _:
-            raise Exception("Invalid Text Type")
\ No newline at end of file
+    try:
+        build = NODE_BUILDERS[text_node.text_type]
+    except KeyError:
+        raise Exception("Invalid Text Type")
+    return build(text_node)
+
+
+def text_nodes_to_html(text_nodes):
+    try:
+        return "".join([HTML_EMITTERS[text_node.text_type](text_node) for text_node in text_nodes])
+    except KeyError:
+        raise Exception("Invalid Text Type")
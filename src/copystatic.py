@@ -1,7 +1,56 @@
+import errno
+import logging
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
+logger = logging.getLogger(__name__)
 
+# "auto" tries a copy-on-write clone, then a hardlink, then an in-kernel
+# copy. Hardlinked outputs share their inode with static/.
+SYNC_MODES = ("auto", "reflink", "hardlink", "copy")
+CHECK_MODES = ("stat", "hash")
+
+FICLONE = 0x40049409
+
+# errno values that mean "this transfer method does not work here", as
+# opposed to a real I/O failure.
+UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS, errno.EMLINK}
+
+
+class SyncStats():
+    def __init__(self):
+        self.methods = {}
+        self.bytes_copied = 0
+        self.bytes_avoided = 0
+
+    def add(self, method, size):
+        self.methods[method] = self.methods.get(method, 0) + 1
+        # Skipped, cloned and linked files move no file data.
+        if method in ("skipped", "reflink", "hardlink"):
+            self.bytes_avoided += size
+        else:
+            self.bytes_copied += size
+
+    def summary(self):
+        methods = ", ".join(f"{count} {method}" for method, count in sorted(self.methods.items()))
+        return (
+            f"{methods or 'no files'}; {format_bytes(self.bytes_copied)} copied, "
+            f"{format_bytes(self.bytes_avoided)} avoided"
+        )
+
+
+def format_bytes(size):
+    if size < 1024:
+        return f"{size} B"
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+
+
+# A plain recursive copy, kept as the baseline sync_static() is measured
+# against in the benchmarks.
 def copy_files_recursive(source_dir_path, dest_dir_path):
     if not os.path.exists(dest_dir_path):
         os.mkdir(dest_dir_path)
@@ -9,8 +58,151 @@ def copy_files_recursive(source_dir_path, dest_dir_path):
     for filename in os.listdir(source_dir_path):
         from_path = os.path.join(source_dir_path, filename)
         dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
         if os.path.isfile(from_path):
             shutil.copy(from_path, dest_path)
         else:
             copy_files_recursive(from_path, dest_path)
+
+
+# Syncs a single file the way sync_static() would, for serve --watch.
+def copy_file(from_path, dest_path, manifest, mode, check, compressor=None):
+    key = static_key(manifest, from_path, check)
+    if manifest.is_fresh(dest_path, key):
+        if compressor is not None:
+            compressor.add_file(dest_path, changed=False)
+        return "skipped"
+    method = transfer_file(from_path, dest_path, mode)
+    manifest.record(dest_path, key)
+    if compressor is not None:
+        compressor.add_file(dest_path)
+    return method
+
+
+# Brings dest_dir_path in line with source_dir_path on a thread pool: files
+# whose size and mtime (or hash, with check="hash") are unchanged since the
+# last sync are skipped, the rest are cloned, linked or copied per mode.
+# Assets deleted from static/ are pruned by manifest.remove_orphans().
+# Each synced file is also handed to compressor, if given.
+def sync_static(source_dir_path, dest_dir_path, manifest=None, mode="auto", check="stat", jobs=8, compressor=None):
+    stats = SyncStats()
+    files = []
+    collect_files(source_dir_path, dest_dir_path, files)
+
+    def sync_one(paths):
+        from_path, dest_path = paths
+        size = os.path.getsize(from_path)
+        key = static_key(manifest, from_path, check) if manifest is not None else None
+        if key is not None and manifest.recorded_key(dest_path) == key and os.path.exists(dest_path):
+            return dest_path, key, "skipped", size
+        return dest_path, key, transfer_file(from_path, dest_path, mode), size
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        for dest_path, key, method, size in executor.map(sync_one, files):
+            stats.add(method, size)
+            if compressor is not None:
+                compressor.add_file(dest_path, changed=method != "skipped")
+            if manifest is None:
+                continue
+            if method == "skipped":
+                manifest.is_fresh(dest_path, key)
+            else:
+                manifest.record(dest_path, key)
+    return stats
+
+
+def collect_files(source_dir_path, dest_dir_path, files):
+    for filename in os.listdir(source_dir_path):
+        from_path = os.path.join(source_dir_path, filename)
+        dest_path = os.path.join(dest_dir_path, filename)
+        if os.path.isfile(from_path):
+            files.append((from_path, dest_path))
+        else:
+            collect_files(from_path, dest_path, files)
+
+
+def static_key(manifest, from_path, check):
+    if check == "hash":
+        return manifest.source_key(from_path)
+    return manifest.stat_key(from_path)
+
+
+# Replaces dest_path with the contents of from_path and returns the method
+# that did it. The new file is always created beside dest_path and renamed
+# over it, so an existing hardlink to the source is never written through.
+def transfer_file(from_path, dest_path, mode="copy"):
+    logger.debug(" * %s -> %s", from_path, dest_path)
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    # Opening a stale temp file for writing could truncate the source
+    # through a hardlink.
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        method = None
+        if mode in ("auto", "reflink"):
+            method = try_reflink(from_path, tmp_path)
+        if method is None and mode in ("auto", "hardlink"):
+            method = try_hardlink(from_path, tmp_path)
+        if method is None:
+            method = copy_bytes(from_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    finally:
+        # rename() is a no-op when both names already link the same inode,
+        # so the temp name can survive even on success.
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+    return method
+
+
+def try_reflink(from_path, dest_path):
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    with open(from_path, "rb") as src, open(dest_path, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError as e:
+            if e.errno not in UNSUPPORTED:
+                raise
+            dst.close()
+            os.remove(dest_path)
+            return None
+    shutil.copymode(from_path, dest_path)
+    return "reflink"
+
+
+def try_hardlink(from_path, dest_path):
+    try:
+        os.link(from_path, dest_path)
+    except OSError as e:
+        if e.errno not in UNSUPPORTED:
+            raise
+        return None
+    return "hardlink"
+
+
+def copy_bytes(from_path, dest_path):
+    method = "copy"
+    with open(from_path, "rb") as src, open(dest_path, "wb") as dst:
+        if hasattr(os, "copy_file_range"):
+            remaining = os.fstat(src.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                method = "copy_file_range"
+            except OSError as e:
+                if e.errno not in UNSUPPORTED:
+                    raise
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+        if method == "copy":
+            shutil.copyfileobj(src, dst)
+    shutil.copymode(from_path, dest_path)
+    return method
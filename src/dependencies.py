@@ -0,0 +1,63 @@
+import os
+from urllib.parse import unquote, urlsplit
+
+from references import scan_references
+
+
+# Finds the sources a page depends on besides its own markdown and the
+# template: the pages it links to and the static images it shows. The
+# manifest records them with the page's output, so a change to any of them
+# rebuilds the page. The same scan fills in the ReferenceIndex, if given.
+class PageDependencies():
+    def __init__(self, dir_path_content, dir_path_static, references=None):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.references = references
+
+    def find(self, from_path):
+        references = scan_references(from_path)
+        if self.references is not None:
+            self.references.update(from_path, references)
+        dependencies = {self.url_to_source(url, from_path, image=kind == "image") for kind, url, _ in references}
+        dependencies.discard(None)
+        dependencies.discard(os.path.normpath(from_path))
+        return sorted(dependencies)
+
+    # Maps a link or image URL to the source file that produces it, or None
+    # for external URLs and bare fragments. A target that does not exist yet
+    # maps to where it would be, so creating it rebuilds the page.
+    def url_to_source(self, url, from_path, image=False):
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or parts.path == "":
+            return None
+        path = unquote(parts.path)
+        if path.startswith("/"):
+            site_path = path.lstrip("/")
+        else:
+            page_dir = os.path.relpath(os.path.dirname(from_path), self.dir_path_content)
+            site_path = os.path.join(page_dir, path)
+        site_path = os.path.normpath(site_path)
+        if site_path == ".":
+            site_path = ""
+        if site_path.startswith(".."):
+            return None
+
+        static_path = os.path.normpath(os.path.join(self.dir_path_static, site_path))
+        if image:
+            return static_path
+        content_path = os.path.normpath(os.path.join(self.dir_path_content, site_path))
+        root, ext = os.path.splitext(content_path)
+        if site_path == "" or path.endswith("/"):
+            candidates = [os.path.join(content_path, "index.md")]
+        elif ext == ".html":
+            candidates = [root + ".md", static_path]
+        elif ext == ".md":
+            candidates = [content_path]
+        elif ext == "":
+            candidates = [content_path + ".md", os.path.join(content_path, "index.md"), static_path]
+        else:
+            candidates = [static_path]
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return candidate
+        return candidates[0]
@@ -1,45 +1,341 @@
+import io
+import logging
 import os
-from inline_markdown import markdown_to_html_node
+import threading
+from itertools import repeat
+import inline_markdown
+from inline_markdown import MarkdownStream, markdown_to_html_node
+from metadata import MetadataIndex, find_title, page_template, read_front_matter, split_front_matter
 from pathlib import Path
+from ast_cache import ASTCache
+from profiling import PageTimer, timed_markdown_to_html_node
+from shard import select_shard
+from template import load_template
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+logger = logging.getLogger(__name__)
+
+# Markdown files at least this large are rendered block by block straight
+# into the output instead of being parsed into a tree first.
+stream_threshold = 32 * 1024 * 1024
+
+
+def use_stream_threshold(size):
+    global stream_threshold
+    stream_threshold = size
+
+
+# shard, an (index, count) pair, limits the build to the pages that
+# shard.shard_of() assigns to index.
+def generate_pages_recursive(
+    dir_path_content, template_path, dest_dir_path, manifest=None, jobs=1, profiler=None, ast_cache=None,
+    pipeline=None, dependencies=None, compressor=None, shard=None, metadata=None,
+):
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        pages = select_shard(pages, dir_path_content, shard)
+    return generate_pages(
+        pages, template_path, manifest, jobs=jobs, profiler=profiler, ast_cache=ast_cache, pipeline=pipeline,
+        dependencies=dependencies, compressor=compressor, metadata=metadata,
+    )
+
+
+# pipeline, when given, is an object whose run(pages, template_path,
+# ast_cache, compressor) renders the stale pages and returns their errors,
+# counting outputs it left untouched in .unchanged, such as
+# async_build.AsyncPipeline; per-page profiling is not collected then.
+# dependencies, when given with a manifest, is a PageDependencies whose
+# links and images are recorded with each page so a change to one rebuilds it.
+# compressor, when given, is a compress.Precompressor that is handed every
+# page's output; the caller waits for it.
+# metadata is the MetadataIndex that drafts are skipped by and that gives
+# each page's template; by default one is made for this call. A draft's
+# earlier output is removed.
+def generate_pages(
+    pages, template_path, manifest=None, jobs=1, profiler=None, ast_cache=None, pipeline=None, dependencies=None,
+    compressor=None, metadata=None,
+):
+    if metadata is None:
+        metadata = MetadataIndex()
+    published = metadata.published(pages)
+    if manifest is not None and len(published) < len(pages):
+        for from_path, dest_path in set(pages) - set(published):
+            manifest.remove(dest_path)
+    stale_pages = []
+    for from_path, dest_path in published:
+        key = None
+        if manifest is not None:
+            key = manifest.page_key(from_path, page_template(metadata.get(from_path), template_path), dest_path)
+            if manifest.is_fresh(dest_path, key):
+                if compressor is not None:
+                    compressor.add_file(dest_path, changed=False)
+                continue
+            manifest.explain(dest_path, key)
+        stale_pages.append((from_path, dest_path, key))
+
+    pages = [(from_path, dest_path) for from_path, dest_path, _ in stale_pages]
+    profile = profiler is not None
+    if pipeline is not None:
+        errors = pipeline.run(pages, template_path, ast_cache, compressor)
+        timings = []
+        unchanged = pipeline.unchanged
+    elif jobs > 1:
+        errors, timings, unchanged = generate_pages_parallel(
+            pages, template_path, jobs, profile=profile, ast_cache=ast_cache, compressor=compressor
+        )
+    else:
+        errors = []
+        timings = []
+        unchanged = 0
+        for from_path, dest_path in pages:
+            timer = PageTimer() if profile else None
+            try:
+                if not generate_page(from_path, template_path, dest_path, timer, ast_cache, compressor):
+                    unchanged += 1
+            except Exception as e:
+                errors.append((from_path, f"{type(e).__name__}: {e}"))
+                continue
+            if profile:
+                timings.append((from_path, timer.timings))
+    for from_path, page_timings in timings:
+        profiler.add_page(from_path, page_timings)
+
+    if manifest is not None:
+        manifest.unchanged += unchanged
+        failed = {from_path for from_path, _ in errors}
+        for from_path, dest_path, key in stale_pages:
+            if from_path in failed:
+                # Its last good output stays up rather than being removed
+                # as an orphan, and is rebuilt once the page is fixed.
+                manifest.keep(dest_path)
+                continue
+            if dependencies is not None:
+                key = manifest.page_key(
+                    from_path, page_template(metadata.get(from_path), template_path), dest_path,
+                    dependencies.find(from_path),
+                )
+            manifest.record(dest_path, key)
+    return errors
+
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    rel_path = os.path.relpath(from_path, dir_path_content)
+    return Path(os.path.join(dest_dir_path, rel_path)).with_suffix(".html")
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
     for filename in os.listdir(dir_path_content):
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
         if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path)
+            pages.append((from_path, Path(dest_path).with_suffix(".html")))
         else:
-            generate_pages_recursive(from_path, template_path, dest_path)
+            pages.extend(collect_pages(from_path, dest_path))
+    return pages
+
+
+# Workers cannot share compressor, so each finished batch's pages are read
+# back and compressed here while later batches render.
+def generate_pages_parallel(
+    pages, template_path, jobs, batch_size=None, profile=False, ast_cache=None, compressor=None
+):
+    if not pages:
+        return [], [], 0
+    # Imported here: multiprocessing is slow to import and most builds
+    # never start a pool.
+    from concurrent.futures import ProcessPoolExecutor
 
+    if batch_size is None:
+        # A few batches per worker keeps the pool busy without paying
+        # a pickling round trip for every single page.
+        batch_size = max(1, min(64, len(pages) // (jobs * 4)))
+    batches = [pages[i:i + batch_size] for i in range(0, len(pages), batch_size)]
+    errors = []
+    timings = []
+    unchanged = 0
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(
+            inline_markdown.inline_tokenizer_name,
+            inline_markdown.inline_cache.max_entries if inline_markdown.inline_cache is not None else 0,
+            stream_threshold,
+            logging.getLogger().level,
+        ),
+    ) as executor:
+        # Each batch gets its own copy of ast_cache and reports the hits and
+        # misses it saw and the bytes it wrote, which are folded back into
+        # the caller's counters.
+        batch_results = executor.map(
+            generate_page_batch, batches, repeat(template_path), repeat(profile), repeat(ast_cache)
+        )
+        for batch, result in zip(batches, batch_results):
+            errors.extend(result["errors"])
+            unchanged += result["unchanged"]
+            if compressor is not None:
+                failed = {from_path for from_path, _ in result["errors"]}
+                for from_path, dest_path in batch:
+                    if from_path not in failed:
+                        compressor.add_file(dest_path)
+            timings.extend(result["timings"])
+            if ast_cache is not None:
+                ast_cache.hits += result["ast_cache"][0]
+                ast_cache.misses += result["ast_cache"][1]
+                ast_cache.written += result["ast_cache"][2]
+            if inline_markdown.inline_cache is not None:
+                inline_markdown.inline_cache.add_counts(*result["inline_cache"])
+    return errors, timings, unchanged
 
-def generate_page(from_path, template_path, dest_path):
-    print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
+def init_worker(inline_tokenizer_name, inline_cache_size, threshold, log_level):
+    inline_markdown.use_inline_tokenizer(inline_tokenizer_name)
+    inline_markdown.use_inline_cache(inline_cache_size)
+    use_stream_threshold(threshold)
+    logging.basicConfig(level=log_level, format="%(message)s")
+
+
+def generate_page_batch(pages, template_path, profile=False, ast_cache=None):
+    if ast_cache is not None:
+        ast_cache = ASTCache(ast_cache.dir_path, ast_cache.max_bytes)
+    # Worker caches outlive a batch, so report only what this batch did.
+    inline_cache = inline_markdown.inline_cache
+    inline_counts = inline_cache.counts() if inline_cache is not None else None
+    errors = []
+    timings = []
+    unchanged = 0
+    for from_path, dest_path in pages:
+        timer = PageTimer() if profile else None
+        try:
+            if not generate_page(from_path, template_path, dest_path, timer, ast_cache):
+                unchanged += 1
+        except Exception as e:
+            errors.append((from_path, f"{type(e).__name__}: {e}"))
+            continue
+        if profile:
+            timings.append((from_path, timer.timings))
+    result = {"errors": errors, "timings": timings, "unchanged": unchanged}
+    if ast_cache is not None:
+        result["ast_cache"] = (ast_cache.hits, ast_cache.misses, ast_cache.written)
+    if inline_cache is not None:
+        result["inline_cache"] = tuple(now - before for now, before in zip(inline_cache.counts(), inline_counts))
+    return result
+
+
+# Returns False when the output already held exactly the rendered bytes
+# and was left untouched.
+def generate_page(from_path, template_path, dest_path, timer=None, ast_cache=None, compressor=None):
+    logger.debug(" * %s %s -> %s", from_path, template_path, dest_path)
+    if os.path.getsize(from_path) >= stream_threshold:
+        generate_page_streamed(from_path, template_path, dest_path, timer)
+        if compressor is not None:
+            compressor.add_file(dest_path)
+        return True
+    with open(from_path, "r") as from_file:
+        markdown_content = from_file.read()
+
+    meta, title, node = parse_page(markdown_content, timer, ast_cache)
+    template = load_template(page_template(meta, template_path))
+
+    if timer is None:
+        buffer = io.StringIO()
+        template.write(buffer, {"Title": title, "Content": node})
+        page = buffer.getvalue()
+    else:
+        # Profiled pages are rendered with to_html() so serialization and
+        # template filling can be timed separately.
+        html = node.to_html()
+        timer.lap("to_html")
+        page = template.render({"Title": title, "Content": html})
+        timer.lap("template")
+    written = write_output(dest_path, page)
+    if timer is not None:
+        timer.lap("write")
+    if compressor is not None:
+        compressor.add(dest_path, page)
+    return written
+
+
+# Replaces dest_path with page in a single write, unless it already holds
+# exactly those bytes, and returns whether it wrote. The page goes to a
+# temporary file that is renamed over dest_path, so a reader never sees
+# half a page and an output hardlinked into a staging copy of public/ is
+# never written through.
+def write_output(dest_path, page):
+    data = page.encode()
+    try:
+        if os.path.getsize(dest_path) == len(data):
+            with open(dest_path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        make_parent_dirs(dest_path)
+    tmp_path = temp_path(dest_path)
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, dest_path)
+    return True
+
+
+# Unique per process and thread, for the async pipeline's writers.
+def temp_path(dest_path):
+    return f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+# Returns a page's front matter, its title (from the front matter, or else
+# its first heading) and the tree of its markdown.
+def parse_page(markdown_content, timer=None, ast_cache=None):
+    meta, markdown_content = split_front_matter(markdown_content)
+    node = None
+    if ast_cache is not None:
+        node = ast_cache.get(markdown_content)
+    if timer is not None:
+        timer.lap("read")
+    if node is None:
+        if timer is None:
+            node = markdown_to_html_node(markdown_content)
+        else:
+            node = timed_markdown_to_html_node(markdown_content, timer)
+        if ast_cache is not None:
+            ast_cache.put(markdown_content, node)
+    return meta, meta["title"] or extract_title(markdown_content), node
+
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
+def make_parent_dirs(path):
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
 
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
+def generate_page_streamed(from_path, template_path, dest_path, timer=None):
+    with open(from_path, "r") as from_file:
+        meta = read_front_matter(from_file)
+        template = load_template(page_template(meta, template_path))
+        # A first pass for the title, so a page without one fails before
+        # its output is touched.
+        start = from_file.tell()
+        title = meta["title"] or find_title(from_file)
+        from_file.seek(start)
+        make_parent_dirs(dest_path)
+        tmp_path = temp_path(dest_path)
+        try:
+            with open(tmp_path, "w") as to_file:
+                template.write(to_file, {"Title": title, "Content": MarkdownStream(from_file)})
+            os.replace(tmp_path, dest_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    if timer is not None:
+        timer.lap("write")
 
 
+# The first "# " line, found without splitting the whole page into lines.
 def extract_title(md):
-    lines = md.split("\n")
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:]
-    raise ValueError("No title found")
+    if md.startswith("# "):
+        start = 2
+    else:
+        start = md.find("\n# ")
+        if start == -1:
+            raise ValueError("No title found")
+        start += 3
+    end = md.find("\n", start)
+    return md[start:] if end == -1 else md[start:end]
@@ -1,6 +1,11 @@
+import io
+
 from textnode import TextNode, TextType
 
 class HTMLNode():
+    # Pages create thousands of nodes; slots drop the per-instance __dict__.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -10,6 +15,11 @@ class HTMLNode():
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    # Streams the same HTML to_html() returns into any object with a write()
+    # method, e.g. an open file, without building the full string first.
+    def write_html(self, out):
+        out.write(self.to_html())
+
     def props_to_html(self):
         if not self.props:
             return ""
@@ -20,6 +30,8 @@ class HTMLNode():
 
  
 class LeafNode(HTMLNode): # techincally void_elements like img are self closing, dont need </img> at end but solution files have them so we follow
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -30,24 +42,34 @@ class LeafNode(HTMLNode): # techincally void_elements like img are self closing,
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def write_html(self, out):
+        # Rendered inline text arrives as tagless leaves; skip to_html().
+        if self.tag is None and self.value is not None:
+            out.write(self.value)
+        else:
+            out.write(self.to_html())
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        out = io.StringIO()
+        self.write_html(out)
+        return out.getvalue()
+
+    def write_html(self, out):
         if self.tag is None:
             raise ValueError("Invalid Tag: no value")
         if self.children is None:
             raise ValueError("Invalid Children: no children")
-        html = f"<{self.tag}{self.props_to_html()}>"
+        out.write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            html += child.to_html()
-        return html + f"</{self.tag}>"   
-        
-            
-        
-            
\ No newline at end of file
+            child.write_html(out)
+        out.write(f"</{self.tag}>")
@@ -1,6 +1,10 @@
 from textnode import TextNode, TextType
-from htmlnode import ParentNode
-from converter import text_node_to_html_node
+from htmlnode import LeafNode, ParentNode
+from converter import text_nodes_to_html
+from inline_scanner import scan_inline
+from block_scanner import iter_blocks
+from memo import MemoCache
+import io
 import re
 
 
@@ -34,13 +38,18 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
         new_nodes.extend(split_nodes)
     return new_nodes
 
+_IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+_LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+_HEADING_RE = re.compile(r"#{1,6} ")
+
+
 def extract_markdown_images(text):
-    description_images_tuple_list = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)    
+    description_images_tuple_list = _IMAGE_RE.findall(text)
 
     return description_images_tuple_list
 
 def extract_markdown_links(text):
-    description_link_tuple_list = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    description_link_tuple_list = _LINK_RE.findall(text)
     
     return description_link_tuple_list
 
@@ -108,6 +117,46 @@ def text_to_textnodes(text):
     nodes = split_nodes_image(nodes)
     nodes = split_nodes_link(nodes)
     return nodes
+
+
+# "chained" is the pass-per-delimiter pipeline above, "scan" the single-pass
+# scanner; both produce the same TextNode list.
+inline_tokenizers = {
+    "chained": text_to_textnodes,
+    "scan": scan_inline,
+}
+inline_tokenizer_name = "scan"
+inline_tokenizer = inline_tokenizers[inline_tokenizer_name]
+
+
+def use_inline_tokenizer(name):
+    global inline_tokenizer, inline_tokenizer_name
+    if name not in inline_tokenizers:
+        raise ValueError(f"Unknown inline tokenizer: {name}")
+    inline_tokenizer_name = name
+    inline_tokenizer = inline_tokenizers[name]
+    if inline_cache is not None:
+        inline_cache.clear()
+
+
+# Rendered children of recently seen inline text, shared by every page the
+# process builds; footers, admonitions and link lists repeat across a site.
+# Longer texts are rarely repeated and would only crowd the cache.
+INLINE_CACHE_MAX_TEXT = 1024
+
+
+# Inline text becomes one tagless leaf holding its finished HTML, written
+# by the converter's emitters, rather than one LeafNode per TextNode.
+def render_inline(text):
+    return LeafNode(None, text_nodes_to_html(inline_tokenizer(text)))
+
+
+inline_cache = MemoCache(render_inline, 4096)
+
+
+def use_inline_cache(max_entries):
+    global inline_cache
+    inline_cache = MemoCache(render_inline, max_entries) if max_entries > 0 else None
         
 # markdown_blocks --------------------------------------------------------------------------------------
 
@@ -127,7 +176,7 @@ def markdown_to_blocks(markdown):
 
 def block_to_block_type(block):
     
-    if re.match(r"^#{1,6} ", block):
+    if _HEADING_RE.match(block):
         return "heading"
 
     if block.startswith("```") and block.endswith("```"):
@@ -180,16 +229,31 @@ block_type_ulist = "unordered_list"
 
   
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
+    for block_type, block in iter_blocks(io.StringIO(markdown)):
+        html_node = block_to_html_node(block, block_type)
         children.append(html_node)
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+# Stands in for markdown_to_html_node(markdown) when the markdown is too
+# large to hold in memory: lines (e.g. an open file) are parsed one block at
+# a time as write_html() runs, so Template.write() streams the page without
+# a full block list, tree or HTML string ever existing.
+class MarkdownStream():
+    def __init__(self, lines):
+        self.lines = lines
+
+    def write_html(self, out):
+        out.write("<div>")
+        for block_type, block in iter_blocks(self.lines):
+            block_to_html_node(block, block_type).write_html(out)
+        out.write("</div>")
+
+
+def block_to_html_node(block, block_type=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     if block_type == block_type_paragraph:
         return paragraph_to_html_node(block)
     if block_type == block_type_heading:
@@ -205,12 +269,9 @@ def block_to_html_node(block):
     raise ValueError("Invalid block type")
 
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
-        children.append(html_node)
-    return children
+    if inline_cache is not None and len(text) <= INLINE_CACHE_MAX_TEXT:
+        return [inline_cache(text)]
+    return [render_inline(text)]
     
 
 def paragraph_to_html_node(block):
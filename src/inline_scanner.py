@@ -0,0 +1,124 @@
+import re
+
+from textnode import TextNode, TextType
+
+# One left-to-right pass that yields the same TextNode list as the chained
+# split_nodes_* functions in inline_markdown.text_to_textnodes. The chained
+# version splits on "**", then "*", then "`", then pulls images and links out
+# of whatever plain text is left, so the scanner keeps one open section per
+# delimiter level and resets the lower levels whenever a higher one closes.
+
+# A bare character class lets the regex engine skip plain text at C speed.
+_TOKEN_RE = re.compile(r"[*`\[]")
+# The image and link patterns from extract_markdown_images/links, minus "*"
+# and "`": the chained version splits on those first, so a match can never
+# span one.
+_IMAGE_RE = re.compile(r"!\[([^\[\]*`]*)\]\(([^\(\)*`]*)\)")
+_LINK_RE = re.compile(r"\[([^\[\]*`]*)\]\(([^\(\)*`]*)\)")
+
+
+def scan_inline(text):
+    if text == "":
+        return [TextNode(text, TextType.TEXT)]
+
+    nodes = []
+    length = len(text)
+    bold = italic = code = False
+    # Start of the open section at each level, plus whether any non-empty
+    # section was seen at that level. A level made only of delimiters
+    # (e.g. "**" or a lone "*") is kept as literal text, like the chained
+    # version does.
+    start1 = start2 = start3 = 0
+    seen1 = seen2 = seen3 = False
+    # Plain text in the open level-3 section not yet emitted.
+    pending = 0
+
+    def close_level3(end):
+        nonlocal seen3
+        if end == start3:
+            return
+        seen3 = True
+        if code:
+            nodes.append(TextNode(text[start3:end], TextType.CODE))
+        elif pending < end:
+            nodes.append(TextNode(text[pending:end], TextType.TEXT))
+
+    def close_level2(end):
+        nonlocal seen2
+        if end == start2:
+            return
+        seen2 = True
+        if italic:
+            nodes.append(TextNode(text[start2:end], TextType.ITALIC))
+            return
+        close_level3(end)
+        if not seen3:
+            nodes.append(TextNode(text[start2:end], TextType.TEXT))
+
+    def close_level1(end):
+        nonlocal seen1
+        if end == start1:
+            return
+        seen1 = True
+        if bold:
+            nodes.append(TextNode(text[start1:end], TextType.BOLD))
+            return
+        close_level2(end)
+        if not seen2:
+            nodes.append(TextNode(text[start1:end], TextType.TEXT))
+
+    pos = 0
+    while True:
+        match = _TOKEN_RE.search(text, pos)
+        if match is None:
+            break
+        at = match.start()
+        pos = at + 1
+        token = text[at]
+        if token == "*" and text.startswith("*", pos):
+            token = "**"
+            pos += 1
+
+        if token == "**":
+            close_level1(at)
+            bold = not bold
+            italic = code = False
+            seen2 = seen3 = False
+            start1 = start2 = start3 = pending = pos
+        elif bold:
+            continue
+        elif token == "*":
+            close_level2(at)
+            italic = not italic
+            code = False
+            seen3 = False
+            start2 = start3 = pending = pos
+        elif italic:
+            continue
+        elif token == "`":
+            close_level3(at)
+            code = not code
+            start3 = pending = pos
+        elif code:
+            continue
+        else:
+            # A "[" right after "!" can only start an image: the link
+            # pattern has a (?<!!) lookbehind.
+            if at > 0 and text[at - 1] == "!":
+                at -= 1
+                found = _IMAGE_RE.match(text, at)
+                text_type = TextType.IMAGE
+            else:
+                found = _LINK_RE.match(text, at)
+                text_type = TextType.LINK
+            if found is None:
+                continue
+            if pending < at:
+                nodes.append(TextNode(text[pending:at], TextType.TEXT))
+            nodes.append(TextNode(found.group(1), text_type, found.group(2)))
+            pending = pos = found.end()
+
+    close_level1(length)
+    if not seen1:
+        nodes.append(TextNode(text, TextType.TEXT))
+    return nodes
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import re
+from html import escape
+
+from gencontent import page_dest_path, write_output
+from template import load_template
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+class ListingStats():
+    def __init__(self):
+        self.skipped = 0
+        self.rebuilt = 0
+        self.pages = 0
+        # The output of every listing this run, built or skipped.
+        self.outputs = []
+
+    def summary(self):
+        return f"{self.pages} listing pages; {self.skipped} skipped, {self.rebuilt} rebuilt"
+
+
+def tag_slug(tag):
+    return _SLUG_RE.sub("-", tag.lower()).strip("-") or "tag"
+
+
+# Splits entries, sorted oldest first, into pages of per_page counted from
+# the oldest, so a new post only ever changes the newest page: every older
+# page keeps exactly the entries it had. A backdated post changes the page
+# it lands on and those after it.
+def paginate(entries, per_page):
+    return [entries[i:i + per_page] for i in range(0, len(entries), per_page)] or [[]]
+
+
+def site_url(dest_path, dir_path_public):
+    url = "/" + os.path.relpath(dest_path, dir_path_public).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        url = url[: -len("index.html")]
+    return url
+
+
+# Builds the collection pages of a site from its MetadataIndex, once every
+# page of the build has been rendered and looked up in it:
+#   posts/index.html             the per_page newest dated pages
+#   posts/page/N/index.html      every dated page, per_page at a time
+#   tags/index.html              every tag with its page count
+#   tags/TAG/... the same        for the pages carrying TAG
+# Each output is recorded in manifest under a key holding a digest of the
+# entries it lists, so only the listing pages whose entries or neighbours
+# changed are rendered again. Listings that stop existing are left to
+# manifest.remove_orphans(). Returns the stats and the errors, one for each
+# listing whose output is also a page's.
+def build_listings(metadata, dir_path_content, dir_path_public, template_path, manifest, per_page=10, compressor=None):
+    stats = ListingStats()
+    errors = []
+    template = load_template(template_path)
+    template_key = manifest.source_key(template_path)
+
+    # A page is listed under every one of its tags, so its entry is made once.
+    entries = {}
+
+    def entry(from_path, meta):
+        if from_path not in entries:
+            url = site_url(page_dest_path(from_path, dir_path_content, dir_path_public), dir_path_public)
+            entries[from_path] = [url, meta["title"] or url, meta["date"], meta["summary"]]
+        return entries[from_path]
+
+    def render(dest_path, title, entries, nav):
+        stats.pages += 1
+        dest_path = os.path.normpath(dest_path)
+        recorded = manifest.new_entries.get(dest_path)
+        if recorded is not None and "page" in recorded:
+            errors.append((dest_path, "ValueError: this listing would overwrite the output of " + recorded["page"]))
+            return
+        stats.outputs.append(dest_path)
+        # A digest rather than the entries, which would copy every summary
+        # into the manifest once per listing showing it.
+        key = {**template_key, "listing": hashlib.sha256(json.dumps([title, entries, nav]).encode()).hexdigest()}
+        if manifest.is_fresh(dest_path, key):
+            stats.skipped += 1
+            if compressor is not None:
+                compressor.add_file(dest_path, changed=False)
+            return
+        manifest.explain(dest_path, key)
+        page = template.render({"Title": escape(title), "Content": listing_html(entries, nav)})
+        write_output(dest_path, page)
+        if compressor is not None:
+            compressor.add(dest_path, page)
+        manifest.record(dest_path, key)
+        stats.rebuilt += 1
+
+    def render_collection(dir_path, title, entries):
+        pages = paginate(entries, per_page)
+        for number, page_entries in enumerate(pages, 1):
+            nav = [
+                site_url(os.path.join(dir_path, "page", str(number - 1), "index.html"), dir_path_public)
+                if number > 1 else None,
+                site_url(os.path.join(dir_path, "page", str(number + 1), "index.html"), dir_path_public)
+                if number < len(pages) else None,
+            ]
+            render(
+                os.path.join(dir_path, "page", str(number), "index.html"), f"{title}, page {number}",
+                page_entries[::-1], nav,
+            )
+        newest = site_url(os.path.join(dir_path, "page", str(len(pages)), "index.html"), dir_path_public)
+        render(os.path.join(dir_path, "index.html"), title, entries[::-1][:per_page], [newest, None])
+
+    # Only pages with an output in this build are listed, which leaves out
+    # a page that failed to render and was never built before.
+    listed = [
+        (from_path, meta) for from_path, meta in metadata.listing()
+        if os.path.normpath(page_dest_path(from_path, dir_path_content, dir_path_public)) in manifest.new_entries
+    ]
+    # metadata.listing() is newest first; collections are kept oldest first
+    # so that pages fill up from the oldest.
+    dated = [(from_path, meta) for from_path, meta in listed if meta["date"]][::-1]
+    render_collection(os.path.join(dir_path_public, "posts"), "Posts", [entry(*page) for page in dated])
+
+    tags_dir_path = os.path.join(dir_path_public, "tags")
+    tags = metadata.tags(listed)
+    tag_entries = []
+    slugs = set()
+    for tag, pages in tags.items():
+        # Tags that differ only in case or punctuation share a slug; the
+        # later ones, in sorted order, get a number.
+        slug = tag_slug(tag)
+        number = 1
+        while slug in slugs:
+            number += 1
+            slug = f"{tag_slug(tag)}-{number}"
+        slugs.add(slug)
+        tag_dir_path = os.path.join(tags_dir_path, slug)
+        tag_url = site_url(os.path.join(tag_dir_path, "index.html"), dir_path_public)
+        tag_entries.append([tag_url, f"{tag} ({len(pages)})", None, None])
+        render_collection(tag_dir_path, f"Tagged {tag}", [entry(*page) for page in pages[::-1]])
+    render(os.path.join(tags_dir_path, "index.html"), "Tags", tag_entries, [None, None])
+    return stats, errors
+
+
+# entries are [url, title, date, summary HTML] lists and nav holds the
+# URLs of the older and newer pages.
+def listing_html(entries, nav):
+    items = []
+    for url, title, date, summary in entries:
+        item = f'<a href="{escape(url)}">{escape(title)}</a>'
+        if date:
+            item += f' <time datetime="{escape(date)}">{escape(date)}</time>'
+        if summary:
+            item += summary
+        items.append(f"<li>{item}</li>")
+    html = f'<ul class="listing">{"".join(items)}</ul>'
+    older, newer = nav
+    links = []
+    if older:
+        links.append(f'<a rel="prev" href="{escape(older)}">Older</a>')
+    if newer:
+        links.append(f'<a rel="next" href="{escape(newer)}">Newer</a>')
+    if links:
+        html += f'<nav class="pagination">{" ".join(links)}</nav>'
+    return html
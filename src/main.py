@@ -1,26 +1,174 @@
-import os
-import shutil
+import argparse
+import logging
+import sys
+import threading
 
-from copystatic import copy_files_recursive
-from gencontent import generate_pages_recursive
+from builder import SITE_WIDE_OPTIONS, BuildConfig, Builder
+from copystatic import CHECK_MODES, SYNC_MODES
+from inline_markdown import inline_tokenizers
+from shard import parse_shard
 
 
-dir_path_static = "./static"
-dir_path_public = "./public"
-dir_path_content = "./content"
-template_path = "./template.html"
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
-def main():
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+def parse_args(argv=None):
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("--clean", action="store_true", help="delete public/ and rebuild every file")
+    options.add_argument("-j", "--jobs", type=int, default=1, help="render pages in N worker processes")
+    options.add_argument(
+        "--async", dest="async_io", action="store_true", help="overlap page reads, rendering and writes"
+    )
+    options.add_argument("--max-in-flight", type=int, default=64, metavar="N", help="pages an --async build holds at once")
+    options.add_argument("--max-open-files", type=int, default=32, metavar="N", help="files an --async build opens at once")
+    options.add_argument(
+        "--inline-tokenizer",
+        choices=sorted(inline_tokenizers),
+        default="scan",
+        help="inline markdown tokenizer to use",
+    )
+    options.add_argument(
+        "--inline-cache-size",
+        type=int,
+        default=4096,
+        metavar="N",
+        help="inline texts whose rendered HTML is kept for reuse across pages (0 disables)",
+    )
+    options.add_argument(
+        "--static-mode",
+        choices=SYNC_MODES,
+        default="auto",
+        help="how static files reach public/: auto tries reflink, hardlink, then copy",
+    )
+    options.add_argument(
+        "--static-check",
+        choices=CHECK_MODES,
+        default="stat",
+        help="skip unchanged static files by size and mtime, or by content hash",
+    )
+    options.add_argument("--static-jobs", type=int, default=8, help="threads used to sync static files")
+    options.add_argument("--no-cache", action="store_true", help="parse every page instead of reusing cached trees")
+    options.add_argument("--cache-size", type=int, default=256, metavar="MB", help="size cap of the parse cache")
+    options.add_argument(
+        "--stream-threshold",
+        type=int,
+        default=32,
+        metavar="MB",
+        help="render markdown files this large block by block instead of in memory",
+    )
+    options.add_argument("--explain", action="store_true", help="print why each page was rebuilt")
+    options.add_argument("--check-links", action="store_true", help="report internal links and images that resolve to nothing")
+    options.add_argument("--links-json", metavar="PATH", help="also write broken references to PATH as JSON")
+    options.add_argument(
+        "--fail-on-broken-links", action="store_true", help="exit with status 1 if any reference is broken"
+    )
+    options.add_argument("--precompress", action="store_true", help="write a .gz beside every text output")
+    options.add_argument(
+        "--precompress-min-size",
+        type=int,
+        default=1024,
+        metavar="BYTES",
+        help="outputs smaller than this get no .gz",
+    )
+    options.add_argument(
+        "--precompress-level", type=int, default=9, choices=range(1, 10), metavar="1-9", help="gzip compression level"
+    )
+    options.add_argument(
+        "--precompress-jobs", type=int, metavar="N", help="threads used to compress outputs (default: one per CPU)"
+    )
+    options.add_argument(
+        "--staging", action="store_true", help="build into a copy of public/ and swap it into place when done"
+    )
+    options.add_argument(
+        "--shard",
+        type=shard_arg,
+        metavar="I/N",
+        help="render only the pages in shard I of N, into .cache/shards/I-of-N/",
+    )
+    options.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="N",
+        help="combine the outputs of shard builds 0/N to N-1/N into public/, then finish the build",
+    )
+    options.add_argument("--drafts", action="store_true", help="also build pages whose front matter has draft: true")
+    options.add_argument(
+        "--listings", action="store_true", help="generate paginated posts/ and tags/ pages from page front matter"
+    )
+    options.add_argument("--per-page", type=int, default=10, metavar="N", help="entries on each listing page")
+    options.add_argument("--search-index", action="store_true", help="write a sharded search index to public/search/")
+    options.add_argument("-v", "--verbose", action="store_true", help="log every file copied or rendered")
+    options.add_argument("--profile", action="store_true", help="time every build stage and print a report")
+    options.add_argument("--profile-json", metavar="PATH", help="also write the profile as a JSON trace")
+    options.add_argument("--profile-slowest", type=int, default=10, metavar="N", help="pages listed in the report")
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
+    parser = argparse.ArgumentParser(description="Build the static site into ./public", parents=[options])
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("build", parents=[options], help="build the site (the default)")
+    serve_parser = subparsers.add_parser("serve", parents=[options], help="build, then serve public/")
+    serve_parser.add_argument("--port", type=int, default=8888, help="port to serve public/ on")
+    serve_parser.add_argument("--watch", action="store_true", help="rebuild affected pages when sources change")
+    serve_parser.add_argument("--interval", type=float, default=0.1, help="seconds between change polls")
+    args = parser.parse_args(argv)
+    args.command = args.command or "build"
+    if args.async_io and args.jobs > 1:
+        parser.error("--async cannot be combined with --jobs")
+    if args.per_page < 1:
+        parser.error("--per-page must be at least 1")
+    if args.shard is not None:
+        site_wide = [name for name in SITE_WIDE_OPTIONS if getattr(args, name)]
+        if site_wide:
+            flags = ", ".join("--" + name.replace("_", "-") for name in site_wide)
+            parser.error(f"--shard cannot be combined with {flags}")
+        if args.command == "serve":
+            parser.error("a shard cannot be served; serve the merging build")
+    return args
 
-    print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public)
 
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format="%(message)s")
+    config = BuildConfig.from_args(args)
 
-main()
\ No newline at end of file
+    # Snapshot sources before building so edits made during the build are
+    # picked up by the first poll.
+    watcher = None
+    if args.command == "serve" and args.watch:
+        from serve import ChangeWatcher
+
+        watcher = ChangeWatcher([config.dir_path_content, config.dir_path_static, config.template_path])
+
+    builder = Builder(config)
+    manifest, errors, broken = builder.build()
+    if args.command == "serve":
+        serve_site(args, builder, manifest, watcher)
+    elif errors or (broken and args.fail_on_broken_links):
+        sys.exit(1)
+
+
+def serve_site(args, builder, manifest, watcher=None):
+    from serve import SiteRebuilder, start_server, watch
+
+    config = builder.config
+    server = start_server(config.dir_path_public, args.port)
+    print(f"Serving {config.dir_path_public} at http://localhost:{args.port}/")
+    try:
+        if watcher is None:
+            threading.Event().wait()
+        else:
+            print("Watching for changes...")
+            rebuilder = SiteRebuilder(builder, manifest)
+            watcher.add_paths(rebuilder.template_paths())
+            watch(watcher, rebuilder, args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
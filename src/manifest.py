@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+
+# Bump whenever a change to the generator alters the bytes it writes, so every
+# output recorded by an older build is treated as stale.
+GENERATOR_VERSION = "3"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# path moved from under old_dir_path to the same place under new_dir_path;
+# paths outside old_dir_path are returned as they are. An old_dir_path of
+# "." holds every relative path that does not climb out of it.
+def rebase_path(path, old_dir_path, new_dir_path):
+    old_dir_path = os.path.normpath(old_dir_path)
+    if path == old_dir_path:
+        return os.path.normpath(new_dir_path)
+    if old_dir_path == ".":
+        if os.path.isabs(path) or path == ".." or path.startswith(os.path.join("..", "")):
+            return path
+        rel_path = path
+    elif path.startswith(os.path.join(old_dir_path, "")):
+        rel_path = path[len(old_dir_path) + 1:]
+    else:
+        return path
+    return os.path.normpath(os.path.join(new_dir_path, rel_path))
+
+
+class BuildManifest():
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        self.new_entries = {}
+        self.hashes = {}
+        # dest path -> why it was rebuilt, filled in by explain().
+        self.reasons = {}
+        self.skipped = 0
+        self.rebuilt = 0
+        self.removed = 0
+        # Rebuilt outputs whose bytes came out the same and were not rewritten.
+        self.unchanged = 0
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(path, data.get("outputs", {}))
+
+    def file_hash(self, path):
+        path = os.path.normpath(path)
+        if path not in self.hashes:
+            self.hashes[path] = hash_file(path)
+        return self.hashes[path]
+
+    # A source that does not exist hashes to None, so its later creation
+    # or removal changes the key.
+    def source_key(self, *source_paths):
+        return {
+            "sources": {
+                os.path.normpath(p): self.file_hash(p) if os.path.exists(p) else None for p in source_paths
+            },
+            "version": GENERATOR_VERSION,
+        }
+
+    # The key of a page: its markdown, the template and every dependency.
+    # With dependencies=None those recorded by the last build are reused.
+    def page_key(self, from_path, template_path, dest_path, dependencies=None):
+        if dependencies is None:
+            dependencies = self.recorded_dependencies(dest_path)
+        key = self.source_key(from_path, template_path, *dependencies)
+        key["page"] = os.path.normpath(from_path)
+        key["dependencies"] = [os.path.normpath(path) for path in dependencies]
+        return key
+
+    def recorded_dependencies(self, dest_path):
+        recorded = self.recorded_key(dest_path)
+        if recorded is None:
+            return []
+        return recorded.get("dependencies", [])
+
+    # Pages whose recorded key includes source_path, as (page, dest) pairs.
+    def dependents(self, source_path):
+        source_path = os.path.normpath(source_path)
+        found = []
+        for dest_path, key in {**self.entries, **self.new_entries}.items():
+            if "page" in key and source_path in key["sources"]:
+                found.append((key["page"], dest_path))
+        return sorted(found)
+
+    # Forgets the memoized hash of a source that changed during a long-lived
+    # process such as watch mode.
+    def invalidate(self, path):
+        self.hashes.pop(os.path.normpath(path), None)
+
+    # Moves every recorded output under old_dir_path to new_dir_path, for a
+    # build written to a staging copy of its output directory.
+    def rebase(self, old_dir_path, new_dir_path):
+        for name in ("entries", "new_entries", "reasons"):
+            entries = getattr(self, name)
+            rebased = {rebase_path(path, old_dir_path, new_dir_path): value for path, value in entries.items()}
+            setattr(self, name, rebased)
+
+    def recorded_key(self, dest_path):
+        dest_path = os.path.normpath(dest_path)
+        if dest_path in self.new_entries:
+            return self.new_entries[dest_path]
+        return self.entries.get(dest_path)
+
+    # Cheaper than source_key for large assets: trusts size and mtime
+    # instead of reading the file.
+    def stat_key(self, *source_paths):
+        sources = {}
+        for path in source_paths:
+            stat = os.stat(path)
+            sources[os.path.normpath(path)] = [stat.st_size, stat.st_mtime_ns]
+        return {"sources": sources, "version": GENERATOR_VERSION}
+
+    def is_fresh(self, dest_path, key):
+        dest_path = os.path.normpath(dest_path)
+        if self.recorded_key(dest_path) != key or not os.path.exists(dest_path):
+            return False
+        self.new_entries[dest_path] = key
+        self.skipped += 1
+        return True
+
+    def explain(self, dest_path, key):
+        dest_path = os.path.normpath(dest_path)
+        recorded = self.recorded_key(dest_path)
+        if recorded is None:
+            reasons = ["not built before"]
+        elif recorded.get("version") != key.get("version"):
+            reasons = ["generator version changed"]
+        elif not os.path.exists(dest_path):
+            reasons = ["output missing"]
+        else:
+            reasons = []
+            old = recorded["sources"]
+            new = key["sources"]
+            for path in sorted(old.keys() | new.keys()):
+                if old.get(path) == new.get(path):
+                    continue
+                if path == key.get("page"):
+                    reasons.append("source changed")
+                elif path not in old:
+                    reasons.append(f"now depends on {path}")
+                elif new.get(path) is None:
+                    reasons.append(f"{path} was removed")
+                elif old.get(path) is None:
+                    reasons.append(f"{path} was created")
+                else:
+                    reasons.append(f"{path} changed")
+            if recorded.get("listing") != key.get("listing"):
+                reasons.append("listed pages changed")
+            if not reasons:
+                reasons.append("recorded by an older build")
+        self.reasons[dest_path] = reasons
+        return reasons
+
+    def record(self, dest_path, key):
+        self.new_entries[os.path.normpath(dest_path)] = key
+        self.rebuilt += 1
+
+    # Carries the output recorded by the last build over to this one as it
+    # is, for a page that failed to render.
+    def keep(self, dest_path):
+        dest_path = os.path.normpath(dest_path)
+        if dest_path in self.entries and dest_path not in self.new_entries:
+            self.new_entries[dest_path] = self.entries[dest_path]
+
+    def remove(self, dest_path):
+        dest_path = os.path.normpath(dest_path)
+        self.entries.pop(dest_path, None)
+        self.new_entries.pop(dest_path, None)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            self.removed += 1
+            prune_empty_dirs(os.path.dirname(dest_path))
+
+    def remove_orphans(self):
+        orphans = [dest_path for dest_path in self.entries if dest_path not in self.new_entries]
+        for dest_path in orphans:
+            self.remove(dest_path)
+
+    def reset_counts(self):
+        self.reasons = {}
+        self.skipped = 0
+        self.rebuilt = 0
+        self.removed = 0
+        self.unchanged = 0
+
+    def save(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            outputs = {**self.entries, **self.new_entries}
+            # dumps() runs the C encoder in one call; dump() streams through
+            # the pure Python one, nearly three times slower on a large site.
+            f.write(json.dumps({"version": GENERATOR_VERSION, "outputs": outputs}, sort_keys=True))
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        summary = f"{self.skipped} skipped, {self.rebuilt} rebuilt, {self.removed} removed"
+        if self.unchanged:
+            summary += f", {self.unchanged} rebuilt with identical output"
+        return summary
+
+
+def prune_empty_dirs(dir_path):
+    while dir_path != "" and os.path.isdir(dir_path) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
@@ -0,0 +1,41 @@
+import functools
+
+
+# Wraps fn in a functools.lru_cache of max_entries, which keeps the least
+# recently used results bounded and is safe to call from several threads.
+# Lookups made by worker processes are folded in with add_counts() so
+# summary() covers the whole build.
+class MemoCache():
+    def __init__(self, fn, max_entries):
+        self.max_entries = max_entries
+        self.cached = functools.lru_cache(maxsize=max_entries)(fn)
+        self.extra_hits = 0
+        self.extra_misses = 0
+
+    def __call__(self, key):
+        return self.cached(key)
+
+    def clear(self):
+        self.cached.cache_clear()
+
+    def counts(self):
+        info = self.cached.cache_info()
+        return info.hits + self.extra_hits, info.misses + self.extra_misses
+
+    def add_counts(self, hits, misses):
+        self.extra_hits += hits
+        self.extra_misses += misses
+
+    def hit_rate(self):
+        hits, misses = self.counts()
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def __len__(self):
+        return self.cached.cache_info().currsize
+
+    def summary(self):
+        hits, misses = self.counts()
+        return (
+            f"{hits} hits, {misses} misses ({self.hit_rate():.0%} hit rate), "
+            f"{len(self)}/{self.max_entries} entries"
+        )
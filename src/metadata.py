@@ -0,0 +1,272 @@
+import datetime
+import json
+import os
+
+from block_scanner import iter_blocks
+from inline_markdown import block_type_paragraph, paragraph_to_html_node
+
+FENCE = "---"
+
+# Bump whenever read_metadata() starts returning something new, so pages
+# recorded by an older build are read again.
+METADATA_VERSION = "2"
+
+# Blocks after the title searched for a first paragraph to use as summary.
+SUMMARY_BLOCKS = 8
+
+# Front matter every page has, with the value a page without it gets.
+# Other keys are kept as they are written.
+DEFAULTS = {"title": None, "date": None, "tags": [], "draft": False, "template": None, "summary": None}
+
+
+# Front matter is a block of "key: value" lines between two "---" lines at
+# the very top of a page. A value is a string, optionally quoted, true or
+# false, or a [a, b] list; a key with no value takes the "- item" lines
+# that follow it as a list.
+def parse_front_matter(lines):
+    meta = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped == "" or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and isinstance(meta[key], list):
+            meta[key].append(parse_value(stripped[2:]))
+            continue
+        key, sep, value = line.partition(":")
+        key = key.strip()
+        if not sep or not key or key != key.split()[0]:
+            raise ValueError(f"Invalid front matter line: {line.rstrip()!r}")
+        meta[key] = parse_value(value) if value.strip() else []
+    return normalize(meta)
+
+
+def parse_value(text):
+    text = text.strip()
+    if text.startswith("[") and text.endswith("]"):
+        return [parse_value(item) for item in text[1:-1].split(",") if item.strip()]
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text in ("true", "false"):
+        return text == "true"
+    return text
+
+
+def normalize(meta):
+    tags = meta.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    if not isinstance(tags, list):
+        raise ValueError(f"Invalid tags: {tags!r}")
+    meta["tags"] = [str(tag) for tag in tags]
+    if not isinstance(meta.get("draft", False), bool):
+        raise ValueError(f"Invalid draft: {meta['draft']!r}, expected true or false")
+    date = meta.get("date")
+    if date is not None:
+        # ISO dates sort correctly as strings, so they are kept as written.
+        try:
+            datetime.datetime.fromisoformat(date)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid date: {date!r}, expected YYYY-MM-DD") from None
+    for name in ("title", "template", "summary"):
+        if meta.get(name) == []:
+            meta[name] = None
+    return {**DEFAULTS, **meta}
+
+
+# Splits a page held in memory into its front matter and its markdown.
+def split_front_matter(markdown):
+    if not markdown.startswith(FENCE):
+        return dict(DEFAULTS), markdown
+    end = markdown.find("\n")
+    if end == -1 or markdown[:end].rstrip() != FENCE:
+        return dict(DEFAULTS), markdown
+    lines = []
+    start = end + 1
+    while True:
+        end = markdown.find("\n", start)
+        line = markdown[start:] if end == -1 else markdown[start:end]
+        if line.rstrip() == FENCE:
+            return parse_front_matter(lines), "" if end == -1 else markdown[end + 1:]
+        if end == -1:
+            raise ValueError("Front matter is not closed")
+        lines.append(line)
+        start = end + 1
+
+
+# Reads only the front matter of an open page, leaving the file at the
+# first line of its markdown.
+def read_front_matter(f):
+    if f.readline().rstrip() != FENCE:
+        f.seek(0)
+        return dict(DEFAULTS)
+    lines = []
+    # readline() rather than iteration keeps f.tell() usable afterwards.
+    for line in iter(f.readline, ""):
+        if line.rstrip() == FENCE:
+            return parse_front_matter(lines)
+        lines.append(line)
+    raise ValueError("Front matter is not closed")
+
+
+# The first "# " heading over an iterable of "\n"-terminated lines.
+def find_title(lines):
+    for line in lines:
+        if line.startswith("# "):
+            return line[2:].removesuffix("\n")
+    raise ValueError("No title found")
+
+
+# The HTML of the first paragraph among the next few blocks, or None.
+def find_summary(lines):
+    for count, (block_type, block) in enumerate(iter_blocks(lines)):
+        if count == SUMMARY_BLOCKS:
+            break
+        if block_type == block_type_paragraph:
+            return paragraph_to_html_node(block).to_html()
+    return None
+
+
+# A page's front matter, with its title taken from its first heading and
+# its summary from the first paragraph after that when the front matter
+# has none. Only the lines up to that paragraph are read, which is usually
+# the top few lines of the page. A page whose front matter is invalid gets
+# {"error": ...} and fails when rendered.
+def read_metadata(from_path):
+    with open(from_path, "r") as f:
+        try:
+            meta = read_front_matter(f)
+        except ValueError as e:
+            return {**DEFAULTS, "error": str(e)}
+        if meta["title"] is None:
+            try:
+                meta["title"] = find_title(f)
+            except ValueError:
+                return meta
+        if meta["summary"] is None:
+            meta["summary"] = find_summary(f)
+        else:
+            meta["summary"] = paragraph_to_html_node(meta["summary"]).to_html()
+    return meta
+
+
+# The template a page is rendered with: its front matter's, relative to
+# the directory of the site's default template, or the default.
+def page_template(meta, template_path):
+    if meta.get("template"):
+        return os.path.join(os.path.dirname(template_path), meta["template"])
+    return template_path
+
+
+# The front matter of every page, read on first use and kept on disk
+# between builds with each page's size and mtime, so only pages edited
+# since the last build are opened again. With drafts=False, published()
+# leaves out pages marked draft. A MetadataIndex without a path lives for
+# one build.
+class MetadataIndex():
+    def __init__(self, path=None, pages=None, drafts=False):
+        self.path = path
+        # source path -> [[size, mtime_ns], metadata]
+        self.pages = pages if pages is not None else {}
+        self.drafts = drafts
+        self.seen = set()
+        self.read = 0
+        # Whether pages were read or forgotten since the last save().
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path, drafts=False):
+        if not os.path.exists(path):
+            return cls(path, drafts=drafts)
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != METADATA_VERSION:
+            return cls(path, drafts=drafts)
+        return cls(path, data["pages"], drafts)
+
+    # A page that cannot be read is left for the render to report.
+    def get(self, from_path):
+        from_path = os.path.normpath(from_path)
+        try:
+            stat = os.stat(from_path)
+        except OSError as e:
+            return {**DEFAULTS, "error": str(e)}
+        signature = [stat.st_size, stat.st_mtime_ns]
+        entry = self.pages.get(from_path)
+        if entry is None or entry[0] != signature:
+            entry = [signature, read_metadata(from_path)]
+            self.pages[from_path] = entry
+            self.read += 1
+            self.dirty = True
+        self.seen.add(from_path)
+        return entry[1]
+
+    # A page's metadata as last read, without looking at the page; None for
+    # a page never read.
+    def recorded(self, from_path):
+        entry = self.pages.get(os.path.normpath(from_path))
+        return entry[1] if entry is not None else None
+
+    # Drops a page that was deleted, for an index that outlives a build.
+    def forget(self, from_path):
+        from_path = os.path.normpath(from_path)
+        self.seen.discard(from_path)
+        if self.pages.pop(from_path, None) is not None:
+            self.dirty = True
+
+    def published(self, pages):
+        return [
+            (from_path, dest_path) for from_path, dest_path in pages
+            if not self.get(from_path)["draft"] or self.drafts
+        ]
+
+    # Drafts among the pages looked up so far, which published() skipped.
+    def skipped(self):
+        if self.drafts:
+            return []
+        return sorted(from_path for from_path in self.seen if self.pages[from_path][1]["draft"])
+
+    # Published pages looked up so far as (source, metadata) pairs, newest
+    # first; pages without a date come last, by path.
+    def listing(self):
+        pages = [
+            (from_path, self.pages[from_path][1])
+            for from_path in self.seen
+            if self.drafts or not self.pages[from_path][1]["draft"]
+        ]
+        pages.sort(key=lambda page: page[0])
+        pages.sort(key=lambda page: page[1]["date"] or "", reverse=True)
+        return pages
+
+    # tag -> the pages carrying it, in the order of pages, which defaults to
+    # listing().
+    def tags(self, pages=None):
+        tags = {}
+        for from_path, meta in pages if pages is not None else self.listing():
+            for tag in meta["tags"]:
+                tags.setdefault(tag, []).append((from_path, meta))
+        return dict(sorted(tags.items()))
+
+    # Keeps only the pages looked up by this build, and writes nothing when
+    # none of them were read from disk or dropped.
+    def save(self):
+        if self.path is None:
+            return
+        if not self.dirty and len(self.seen) == len(self.pages):
+            return
+        self.dirty = False
+        self.pages = {from_path: self.pages[from_path] for from_path in sorted(self.seen)}
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps({"version": METADATA_VERSION, "pages": self.pages}))
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        summary = f"{len(self.seen)} pages, {self.read} read"
+        skipped = len(self.skipped())
+        if skipped:
+            summary += f", {skipped} drafts skipped"
+        return summary
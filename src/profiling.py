@@ -0,0 +1,97 @@
+import io
+import json
+import time
+
+from block_scanner import block_type_of_lines, iter_block_lines
+from htmlnode import ParentNode
+from inline_markdown import block_to_html_node
+
+PAGE_STAGES = ("read", "blocks", "block_type", "inline", "to_html", "template", "write")
+
+
+class PageTimer():
+    def __init__(self):
+        self.timings = dict.fromkeys(PAGE_STAGES, 0.0)
+        self.last = time.perf_counter()
+
+    # Charges the time since the previous lap to stage.
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] += now - self.last
+        self.last = now
+
+
+class BuildProfiler():
+    def __init__(self):
+        self.pages = {}
+        self.phases = {}
+
+    def add_page(self, path, timings):
+        self.pages[str(path)] = timings
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def page_totals(self):
+        return sorted(
+            ((sum(timings.values()), path) for path, timings in self.pages.items()),
+            reverse=True,
+        )
+
+    def summary(self, slowest=10):
+        lines = []
+        for name, seconds in self.phases.items():
+            lines.append(f"  {name:<12} {seconds * 1e3:10.1f} ms")
+        if not self.pages:
+            return "\n".join(lines)
+
+        stage_totals = dict.fromkeys(PAGE_STAGES, 0.0)
+        for timings in self.pages.values():
+            for stage, seconds in timings.items():
+                stage_totals[stage] += seconds
+        all_stages = sum(stage_totals.values()) or 1.0
+        lines.append(f"  {len(self.pages)} pages, per stage:")
+        for stage, seconds in stage_totals.items():
+            lines.append(f"    {stage:<10} {seconds * 1e3:10.1f} ms  {seconds / all_stages:6.1%}")
+
+        totals = self.page_totals()
+        ascending = [seconds for seconds, _ in reversed(totals)]
+        lines.append(
+            f"  page p50 {percentile(ascending, 50) * 1e3:.2f} ms"
+            f"  p95 {percentile(ascending, 95) * 1e3:.2f} ms"
+            f"  max {ascending[-1] * 1e3:.2f} ms"
+        )
+        lines.append(f"  slowest {min(slowest, len(totals))} pages:")
+        for seconds, path in totals[:slowest]:
+            lines.append(f"    {seconds * 1e3:10.2f} ms  {path}")
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        trace = {
+            "phases": self.phases,
+            "pages": [
+                {"path": page, "total": seconds, "stages": self.pages[page]}
+                for seconds, page in self.page_totals()
+            ],
+        }
+        with open(path, "w") as f:
+            json.dump(trace, f, indent=2)
+
+
+def percentile(ascending, pct):
+    # Nearest-rank percentile of an already sorted list.
+    rank = max(1, -(-len(ascending) * pct // 100))
+    return ascending[int(rank) - 1]
+
+
+# markdown_to_html_node with a lap after every stage. Block typing and
+# inline parsing alternate per block, so their laps interleave.
+def timed_markdown_to_html_node(markdown, timer):
+    children = []
+    for block_lines in iter_block_lines(io.StringIO(markdown)):
+        timer.lap("blocks")
+        block_type = block_type_of_lines(block_lines)
+        timer.lap("block_type")
+        children.append(block_to_html_node("\n".join(block_lines), block_type))
+        timer.lap("inline")
+    return ParentNode("div", children, None)
@@ -0,0 +1,104 @@
+import json
+import os
+from urllib.parse import unquote, urlsplit
+
+from inline_markdown import extract_markdown_images, extract_markdown_links
+
+
+# Every link and image URL in a page as [kind, url, line] lists.
+def scan_references(from_path):
+    references = []
+    with open(from_path, "r") as f:
+        for number, line in enumerate(f, 1):
+            if "](" not in line:
+                continue
+            for _, url in extract_markdown_links(line):
+                references.append(["link", url, number])
+            for _, url in extract_markdown_images(line):
+                references.append(["image", url, number])
+    return references
+
+
+# The references of every page, kept up to date by the build as pages are
+# rendered and saved between runs, so checking them needs no pass over
+# pages that did not change. check() resolves each internal reference
+# against the set of output paths, so its cost grows with the number of
+# references rather than pages times files.
+class ReferenceIndex():
+    def __init__(self, path, pages=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.checked = 0
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, "r") as f:
+            return cls(path, json.load(f))
+
+    def update(self, from_path, references):
+        self.pages[os.path.normpath(from_path)] = references
+
+    def save(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(self.pages, sort_keys=True))
+        os.replace(tmp_path, self.path)
+
+    # pages is every (source, output) pair of the site. Pages no longer in
+    # it are dropped from the index and pages missing from it are scanned.
+    # generated holds the paths of the site's other outputs, such as listing
+    # pages, which references may point at too.
+    def check(self, pages, dir_path_static, dir_path_public, generated=()):
+        outputs = {}
+        for from_path, dest_path in pages:
+            outputs[os.path.normpath(from_path)] = os.path.relpath(dest_path, dir_path_public)
+        self.pages = {page: refs for page, refs in self.pages.items() if page in outputs}
+        for from_path in outputs:
+            if from_path not in self.pages:
+                self.update(from_path, scan_references(from_path))
+
+        targets = set(outputs.values())
+        for dest_path in generated:
+            targets.add(os.path.relpath(dest_path, dir_path_public))
+        for root, _, filenames in os.walk(dir_path_static):
+            for filename in filenames:
+                targets.add(os.path.relpath(os.path.join(root, filename), dir_path_static))
+
+        broken = []
+        self.checked = 0
+        for from_path, references in sorted(self.pages.items()):
+            page_dir = os.path.dirname(outputs[from_path])
+            for kind, url, line in references:
+                candidates = resolve_url(url, page_dir)
+                if candidates is None:
+                    continue
+                self.checked += 1
+                if not any(candidate in targets for candidate in candidates):
+                    broken.append({"page": from_path, "line": line, "kind": kind, "url": url})
+        return broken
+
+
+# The output paths, relative to public/, that an internal URL can be served
+# from, or None for external URLs and bare fragments.
+def resolve_url(url, page_dir):
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or parts.path == "":
+        return None
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        site_path = path.lstrip("/")
+    else:
+        site_path = os.path.join(page_dir, path)
+    site_path = os.path.normpath(site_path)
+    if site_path == ".":
+        site_path = ""
+    if site_path.startswith(".."):
+        return []
+    if site_path == "" or path.endswith("/"):
+        return [os.path.join(site_path, "index.html")]
+    return [site_path, site_path + ".html", os.path.join(site_path, "index.html")]
@@ -0,0 +1,263 @@
+import json
+import marshal
+import os
+import re
+
+import gencontent
+from block_scanner import iter_blocks
+from inline_markdown import block_to_html_node
+from manifest import hash_file
+from metadata import read_front_matter, split_front_matter
+
+_TAG_RE = re.compile(r"<[^>]*>")
+_WORD_RE = re.compile(r"\w{2,32}")
+
+
+def node_text(node, parts):
+    if node.children is None:
+        # Rendered inline text is a tagless leaf holding HTML.
+        parts.append(_TAG_RE.sub(" ", node.value))
+        return
+    for child in node.children:
+        node_text(child, parts)
+
+
+# node_text() over a tree as ast_cache.encode_node() stores it.
+def encoded_text(data, parts):
+    _, value, children, _ = data
+    if children is None:
+        parts.append(_TAG_RE.sub(" ", value))
+        return
+    for child in children:
+        encoded_text(child, parts)
+
+
+def add_terms(text, terms):
+    for word in _WORD_RE.findall(text.lower()):
+        terms[word] = terms.get(word, 0) + 1
+
+
+# Term frequencies and title of a markdown file. The tree the build parsed
+# to render the page is read back from ast_cache; a page without one, such
+# as a page streamed past the stream threshold, is parsed a block at a time
+# so huge pages are never held in memory whole.
+def page_terms(from_path, ast_cache=None):
+    if ast_cache is not None and os.path.getsize(from_path) < gencontent.stream_threshold:
+        with open(from_path, "r") as f:
+            meta, markdown = split_front_matter(f.read())
+        tree = ast_cache.get_encoded(markdown)
+        if tree is not None:
+            title = meta["title"]
+            terms = {}
+            for block in tree[2]:
+                parts = []
+                encoded_text(block, parts)
+                text = " ".join(parts)
+                if title is None and block[0] == "h1":
+                    title = text.strip()
+                add_terms(text, terms)
+            return title, terms
+
+    terms = {}
+    with open(from_path, "r") as f:
+        title = read_front_matter(f)["title"]
+        for block_type, block in iter_blocks(f):
+            parts = []
+            node_text(block_to_html_node(block, block_type), parts)
+            text = " ".join(parts)
+            if title is None and block_type == "heading" and block.startswith("# "):
+                title = text.strip()
+            add_terms(text, terms)
+    return title, terms
+
+
+def page_url(dest_path, dir_path_public):
+    prefix = os.path.join(os.path.normpath(dir_path_public), "")
+    dest_path = os.path.normpath(dest_path)
+    if dest_path.startswith(prefix):
+        rel_path = dest_path[len(prefix):]
+    else:
+        rel_path = os.path.relpath(dest_path, dir_path_public)
+    url = "/" + rel_path.replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        url = url[: -len("index.html")]
+    return url
+
+
+def shard_name(term, prefix_length):
+    prefix = term[:prefix_length]
+    if prefix.isascii():
+        return prefix
+    return prefix.encode().hex()
+
+
+# An inverted index of every page's words for client-side search, written
+# to public/search/ as index.json (shard names and settings), docs.json
+# ([url, title] by document id) and one JSON shard per term prefix mapping
+# each term to flattened [doc id, count, ...] postings, so a browser loads
+# only the shards its query needs.
+#
+# The postings and every page's terms are also kept in cache_dir, so a
+# build re-tokenises only pages whose markdown changed and rewrites only
+# the shards their old and new terms fall in. update() writes the output;
+# save() writes the cache, which a build into a staging directory does
+# only once the output is in place.
+class SearchIndex():
+    def __init__(self, cache_dir, output_dir, prefix_length=2):
+        self.cache_dir = cache_dir
+        self.output_dir = output_dir
+        self.prefix_length = prefix_length
+        self.state = self.load_state()
+        self.shards = {}
+        self.dirty = set()
+        # Shards written to the output but not yet to the cache.
+        self.unsaved = set()
+        self.changed = False
+        self.tokenized = 0
+        self.errors = []
+
+    def load_state(self):
+        path = os.path.join(self.cache_dir, "state.marshal")
+        try:
+            with open(path, "rb") as f:
+                state = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            state = None
+        if state is None or state.get("prefix_length") != self.prefix_length:
+            return {"prefix_length": self.prefix_length, "docs": [], "pages": {}, "shards": []}
+        return state
+
+    def shard(self, name):
+        if name not in self.shards:
+            try:
+                with open(os.path.join(self.cache_dir, f"{name}.marshal"), "rb") as f:
+                    self.shards[name] = marshal.load(f)
+            except (OSError, EOFError, ValueError, TypeError):
+                self.shards[name] = {}
+        return self.shards[name]
+
+    # pages is every (source, output) pair of the site. file_hash may be
+    # BuildManifest.file_hash, to reuse the hashes the build already took,
+    # and ast_cache the build's, to reuse the trees it parsed. A page that
+    # cannot be read is left out, with its error in .errors.
+    def update(self, pages, dir_path_public, file_hash=hash_file, ast_cache=None):
+        docs = self.state["docs"]
+        known = self.state["pages"]
+        current = {os.path.normpath(from_path): os.path.normpath(dest_path) for from_path, dest_path in pages}
+
+        for from_path in [page for page in known if page not in current]:
+            self.forget(from_path)
+
+        self.tokenized = 0
+        self.errors = []
+        free_ids = [doc_id for doc_id, doc in enumerate(docs) if doc is None]
+        for from_path, dest_path in sorted(current.items()):
+            url = page_url(dest_path, dir_path_public)
+            entry = known.get(from_path)
+            try:
+                source_hash = file_hash(from_path)
+                if entry is not None and entry[1] == source_hash and entry[2] == url:
+                    continue
+                title, terms = page_terms(from_path, ast_cache)
+            except Exception as e:
+                # Left out of the index until it can be read again.
+                self.errors.append((from_path, f"{type(e).__name__}: {e}"))
+                if entry is not None:
+                    self.forget(from_path)
+                continue
+            self.tokenized += 1
+            if entry is not None:
+                doc_id = entry[0]
+                self.remove_postings(doc_id, entry[3])
+            elif free_ids:
+                doc_id = free_ids.pop()
+            else:
+                doc_id = len(docs)
+                docs.append(None)
+            docs[doc_id] = [url, title]
+            known[from_path] = (doc_id, source_hash, url, tuple(terms))
+            for term, count in terms.items():
+                name = shard_name(term, self.prefix_length)
+                self.shard(name).setdefault(term, {})[doc_id] = count
+                self.dirty.add(name)
+
+        # Shards missing from public/ (e.g. after --clean) are written again.
+        for name in self.state["shards"]:
+            if not os.path.exists(os.path.join(self.output_dir, f"{name}.json")):
+                self.shard(name)
+                self.dirty.add(name)
+        self.changed = self.changed or bool(self.dirty) or self.tokenized > 0
+        if self.changed or not os.path.exists(os.path.join(self.output_dir, "index.json")):
+            self.write()
+        return self.tokenized
+
+    def forget(self, from_path):
+        doc_id, _, _, terms = self.state["pages"].pop(from_path)
+        self.remove_postings(doc_id, terms)
+        self.state["docs"][doc_id] = None
+        self.changed = True
+
+    def remove_postings(self, doc_id, terms):
+        for term in terms:
+            name = shard_name(term, self.prefix_length)
+            postings = self.shard(name).get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.shards[name][term]
+            self.dirty.add(name)
+
+    def write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        names = set(self.state["shards"])
+        for name in sorted(self.dirty):
+            shard = self.shards[name]
+            output_path = os.path.join(self.output_dir, f"{name}.json")
+            if not shard:
+                names.discard(name)
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                continue
+            names.add(name)
+            postings = {
+                term: [value for doc_id, count in sorted(docs.items()) for value in (doc_id, count)]
+                for term, docs in sorted(shard.items())
+            }
+            write_atomic(output_path, json.dumps(postings, separators=(",", ":")).encode())
+        self.state["shards"] = sorted(names)
+        self.unsaved |= self.dirty
+        self.dirty = set()
+
+        write_atomic(
+            os.path.join(self.output_dir, "docs.json"),
+            json.dumps(self.state["docs"], separators=(",", ":")).encode(),
+        )
+        write_atomic(
+            os.path.join(self.output_dir, "index.json"),
+            json.dumps({"prefix_length": self.prefix_length, "shards": self.state["shards"]}).encode(),
+        )
+
+    def save(self):
+        if not self.changed:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for name in sorted(self.unsaved):
+            cache_path = os.path.join(self.cache_dir, f"{name}.marshal")
+            if self.shards[name]:
+                write_atomic(cache_path, marshal.dumps(self.shards[name]))
+            elif os.path.exists(cache_path):
+                os.remove(cache_path)
+        self.unsaved = set()
+        self.changed = False
+        write_atomic(os.path.join(self.cache_dir, "state.marshal"), marshal.dumps(self.state))
+
+    def summary(self):
+        return f"{self.tokenized} page(s) tokenised, {len(self.state['shards'])} shards"
+
+
+def write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
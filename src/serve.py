@@ -0,0 +1,199 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from copystatic import copy_file
+from dependencies import PageDependencies
+from gencontent import collect_pages, generate_pages, page_dest_path
+from metadata import MetadataIndex, page_template
+from references import ReferenceIndex
+
+
+def file_signature(stat):
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# Polls a set of files and directories for changes by comparing stat
+# signatures between scans; portable and cheap enough for tens of
+# thousands of files at a 100ms interval.
+class ChangeWatcher():
+    def __init__(self, paths):
+        self.paths = paths
+        self.snapshot = self.scan()
+
+    def scan(self):
+        files = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                scan_dir(path, files)
+            elif os.path.exists(path):
+                files[path] = file_signature(os.stat(path))
+        return files
+
+    # Starts watching paths not watched yet, without reporting them as
+    # changed.
+    def add_paths(self, paths):
+        new_paths = [path for path in paths if path not in self.paths]
+        if not new_paths:
+            return
+        self.paths = self.paths + new_paths
+        self.snapshot = {**self.snapshot, **ChangeWatcher(new_paths).snapshot}
+
+    def poll(self):
+        current = self.scan()
+        changed = {path for path, signature in current.items() if self.snapshot.get(path) != signature}
+        removed = set(self.snapshot) - set(current)
+        self.snapshot = current
+        return changed, removed
+
+
+def scan_dir(dir_path, files):
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                scan_dir(entry.path, files)
+            else:
+                files[entry.path] = file_signature(entry.stat())
+
+
+# Maps changed source files to the outputs they produce and rebuilds only
+# those: a markdown file re-renders its own page and every page that links
+# to it, a static file is copied again and re-renders the pages showing it,
+# and a template change re-renders every page using it. It keeps up the
+# build builder just made, manifest being that build's, with its caches,
+# options and MetadataIndex; with listings, the listing pages are built
+# again whenever an edit changes what metadata holds.
+class SiteRebuilder():
+    def __init__(self, builder, manifest):
+        config = self.config = builder.config
+        self.manifest = manifest
+        self.ast_cache = builder.ast_cache
+        self.dependencies = PageDependencies(
+            config.dir_path_content, config.dir_path_static, ReferenceIndex.load(config.references_path)
+        )
+        self.compressor = builder.load_compressor()
+        if builder.metadata is not None:
+            self.metadata = builder.metadata
+        else:
+            self.metadata = MetadataIndex.load(config.metadata_path, config.drafts)
+
+    def is_under(self, path, dir_path):
+        return os.path.commonpath([os.path.abspath(path), os.path.abspath(dir_path)]) == os.path.abspath(dir_path)
+
+    def static_dest_path(self, from_path):
+        return os.path.join(self.config.dir_path_public, os.path.relpath(from_path, self.config.dir_path_static))
+
+    # Every template a page is rendered with, for the watcher.
+    def template_paths(self):
+        paths = {self.config.template_path}
+        for from_path in self.metadata.seen:
+            paths.add(page_template(self.metadata.recorded(from_path), self.config.template_path))
+        return sorted(paths)
+
+    def apply(self, changed, removed):
+        config = self.config
+        self.manifest.reset_counts()
+        for path in changed | removed:
+            self.manifest.invalidate(path)
+        edited = [path for path in sorted(changed | removed) if self.is_under(path, config.dir_path_content)]
+        before = {path: self.metadata.recorded(path) for path in edited}
+
+        if config.template_path in changed:
+            pages = collect_pages(config.dir_path_content, config.dir_path_public)
+        else:
+            pages = {
+                os.path.normpath(path): page_dest_path(path, config.dir_path_content, config.dir_path_public)
+                for path in sorted(changed)
+                if self.is_under(path, config.dir_path_content)
+            }
+            for path in sorted(changed | removed):
+                for page, dest_path in self.manifest.dependents(path):
+                    if os.path.exists(page):
+                        pages.setdefault(page, dest_path)
+            pages = sorted(pages.items())
+        errors = generate_pages(
+            pages, config.template_path, self.manifest, ast_cache=self.ast_cache, dependencies=self.dependencies,
+            compressor=self.compressor, metadata=self.metadata,
+        )
+
+        for path in sorted(changed):
+            if self.is_under(path, config.dir_path_static):
+                copy_file(
+                    path, self.static_dest_path(path), self.manifest, config.static_mode, config.static_check,
+                    self.compressor,
+                )
+
+        for path in sorted(removed):
+            if self.is_under(path, config.dir_path_content):
+                self.manifest.remove(page_dest_path(path, config.dir_path_content, config.dir_path_public))
+                self.metadata.forget(path)
+            elif self.is_under(path, config.dir_path_static):
+                self.manifest.remove(self.static_dest_path(path))
+
+        if config.listings:
+            metadata_changed = any(self.metadata.recorded(path) != meta for path, meta in before.items())
+            if metadata_changed or config.template_path in changed | removed:
+                errors.extend(self.update_listings())
+
+        self.manifest.save()
+        self.metadata.save()
+        if self.compressor is not None:
+            self.compressor.wait()
+            self.compressor.prune()
+            self.compressor.save()
+        self.dependencies.references.save()
+        return errors
+
+    # Listing pages that no longer exist are removed here, as the full
+    # build leaves them to remove_orphans().
+    def update_listings(self):
+        from listings import build_listings
+
+        config = self.config
+
+        listed = [dest_path for dest_path, key in self.manifest.new_entries.items() if "listing" in key]
+        stats, errors = build_listings(
+            self.metadata, config.dir_path_content, config.dir_path_public, config.template_path, self.manifest,
+            config.per_page, self.compressor,
+        )
+        for dest_path in set(listed) - set(stats.outputs):
+            self.manifest.remove(dest_path)
+        return errors
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory, port):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def watch(watcher, rebuilder, interval=0.1):
+    while True:
+        time.sleep(interval)
+        changed, removed = watcher.poll()
+        if not changed and not removed:
+            continue
+        started = time.perf_counter()
+        try:
+            errors = rebuilder.apply(changed, removed)
+        except Exception as e:
+            print(f"Rebuild failed: {type(e).__name__}: {e}")
+            continue
+        # A page may have started using a template of its own.
+        watcher.add_paths(rebuilder.template_paths())
+        elapsed = time.perf_counter() - started
+        print(
+            f"Rebuilt {len(changed) + len(removed)} change(s) in {elapsed * 1e3:.1f} ms: "
+            f"{rebuilder.manifest.summary()}"
+        )
+        for from_path, message in errors:
+            print(f" * {from_path}: {message}")
@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import zlib
+
+from copystatic import UNSUPPORTED, copy_bytes
+from manifest import BuildManifest, rebase_path
+
+logger = logging.getLogger(__name__)
+
+
+# "i/N" -> (i, N), for --shard.
+def parse_shard(text):
+    index, sep, count = text.partition("/")
+    if not sep or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"expected a shard as i/N, got {text!r}")
+    index, count = int(index), int(count)
+    if count < 1 or index >= count:
+        raise ValueError(f"shard {index}/{count} is out of range: i must be below N")
+    return index, count
+
+
+# The shard a page belongs to, from a hash of its path relative to content/
+# with "/" separators. zlib.crc32 is the same on every machine and Python
+# run, unlike hash() on strings, so every node agrees on the partition
+# without talking to the others.
+def shard_of(rel_path, count):
+    return zlib.crc32(rel_path.replace(os.sep, "/").encode()) % count
+
+
+def select_shard(pages, dir_path_content, shard):
+    index, count = shard
+    return [
+        (from_path, dest_path)
+        for from_path, dest_path in pages
+        if shard_of(os.path.relpath(from_path, dir_path_content), count) == index
+    ]
+
+
+# Where shard i of N keeps its outputs and build state: public/,
+# manifest.json and shard.json, under the site's .cache/. To merge shards
+# built on other machines, copy these directories into the merging
+# checkout's .cache/.
+def shard_dir_path(cache_dir, index, count):
+    return os.path.join(cache_dir, "shards", f"{index}-of-{count}")
+
+
+class MergeStats():
+    def __init__(self, shards):
+        self.shards = shards
+        self.linked = 0
+        self.copied = 0
+        self.unchanged = 0
+
+    def summary(self):
+        return f"{self.shards} shards; {self.linked} linked, {self.copied} copied, {self.unchanged} unchanged"
+
+
+# shard.json is written last by a shard build and removed when the next one
+# starts, so a shard that did not finish is never merged. It records the
+# site root that the shard's manifest keys were made under.
+def mark_shard_built(shard_path, shard, root):
+    index, count = shard
+    tmp_path = os.path.join(shard_path, "shard.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"index": index, "count": count, "root": root}, f)
+    os.replace(tmp_path, os.path.join(shard_path, "shard.json"))
+
+
+def unmark_shard(shard_path):
+    info_path = os.path.join(shard_path, "shard.json")
+    if os.path.exists(info_path):
+        os.remove(info_path)
+
+
+# Brings the outputs of all N shard builds into dest_dir_path and records
+# each under its shard's key in manifest, so the build that follows finds
+# them fresh and only syncs static files and runs the site-wide stages.
+# compressor, if given, forgets every output that changed.
+# Paths are moved from the shard's root to root, for shards built in
+# another checkout. A shard output whose key still does not match the sources here,
+# because its shard was built from another revision, is simply rebuilt by
+# that build, which keeps the result identical to a single-node build.
+def merge_shards(cache_dir, count, dest_dir_path, manifest, root=".", compressor=None):
+    stats = MergeStats(count)
+    for index in range(count):
+        shard_path = shard_dir_path(cache_dir, index, count)
+        info_path = os.path.join(shard_path, "shard.json")
+        if not os.path.exists(info_path):
+            raise FileNotFoundError(f"Shard {index}/{count} has not been built: {info_path} is missing")
+        with open(info_path, "r") as f:
+            shard_root = json.load(f)["root"]
+        shard_public = os.path.join(shard_path, "public")
+        shard_manifest = BuildManifest.load(os.path.join(shard_path, "manifest.json"))
+        for recorded_path, key in shard_manifest.entries.items():
+            from_path = rebase_path(recorded_path, shard_root, root)
+            if not os.path.exists(from_path):
+                continue
+            dest_path = rebase_path(from_path, shard_public, dest_dir_path)
+            result = merge_file(from_path, dest_path)
+            setattr(stats, result, getattr(stats, result) + 1)
+            if compressor is not None and result != "unchanged":
+                compressor.invalidate(dest_path)
+            manifest.entries[dest_path] = rebase_key(key, shard_root, root)
+    return stats
+
+
+def rebase_key(key, old_root, new_root):
+    if os.path.normpath(old_root) == os.path.normpath(new_root):
+        return key
+    key = dict(key)
+    key["sources"] = {rebase_path(path, old_root, new_root): value for path, value in key["sources"].items()}
+    if "page" in key:
+        key["page"] = rebase_path(key["page"], old_root, new_root)
+        key["dependencies"] = [rebase_path(path, old_root, new_root) for path in key["dependencies"]]
+    return key
+
+
+# Puts from_path at dest_path, as a hardlink where the filesystem allows,
+# unless dest_path already holds the same bytes.
+def merge_file(from_path, dest_path):
+    try:
+        if os.path.samefile(from_path, dest_path):
+            return "unchanged"
+        if os.path.getsize(from_path) == os.path.getsize(dest_path):
+            with open(from_path, "rb") as src, open(dest_path, "rb") as dst:
+                if src.read() == dst.read():
+                    return "unchanged"
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    logger.debug(" * %s -> %s", from_path, dest_path)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(from_path, tmp_path)
+        result = "linked"
+    except OSError as e:
+        if e.errno not in UNSUPPORTED:
+            raise
+        copy_bytes(from_path, tmp_path)
+        result = "copied"
+    os.replace(tmp_path, dest_path)
+    return result
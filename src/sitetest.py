@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+
+# Every file under dir_path by its path relative to it, as bytes.
+def read_tree(dir_path):
+    files = {}
+    for root, _, filenames in os.walk(dir_path):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, dir_path)] = f.read()
+    return files
+
+
+# A test working on a site in a temporary directory, laid out as main.py
+# expects: root holds template.html, content/, static/ and public/. With
+# watched set, every write moves the file's mtime a second on, so a
+# ChangeWatcher sees it regardless of the filesystem's mtime resolution.
+class SiteTestCase(unittest.TestCase):
+    watched = False
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # name is relative to root, or an absolute path.
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        if self.watched:
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        return path
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
@@ -0,0 +1,83 @@
+import os
+import shutil
+
+from copystatic import UNSUPPORTED, copy_bytes, try_hardlink
+
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+
+# A copy of public/ that a build writes into and that replaces public/ in
+# one step when the build is done, so the served site never shows a
+# half-written build. The copy starts as hardlinks to the live files.
+class StagingDir():
+    def __init__(self, dir_path_public):
+        self.dir_path_public = os.path.normpath(dir_path_public)
+        self.path = self.dir_path_public + ".staging"
+        self.linked = 0
+        self.copied = 0
+        self.swap_method = None
+
+    # clone=False starts from an empty directory, as --clean does.
+    def prepare(self, clone=True):
+        # Left behind by a build that did not finish.
+        if os.path.lexists(self.path):
+            shutil.rmtree(self.path)
+        if clone and os.path.isdir(self.dir_path_public):
+            self.clone_tree(self.dir_path_public, self.path)
+        else:
+            os.makedirs(self.path)
+
+    def clone_tree(self, source_dir_path, dest_dir_path):
+        os.makedirs(dest_dir_path)
+        with os.scandir(source_dir_path) as entries:
+            for entry in entries:
+                dest_path = os.path.join(dest_dir_path, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    self.clone_tree(entry.path, dest_path)
+                elif try_hardlink(entry.path, dest_path) is not None:
+                    self.linked += 1
+                else:
+                    copy_bytes(entry.path, dest_path)
+                    self.copied += 1
+
+    # Puts the staged tree in place of public/. Where renameat2() is
+    # available the two directories trade names atomically; elsewhere
+    # public/ is missing for the moment between two renames.
+    def swap(self):
+        if not os.path.exists(self.dir_path_public):
+            os.rename(self.path, self.dir_path_public)
+            self.swap_method = "rename"
+            return
+        if exchange(self.path, self.dir_path_public):
+            self.swap_method = "exchange"
+        else:
+            old_path = self.dir_path_public + ".old"
+            if os.path.lexists(old_path):
+                shutil.rmtree(old_path)
+            os.rename(self.dir_path_public, old_path)
+            os.rename(self.path, self.dir_path_public)
+            os.rename(old_path, self.path)
+            self.swap_method = "rename"
+        # The staging path now holds the previous build.
+        shutil.rmtree(self.path)
+
+    def summary(self):
+        return f"{self.linked} linked, {self.copied} copied into staging, swapped by {self.swap_method}"
+
+
+# Atomically swaps two paths with renameat2(RENAME_EXCHANGE); False where
+# the platform or filesystem does not support it.
+def exchange(path_a, path_b):
+    try:
+        import ctypes
+
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (ImportError, OSError, AttributeError):
+        return False
+    if renameat2(AT_FDCWD, os.fsencode(path_a), AT_FDCWD, os.fsencode(path_b), RENAME_EXCHANGE) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in UNSUPPORTED:
+        return False
+    raise OSError(error, os.strerror(error), path_a)
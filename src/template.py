@@ -0,0 +1,57 @@
+import os
+import re
+
+_SLOT_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+_template_cache = {}
+
+
+class Template():
+    def __init__(self, source):
+        # (literal, slot) pairs; slot is None for the trailing literal.
+        self.parts = []
+        pos = 0
+        for match in _SLOT_RE.finditer(source):
+            self.parts.append((source[pos:match.start()], match.group(1)))
+            pos = match.end()
+        self.parts.append((source[pos:], None))
+
+    @property
+    def slots(self):
+        return [slot for _, slot in self.parts if slot is not None]
+
+    def render(self, values):
+        chunks = []
+        for literal, slot in self.parts:
+            chunks.append(literal)
+            if slot is not None:
+                value = values.get(slot, "")
+                chunks.append(value if isinstance(value, str) else value.to_html())
+        return "".join(chunks)
+
+    # Like render() but writes into out; HTMLNode values are streamed with
+    # write_html() instead of being rendered to a string first.
+    def write(self, out, values):
+        for literal, slot in self.parts:
+            out.write(literal)
+            if slot is not None:
+                value = values.get(slot, "")
+                if isinstance(value, str):
+                    out.write(value)
+                else:
+                    value.write_html(out)
+
+    def __repr__(self):
+        return f"Template({self.slots})"
+
+
+def load_template(path):
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _template_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(path, "r") as f:
+        template = Template(f.read())
+    _template_cache[path] = (signature, template)
+    return template
@@ -0,0 +1,90 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+from ast_cache import ASTCache, decode_node, encode_node
+from gencontent import generate_pages_recursive
+from inline_markdown import markdown_to_html_node
+from sitetest import SiteTestCase
+
+
+class TestASTCache(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.root, ".cache", "ast")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(4):
+            self.write(
+                os.path.join("content", f"page{i}.md"),
+                f"# Page {i}\n\nSome **bold** and an ![image](/img{i}.png)\n\n* one\n* two",
+            )
+
+    def test_round_trip(self):
+        markdown = "# Title\n\n> quote\n\n```\ncode\n```\n\n1. a\n2. [link](/x)"
+        node = markdown_to_html_node(markdown)
+        self.assertEqual(decode_node(encode_node(node)).to_html(), node.to_html())
+
+    def test_get_put(self):
+        cache = ASTCache(self.cache_dir)
+        node = markdown_to_html_node("# Hi\n\ntext")
+        self.assertIsNone(cache.get("# Hi\n\ntext"))
+        cache.put("# Hi\n\ntext", node)
+        self.assertEqual(cache.get("# Hi\n\ntext").to_html(), node.to_html())
+        self.assertIsNone(cache.get("# Hi\n\nother"))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_template_change_reuses_parsed_pages(self):
+        generate_pages_recursive(self.content, self.template, self.public, ast_cache=ASTCache(self.cache_dir))
+        self.write(self.template, "<h6>{{ Title }}</h6>{{ Content }}")
+        cache = ASTCache(self.cache_dir)
+        generate_pages_recursive(self.content, self.template, self.public, ast_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (4, 0))
+        html = self.read("page2.html")
+        self.assertTrue(html.startswith("<h6>Page 2</h6><div><h1>Page 2</h1>"))
+
+        uncached = os.path.join(self.root, "uncached")
+        generate_pages_recursive(self.content, self.template, uncached)
+        self.assertEqual(html, self.read(os.path.join(uncached, "page2.html")))
+
+    def test_parallel_build_counts(self):
+        cache = ASTCache(self.cache_dir)
+        generate_pages_recursive(self.content, self.template, self.public, jobs=2, ast_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+        generate_pages_recursive(self.content, self.template, self.public, jobs=2, ast_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (4, 4))
+
+    def test_evict_least_recently_used(self):
+        cache = ASTCache(self.cache_dir)
+        for i in range(3):
+            cache.put(f"# Page {i}", markdown_to_html_node(f"# Page {i}"))
+        entry_size = os.path.getsize(cache.entry_path("# Page 0"))
+        past = time.time() - 60
+        os.utime(cache.entry_path("# Page 0"), (past, past))
+        os.utime(cache.entry_path("# Page 1"), (past + 1, past + 1))
+        cache.get("# Page 0")
+
+        cache.max_bytes = entry_size * 2
+        self.assertEqual(cache.evict(), 1)
+        self.assertFalse(os.path.exists(cache.entry_path("# Page 1")))
+        self.assertTrue(os.path.exists(cache.entry_path("# Page 0")))
+        self.assertTrue(os.path.exists(cache.entry_path("# Page 2")))
+
+    def test_evict_skips_the_walk_when_nothing_was_written(self):
+        cache = ASTCache(self.cache_dir)
+        generate_pages_recursive(self.content, self.template, self.public, jobs=2, ast_cache=cache)
+        self.assertGreater(cache.written, 0)
+        cache = ASTCache(self.cache_dir, max_bytes=0)
+        generate_pages_recursive(self.content, self.template, self.public, jobs=2, ast_cache=cache)
+        self.assertEqual(cache.written, 0)
+        with mock.patch("os.walk") as walk:
+            self.assertEqual(cache.evict(), 0)
+        walk.assert_not_called()
+
+        cache.put("# New", markdown_to_html_node("# New"))
+        self.assertEqual(cache.evict(), 5)
+        self.assertEqual(cache.written, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+import unittest
+
+import gencontent
+from async_build import AsyncPipeline
+from gencontent import generate_pages_recursive
+from sitetest import SiteTestCase, read_tree
+
+
+# Records the most reads and writes that were ever running at once.
+class CountingPipeline(AsyncPipeline):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.lock = threading.Lock()
+        self.open_now = 0
+        self.open_max = 0
+
+    def track(self, fn, *args):
+        with self.lock:
+            self.open_now += 1
+            self.open_max = max(self.open_max, self.open_now)
+        try:
+            time.sleep(0.002)
+            return fn(*args)
+        finally:
+            with self.lock:
+                self.open_now -= 1
+
+    def read_source(self, *args):
+        return self.track(super().read_source, *args)
+
+    def write_output(self, *args):
+        return self.track(super().write_output, *args)
+
+
+class TestAsyncPipeline(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        for i in range(30):
+            self.write(
+                os.path.join(self.content, f"section{i % 4}", f"page{i}.md"),
+                f"# Page {i}\n\nSome **bold** text with a [link](/page{i})\n\n* one\n* two",
+            )
+
+    def test_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        piped = os.path.join(self.root, "async")
+        generate_pages_recursive(self.content, self.template, serial)
+        errors = generate_pages_recursive(self.content, self.template, piped, pipeline=AsyncPipeline(4, 3))
+        self.assertEqual(errors, [])
+        self.assertEqual(len(read_tree(piped)), 30)
+        self.assertEqual(read_tree(serial), read_tree(piped))
+
+    def test_collects_page_errors(self):
+        broken = os.path.join(self.content, "broken.md")
+        self.write(broken, "no title here")
+        missing = os.path.join(self.content, "missing.md")
+        pages = gencontent.collect_pages(self.content, self.public)
+        pages.append((missing, os.path.join(self.public, "missing.html")))
+        errors = gencontent.generate_pages(pages, self.template, pipeline=AsyncPipeline(2, 2))
+        self.assertEqual(sorted(from_path for from_path, _ in errors), [broken, missing])
+        self.assertEqual(len(read_tree(self.public)), 30)
+
+    def test_open_files_are_bounded(self):
+        pipeline = CountingPipeline(8, 2)
+        errors = generate_pages_recursive(self.content, self.template, self.public, pipeline=pipeline)
+        self.assertEqual(errors, [])
+        self.assertEqual(pipeline.open_max, 2)
+
+    def test_streams_large_pages(self):
+        self.addCleanup(gencontent.use_stream_threshold, gencontent.stream_threshold)
+        serial = os.path.join(self.root, "serial")
+        generate_pages_recursive(self.content, self.template, serial)
+        gencontent.use_stream_threshold(0)
+        piped = os.path.join(self.root, "async")
+        generate_pages_recursive(self.content, self.template, piped, pipeline=AsyncPipeline())
+        self.assertEqual(read_tree(serial), read_tree(piped))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import os
+import random
+import unittest
+
+from block_scanner import block_type_of_lines, iter_blocks, scan_blocks
+from inline_markdown import block_to_block_type, markdown_to_blocks
+
+CONTENT_DIR = os.path.join(os.path.dirname(__file__), "..", "content")
+
+CORPUS = [
+    "",
+    "# Title\n\nA paragraph\nover two lines\n\n* one\n- two\n\n1. a\n2. b\n3. c\n\n> quote\n> more",
+    "```\ncode\n\nstill code?\n```",
+    "1. a\n3. b",
+    "  * indented\n  * list",
+    "> quote\nnot quote",
+    "####### seven",
+    # Quirks of splitting on "\n\n" the scanner has to reproduce.
+    "\n",
+    "\n\n",
+    "\n\n\n",
+    "text\n\n\n",
+    "text\n\n\n\n",
+    "text\n\n\n\n\n",
+    "\n\n\ntext",
+    "a\n   \nb",
+    "a\n\n   \n\nb",
+    "  \n\n\n",
+]
+
+
+def reference_blocks(markdown):
+    return [(block_to_block_type(block), block) for block in markdown_to_blocks(markdown)]
+
+
+def content_corpus():
+    documents = []
+    for root, _, filenames in os.walk(CONTENT_DIR):
+        for filename in filenames:
+            with open(os.path.join(root, filename)) as f:
+                documents.append(f.read())
+    return documents
+
+
+class TestBlockScanner(unittest.TestCase):
+    def test_matches_existing_functions_on_corpus(self):
+        for markdown in CORPUS + content_corpus():
+            with self.subTest(markdown=markdown):
+                self.assertListEqual(reference_blocks(markdown), scan_blocks(markdown))
+
+    def test_matches_existing_functions_on_random_text(self):
+        pieces = ["\n", "\n", "\n", " ", "a", "# ", ">", "* ", "- ", "1. ", "2. ", "```", "\t"]
+        rng = random.Random(0)
+        for _ in range(5000):
+            markdown = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 14)))
+            with self.subTest(markdown=markdown):
+                self.assertListEqual(reference_blocks(markdown), scan_blocks(markdown))
+                self.assertEqual(block_to_block_type(markdown), block_type_of_lines(markdown.split("\n")))
+
+    def test_iter_blocks_is_lazy(self):
+        lines = io.StringIO("# One\n\nfirst\n\nsecond\n")
+        blocks = iter_blocks(lines)
+        self.assertEqual(next(blocks), ("heading", "# One"))
+        self.assertEqual(lines.tell(), len("# One\n\nfirst\n"))
+        self.assertEqual(list(blocks), [("paragraph", "first"), ("paragraph", "second")])
+
+
+if __name__ == "__main__":
+    unittest.main()
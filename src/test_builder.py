@@ -0,0 +1,103 @@
+import json
+import os
+import unittest
+
+import main
+from builder import DEFAULT_OPTIONS, BuildConfig, Builder
+from sitetest import SiteTestCase
+
+
+class TestBuilder(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.write(os.path.join("content", "index.md"), "# Home\n\nSee [about](/about)")
+        self.write(os.path.join("content", "about.md"), "# About\n\nSome **bold** text")
+        self.write(os.path.join("static", "index.css"), "body {}")
+
+    def test_cli_defaults_match_config(self):
+        args = main.parse_args([])
+        self.assertEqual({name: getattr(args, name) for name in DEFAULT_OPTIONS}, DEFAULT_OPTIONS)
+        config = BuildConfig.from_args(main.parse_args(["--jobs", "3", "--no-cache"]), self.root)
+        self.assertEqual((config.jobs, config.no_cache), (3, True))
+
+    def test_invalid_options(self):
+        with self.assertRaises(TypeError):
+            BuildConfig(self.root, job=2)
+        with self.assertRaises(ValueError):
+            BuildConfig(self.root, async_io=True, jobs=2)
+
+    def test_repeated_builds_reuse_caches(self):
+        lines = []
+        builder = Builder(BuildConfig(self.root, check_links=True), lines.append)
+        manifest, errors, broken = builder.build()
+        self.assertEqual((errors, broken), ([], []))
+        self.assertEqual(manifest.rebuilt, 3)
+        self.assertEqual(
+            self.read("about.html"),
+            "<title>About</title><article><div><h1>About</h1><p>Some <b>bold</b> text</p></div></article>",
+        )
+        self.assertIn("Build complete: 0 skipped, 3 rebuilt, 0 removed", lines)
+
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        manifest, errors, _ = builder.build()
+        self.assertEqual((manifest.skipped, manifest.rebuilt), (1, 2))
+        self.assertEqual((builder.ast_cache.hits, builder.ast_cache.misses), (2, 0))
+
+    def test_unreadable_page_is_left_out_of_the_link_check(self):
+        with open(os.path.join(self.content, "latin1.md"), "wb") as f:
+            f.write("# Caf\xe9\n\n[gone](/gone)".encode("latin-1"))
+        manifest, errors, broken = Builder(BuildConfig(self.root, check_links=True), None).build()
+        self.assertEqual([os.path.basename(from_path) for from_path, _ in errors], ["latin1.md"])
+        self.assertEqual(broken, [])
+        self.assertTrue(os.path.exists(manifest.path))
+
+    def test_broken_pages_are_left_out_of_the_search_index(self):
+        self.write(os.path.join("content", "unclosed.md"), "---\ntitle: x\n\n# T")
+        with open(os.path.join(self.content, "latin1.md"), "wb") as f:
+            f.write("# Caf\xe9".encode("latin-1"))
+        manifest, errors, _ = Builder(BuildConfig(self.root, search_index=True), None).build()
+        self.assertEqual(sorted(os.path.basename(from_path) for from_path, _ in errors), ["latin1.md", "unclosed.md"])
+        self.assertTrue(os.path.exists(manifest.path))
+        docs = json.loads(self.read("search", "docs.json"))
+        self.assertEqual(sorted(url for url, _ in docs), ["/", "/about.html"])
+
+    def test_build_without_search_index_removes_it(self):
+        Builder(BuildConfig(self.root, staging=True, search_index=True), None).build()
+        search_path = os.path.join(self.public, "search")
+        self.assertTrue(os.path.exists(os.path.join(search_path, "index.json")))
+        lines = []
+        Builder(BuildConfig(self.root, staging=True), lines.append).build()
+        self.assertFalse(os.path.exists(search_path))
+        self.assertFalse(os.path.exists(os.path.join(self.root, ".cache", "search")))
+        self.assertIn("Search index: removed", lines)
+
+        Builder(BuildConfig(self.root, search_index=True), None).build()
+        Builder(BuildConfig(self.root, staging=True, clean=True), None).clean()
+        self.assertFalse(os.path.exists(search_path))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_clean(self):
+        Builder(BuildConfig(self.root), None).build()
+        stale = os.path.join(self.public, "stale.html")
+        self.write(stale, "old")
+        manifest, _, _ = Builder(BuildConfig(self.root, clean=True), None).build()
+        self.assertFalse(os.path.exists(stale))
+        self.assertEqual(manifest.rebuilt, 3)
+
+    def test_build_without_precompress_drops_gz_siblings(self):
+        Builder(BuildConfig(self.root, staging=True, precompress=True, precompress_min_size=0), None).build()
+        gz_path = os.path.join(self.public, "about.html.gz")
+        self.assertTrue(os.path.exists(gz_path))
+        self.write(os.path.join("content", "about.md"), "# About\n\nChanged")
+        lines = []
+        Builder(BuildConfig(self.root, staging=True), lines.append).build()
+        self.assertEqual(
+            sorted(os.listdir(self.public)), ["about.html", "index.css", "index.html"]
+        )
+        self.assertIn("Precompressed: 3 .gz files removed", lines)
+        self.assertFalse(os.path.exists(os.path.join(self.root, ".cache", "compressed.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import gzip
+import os
+import tracemalloc
+import unittest
+
+from async_build import AsyncPipeline
+from compress import Precompressor
+from copystatic import sync_static
+from gencontent import generate_pages_recursive
+from manifest import BuildManifest
+from sitetest import SiteTestCase
+
+
+class TestPrecompressor(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.index_path = os.path.join(self.root, "compressed.json")
+        self.write("template.html", "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        for i in range(6):
+            self.write(os.path.join("content", "blog", f"post{i}.md"), f"# Post {i}\n\n" + "Some text. " * 200)
+        self.write(os.path.join("content", "tiny.md"), "# Tiny")
+        self.write(os.path.join("static", "index.css"), "body { margin: 0 }\n" * 100)
+        self.write(os.path.join("static", "logo.png"), "png" * 1000)
+
+    def build(self, **kwargs):
+        manifest = BuildManifest.load(self.manifest_path)
+        compressor = Precompressor.load(self.index_path, min_size=512, jobs=2)
+        sync_static(self.static, self.public, manifest, compressor=compressor)
+        errors = generate_pages_recursive(
+            self.content, self.template, self.public, manifest, compressor=compressor, **kwargs
+        )
+        self.assertEqual(errors, [])
+        manifest.remove_orphans()
+        manifest.save()
+        compressor.wait()
+        compressor.prune()
+        compressor.save()
+        return compressor
+
+    def assert_siblings_match(self):
+        gz_files = []
+        for root, _, filenames in os.walk(self.public):
+            for filename in filenames:
+                if not filename.endswith(".gz"):
+                    continue
+                gz_path = os.path.join(root, filename)
+                gz_files.append(os.path.relpath(gz_path, self.public))
+                with open(gz_path, "rb") as f, open(gz_path[: -len(".gz")], "rb") as original:
+                    self.assertEqual(gzip.decompress(f.read()), original.read())
+        return sorted(gz_files)
+
+    def test_text_outputs_get_gzip_siblings(self):
+        stats = self.build().stats
+        expected = sorted([os.path.join("blog", f"post{i}.html.gz") for i in range(6)] + ["index.css.gz"])
+        self.assertEqual(self.assert_siblings_match(), expected)
+        self.assertEqual((stats.compressed, stats.unchanged, stats.small), (7, 0, 1))
+        self.assertLess(stats.bytes_out, stats.bytes_in / 4)
+
+    def test_unchanged_outputs_are_skipped(self):
+        self.build()
+        stats = self.build().stats
+        self.assertEqual((stats.compressed, stats.unchanged), (0, 8))
+
+        # Re-rendered pages whose bytes did not change are not compressed
+        # again.
+        os.remove(self.manifest_path)
+        stats = self.build().stats
+        self.assertEqual((stats.compressed, stats.unchanged, stats.small), (0, 7, 1))
+
+        self.write(self.template, "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        stats = self.build().stats
+        self.assertEqual((stats.compressed, stats.unchanged, stats.small), (6, 1, 1))
+
+        self.write(os.path.join(self.content, "blog", "post0.md"), "# Post 0\n\nShort now")
+        os.remove(os.path.join(self.content, "blog", "post1.md"))
+        stats = self.build().stats
+        self.assertEqual((stats.compressed, stats.unchanged, stats.small), (0, 6, 1))
+        self.assertNotIn(os.path.join("blog", "post0.html.gz"), self.assert_siblings_match())
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post1.html.gz")))
+
+    def test_missing_sibling_is_written_again(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.css.gz"))
+        stats = self.build().stats
+        self.assertEqual(stats.compressed, 1)
+        self.assertIn("index.css.gz", self.assert_siblings_match())
+
+    def test_every_build_path_compresses(self):
+        for kwargs in ({"jobs": 2}, {"pipeline": AsyncPipeline(4, 2)}):
+            with self.subTest(kwargs=kwargs):
+                self.build(**kwargs)
+                self.assertEqual(len(self.assert_siblings_match()), 7)
+                os.remove(self.manifest_path)
+                os.remove(self.index_path)
+                for i in range(6):
+                    os.remove(os.path.join(self.public, "blog", f"post{i}.html.gz"))
+
+    def test_outputs_on_disk_are_compressed_in_chunks(self):
+        dest_path = os.path.join(self.public, "big.html")
+        self.write(dest_path, "<p>Some text and a <a href=\"/x\">link</a>.</p>\n" * 40000)
+        compressor = Precompressor(self.index_path, jobs=1)
+        tracemalloc.start()
+        compressor.add_file(dest_path)
+        compressor.wait()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(peak, os.path.getsize(dest_path) // 4)
+        self.assertEqual(compressor.stats.compressed, 1)
+        self.assert_siblings_match()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import unittest
+
+from copystatic import SyncStats, format_bytes, sync_static, transfer_file
+from manifest import BuildManifest
+from sitetest import SiteTestCase
+
+
+class TestSyncStatic(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.write(os.path.join("static", "index.css"), "body {}")
+        self.write(os.path.join("static", "images", "logo.png"), "PNG." * 100)
+
+    def sync(self, **kwargs):
+        manifest = BuildManifest.load(self.manifest_path)
+        stats = sync_static(self.static, self.public, manifest, **kwargs)
+        manifest.remove_orphans()
+        manifest.save()
+        return manifest, stats
+
+    def test_every_mode_copies_the_same_bytes(self):
+        for mode in ("auto", "reflink", "hardlink", "copy"):
+            with self.subTest(mode=mode):
+                dest = os.path.join(self.root, mode, "logo.png")
+                transfer_file(os.path.join(self.static, "images", "logo.png"), dest, mode)
+                with open(dest, "rb") as f:
+                    self.assertEqual(f.read(), b"PNG." * 100)
+
+    def test_unchanged_files_are_skipped(self):
+        _, first = self.sync()
+        self.assertEqual(first.bytes_avoided + first.bytes_copied, 407)
+        _, second = self.sync()
+        self.assertEqual(second.methods, {"skipped": 2})
+        self.assertEqual(second.bytes_avoided, 407)
+        self.assertEqual(second.bytes_copied, 0)
+
+    def test_changed_file_is_synced(self):
+        for check in ("stat", "hash"):
+            with self.subTest(check=check):
+                self.sync(check=check)
+                self.write(os.path.join(self.static, "index.css"), check)
+                _, stats = self.sync(check=check)
+                self.assertEqual(stats.methods.get("skipped"), 1)
+                self.assertEqual(self.read("index.css"), check)
+
+    def test_hardlinked_output_is_replaced_not_written_through(self):
+        self.sync(mode="hardlink")
+        source = os.path.join(self.static, "index.css")
+        os.remove(source)
+        self.write(source, "new")
+        self.sync(mode="copy")
+        self.assertEqual(self.read("index.css"), "new")
+        self.sync(mode="copy")
+        with open(source, "rb") as f:
+            self.assertEqual(f.read(), b"new")
+
+    def test_relinking_a_hardlinked_output_keeps_the_source(self):
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.public, "index.css")
+        transfer_file(source, dest, "hardlink")
+        transfer_file(source, dest, "hardlink")
+        transfer_file(source, dest, "auto")
+        self.assertEqual(os.listdir(self.public), ["index.css"])
+        with open(source, "rb") as f:
+            self.assertEqual(f.read(), b"body {}")
+
+    def test_deleted_assets_are_pruned(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "logo.png"))
+        manifest, _ = self.sync()
+        self.assertEqual(manifest.removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+
+    def test_stats_summary(self):
+        stats = SyncStats()
+        stats.add("copy", 2048)
+        stats.add("hardlink", 512)
+        self.assertEqual(stats.summary(), "1 copy, 1 hardlink; 2.0 KB copied, 512 B avoided")
+        self.assertEqual(format_bytes(3 * 1024 * 1024), "3.0 MB")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.suite import compare, read_markdown
+from gencontent import generate_pages_recursive
+
+
+class TestCorpus(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            generate_corpus(first, "link-dense", scale=0.02, static_files=2)
+            generate_corpus(second, "link-dense", scale=0.02, static_files=2)
+            self.assertEqual(
+                read_markdown(os.path.join(first, "content")),
+                read_markdown(os.path.join(second, "content")),
+            )
+
+    def test_corpus_builds(self):
+        with tempfile.TemporaryDirectory() as root:
+            pages = generate_corpus(root, "deep-nesting", scale=0.01, static_files=1)
+            errors = generate_pages_recursive(
+                os.path.join(root, "content"), os.path.join(root, "template.html"), os.path.join(root, "public")
+            )
+            self.assertEqual(errors, [])
+            self.assertEqual(pages, 4)
+
+    def test_compare_flags_regressions(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            regressions = compare({"a": 1.0, "b": 1.0}, {"a": 1.05, "b": 1.5, "c": 2.0}, 0.10)
+        self.assertEqual(regressions, ["b"])
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ["a", "b", "c"])
+        self.assertNotIn("REGRESSION", lines[0])
+        self.assertTrue(lines[1].endswith("1.50x  REGRESSION"))
+        self.assertTrue(lines[2].endswith("(new)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
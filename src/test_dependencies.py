@@ -0,0 +1,115 @@
+import os
+import unittest
+
+from builder import BuildConfig, Builder
+from dependencies import PageDependencies
+from gencontent import generate_pages_recursive
+from manifest import BuildManifest
+from serve import ChangeWatcher, SiteRebuilder
+from sitetest import SiteTestCase
+
+
+class TestPageDependencies(SiteTestCase):
+    watched = True
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "{{ Title }}|{{ Content }}")
+        self.write(os.path.join("content", "index.md"), "# Home\n\nRead the [blog](/blog/) or [about](about.html)")
+        self.write(os.path.join("content", "about.md"), "# About\n\n![logo](/images/logo.png) [home](/)")
+        self.write(
+            os.path.join("content", "blog", "index.md"), "# Blog\n\nSee [post](post) and [wiki](https://example.com)"
+        )
+        self.write(os.path.join("content", "blog", "post.md"), "# Post\n\n[Back](../index.md#top)")
+        self.write(os.path.join("static", "images", "logo.png"), "png")
+        self.dependencies = PageDependencies(self.content, self.static)
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+
+    def path(self, *parts):
+        return os.path.normpath(os.path.join(*parts))
+
+    def build(self):
+        manifest = BuildManifest.load(self.manifest_path)
+        errors = generate_pages_recursive(
+            self.content, self.template, self.public, manifest, dependencies=self.dependencies
+        )
+        self.assertEqual(errors, [])
+        manifest.save()
+        return manifest
+
+    def test_find(self):
+        self.assertEqual(
+            self.dependencies.find(os.path.join(self.content, "index.md")),
+            [self.path(self.content, "about.md"), self.path(self.content, "blog", "index.md")],
+        )
+        self.assertEqual(
+            self.dependencies.find(os.path.join(self.content, "about.md")),
+            [self.path(self.content, "index.md"), self.path(self.static, "images", "logo.png")],
+        )
+        self.assertEqual(
+            self.dependencies.find(os.path.join(self.content, "blog", "index.md")),
+            [self.path(self.content, "blog", "post.md")],
+        )
+        self.assertEqual(
+            self.dependencies.find(os.path.join(self.content, "blog", "post.md")),
+            [self.path(self.content, "index.md")],
+        )
+
+    def test_missing_target_maps_to_its_future_source(self):
+        from_path = os.path.join(self.content, "index.md")
+        self.assertEqual(self.dependencies.url_to_source("/new", from_path), self.path(self.content, "new.md"))
+        self.assertEqual(self.dependencies.url_to_source("#top", from_path), None)
+        self.assertEqual(self.dependencies.url_to_source("../outside", from_path), None)
+
+    def test_change_rebuilds_exactly_its_dependents(self):
+        self.build()
+        self.write(os.path.join(self.content, "about.md"), "# About us\n\n![logo](/images/logo.png)")
+        manifest = self.build()
+        self.assertEqual(manifest.rebuilt, 2)
+        about = self.path(self.content, "about.md")
+        self.assertEqual(
+            manifest.reasons,
+            {
+                self.path(self.public, "index.html"): [f"{about} changed"],
+                self.path(self.public, "about.html"): ["source changed"],
+            },
+        )
+
+        self.write(os.path.join(self.static, "images", "logo.png"), "new png")
+        manifest = self.build()
+        self.assertEqual(list(manifest.reasons), [self.path(self.public, "about.html")])
+
+    def test_removed_and_created_targets(self):
+        self.build()
+        post = os.path.join(self.content, "blog", "post.md")
+        os.remove(post)
+        manifest = self.build()
+        self.assertEqual(
+            manifest.reasons, {self.path(self.public, "blog", "index.html"): [f"{self.path(post)} was removed"]}
+        )
+        self.write(post, "# Post again")
+        manifest = self.build()
+        self.assertEqual(
+            manifest.reasons[self.path(self.public, "blog", "index.html")], [f"{self.path(post)} was created"]
+        )
+
+    def test_watch_rebuilds_dependents(self):
+        builder = Builder(BuildConfig(self.root), None)
+        manifest, errors, _ = builder.build()
+        self.assertEqual(errors, [])
+        watcher = ChangeWatcher([self.content, self.static, self.template])
+        rebuilder = SiteRebuilder(builder, manifest)
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nNo links")
+        self.assertEqual(rebuilder.apply(*watcher.poll()), [])
+        self.assertEqual(manifest.rebuilt, 2)
+        self.assertEqual(
+            manifest.dependents(os.path.join(self.content, "index.md")),
+            [
+                (self.path(self.content, "about.md"), self.path(self.public, "about.html")),
+                (self.path(self.content, "index.md"), self.path(self.public, "index.html")),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
+import os
+import tracemalloc
 import unittest
 
-from gencontent import extract_title
+import gencontent
+import inline_markdown
+from gencontent import extract_title, find_title, generate_page, generate_pages_recursive
+from sitetest import SiteTestCase, read_tree
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -46,5 +51,94 @@ no title
             pass
 
 
+class TestParallelBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        for i in range(12):
+            self.write(
+                os.path.join(self.content, f"section{i % 3}", f"page{i}.md"),
+                f"# Page {i}\n\nSome **bold** and *italic* text with a [link](/page{i})\n\n"
+                f"* one\n* two\n\n1. first\n2. second\n\n> quoted {i}",
+            )
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages_recursive(self.content, self.template, serial)
+        errors = generate_pages_recursive(self.content, self.template, parallel, jobs=3)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(read_tree(serial)), 12)
+        self.assertEqual(read_tree(serial), read_tree(parallel))
+
+    def test_parallel_reports_inline_cache_lookups(self):
+        self.addCleanup(setattr, inline_markdown, "inline_cache", inline_markdown.inline_cache)
+        inline_markdown.use_inline_cache(64)
+        generate_pages_recursive(self.content, self.template, os.path.join(self.root, "serial"))
+        hits, misses = inline_markdown.inline_cache.counts()
+        inline_markdown.use_inline_cache(64)
+        generate_pages_recursive(self.content, self.template, os.path.join(self.root, "parallel"), jobs=3)
+        parallel_hits, parallel_misses = inline_markdown.inline_cache.counts()
+        self.assertGreater(parallel_hits, 0)
+        self.assertEqual(parallel_hits + parallel_misses, hits + misses)
+
+    def test_collects_page_errors(self):
+        broken = os.path.join(self.content, "section1", "broken.md")
+        self.write(broken, "no title here")
+        for jobs in (1, 2):
+            public = os.path.join(self.root, f"public{jobs}")
+            errors = generate_pages_recursive(self.content, self.template, public, jobs=jobs)
+            self.assertEqual([from_path for from_path, _ in errors], [broken])
+            self.assertIn("No title found", errors[0][1])
+            self.assertEqual(len(read_tree(public)), 12)
+
+
+class TestStreamedPages(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.addCleanup(gencontent.use_stream_threshold, gencontent.stream_threshold)
+
+    def render(self, markdown, threshold):
+        from_path = self.write("page.md", markdown)
+        dest_path = os.path.join(self.root, "out", "page.html")
+        gencontent.use_stream_threshold(threshold)
+        generate_page(from_path, self.template, dest_path)
+        with open(dest_path) as f:
+            return f.read()
+
+    def test_streamed_output_matches_in_memory(self):
+        documents = [
+            "# Title\n\nSome **bold** text\nover lines\n\n* a\n* b\n\n1. one\n2. two\n\n> quote\n\n```\ncode\n```",
+            "intro\n\n# Late title\n\n\n\n\n",
+            "# Title\n\n   \n\ntext\n\n\n",
+        ]
+        for markdown in documents:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(self.render(markdown, 0), self.render(markdown, 1 << 30))
+
+    def test_find_title(self):
+        markdown = "intro\n## Sub\n# The title\n# Another\n"
+        self.assertEqual(find_title(markdown.splitlines(keepends=True)), extract_title(markdown))
+        with self.assertRaises(ValueError):
+            find_title(["no title\n"])
+
+    def test_missing_title_leaves_no_output(self):
+        with self.assertRaises(ValueError):
+            self.render("no title here", 0)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "out")))
+
+    def test_memory_is_bounded_by_the_largest_block(self):
+        block = "Some **bold** text and a [link](/x) in a paragraph of prose.\n\n"
+        markdown = "# Big\n\n" + block * 5000
+        from_path = self.write("big.md", markdown)
+        gencontent.use_stream_threshold(0)
+        tracemalloc.start()
+        generate_page(from_path, self.template, os.path.join(self.root, "big.html"))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(peak, len(markdown) // 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,9 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
 from textnode import TextNode, TextType
-from converter import text_node_to_html_node
+from converter import text_node_to_html_node, text_nodes_to_html
 
 class TestHTMLNode(unittest.TestCase):
     
@@ -30,6 +31,11 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(parent_node.children[0].value, "child1", "Expected first child node value to be 'child1'.")
         self.assertEqual(parent_node.children[1].value, "child2", "Expected second child node value to be 'child2'.")
     
+    def test_slotted(self):
+        for node in (HTMLNode("p", "text"), LeafNode("b", "text"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(repr(LeafNode("b", "text")), "LeafNode(b, text, None)")
+
     def test_missing_props(self):
         node = HTMLNode(tag="p", value="This is a paragraph.")
         result = node.props_to_html()
@@ -73,6 +79,32 @@ class TestHTMLNode(unittest.TestCase):
         )
         self.assertEqual(parent.to_html(), "<div><p>first</p><p>second</p><p>third</p></div>")
 
+    def test_write_html_matches_to_html(self):
+        parent = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "Hello "), LeafNode("b", "world")], {"class": "intro"}),
+                LeafNode("a", "link", {"href": "/page"}),
+            ],
+        )
+        out = io.StringIO()
+        parent.write_html(out)
+        self.assertEqual(out.getvalue(), parent.to_html())
+        self.assertEqual(
+            out.getvalue(),
+            "<div><p class=\"intro\">Hello <b>world</b></p><a href=\"/page\">link</a></div>",
+        )
+
+    def test_write_html_deeply_nested(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        self.assertEqual(node.to_html(), "<span>" * 200 + "leaf" + "</span>" * 200)
+
+    def test_write_html_no_children(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", None).write_html(io.StringIO())
+
 #   ----- text_node_to_html_node Helper Function Tests -----------------------------------------
 
     def test_text_to_html(self):
@@ -104,6 +136,24 @@ class TestHTMLNode(unittest.TestCase):
         image_node = TextNode("puppy.jpg", TextType.IMAGE, "A cute puppy")
         html_node = text_node_to_html_node(image_node)
         self.assertEqual(html_node.to_html(), "<img src=\"puppy.jpg\" alt=\"A cute puppy\"></img>") # ATTENTION! </img> is not HTML5 standard but this test needs it   
+
+    def test_text_nodes_to_html_matches_nodes(self):
+        text_nodes = [
+            TextNode("text ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode("italic", TextType.ITALIC),
+            TextNode("code", TextType.CODE),
+            TextNode("Click here", TextType.LINK, "http://boot.dev"),
+            TextNode("puppy.jpg", TextType.IMAGE, "A cute puppy"),
+        ]
+        expected = "".join(text_node_to_html_node(text_node).to_html() for text_node in text_nodes)
+        self.assertEqual(text_nodes_to_html(text_nodes), expected)
+
+    def test_invalid_text_type(self):
+        with self.assertRaises(Exception):
+            text_node_to_html_node(TextNode("text", "underline"))
+        with self.assertRaises(Exception):
+            text_nodes_to_html([TextNode("text", "underline")])
         
 
 
@@ -0,0 +1,81 @@
+import os
+import random
+import unittest
+
+from inline_markdown import markdown_to_blocks, text_to_textnodes
+from inline_scanner import scan_inline
+from textnode import TextNode, TextType
+
+CONTENT_DIR = os.path.join(os.path.dirname(__file__), "..", "content")
+
+CORPUS = [
+    "",
+    "Plain text with no markup",
+    "This is text with a **bolded** word",
+    "This is text with a **bolded** word and **another**",
+    "This is text with a **bolded word** and **another**",
+    "This is text with an *italic* word",
+    "**bold** and *italic*",
+    "This is text with a `code block` word",
+    "![alt text](https://example.com/image.jpg)",
+    "![cat](cat.jpg) ![dog](dog.jpg)",
+    "Some text ![image](img.jpg) more text ![another](pic.png)",
+    "Check out [Boot.dev](https://boot.dev) and [Python](https://python.org)",
+    "[link](https://boot.dev) ![image](pic.jpg)",
+    "This is text with a [link](https://boot.dev) and [another link](https://blog.boot.dev) with text that follows",
+    "This is **text** with an *italic* word and a `code block` and an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev)",
+    # Quirks of the chained passes the scanner has to reproduce.
+    "**",
+    "****",
+    "*",
+    "``",
+    "a***b",
+    "**unclosed bold",
+    "`a*b`",
+    "[a](x*y*) and [b](c)",
+    "![a](b)[c](d)",
+    "!![a](b)",
+    "[a](![b](c))",
+]
+
+
+def content_corpus():
+    texts = []
+    for root, _, filenames in os.walk(CONTENT_DIR):
+        for filename in filenames:
+            with open(os.path.join(root, filename)) as f:
+                for block in markdown_to_blocks(f.read()):
+                    texts.extend(block.split("\n"))
+    return texts
+
+
+class TestScanInline(unittest.TestCase):
+    def test_matches_chained_tokenizer_on_corpus(self):
+        for text in CORPUS + content_corpus():
+            with self.subTest(text=text):
+                self.assertListEqual(text_to_textnodes(text), scan_inline(text))
+
+    def test_matches_chained_tokenizer_on_random_text(self):
+        pieces = ["a", " ", "*", "**", "`", "[", "]", "(", ")", "!", "![a](b)", "[l](u)", "![x](y"]
+        rng = random.Random(0)
+        for _ in range(5000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            with self.subTest(text=text):
+                self.assertListEqual(text_to_textnodes(text), scan_inline(text))
+
+    def test_scan_inline(self):
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("this", TextType.BOLD),
+                TextNode(" ", TextType.TEXT),
+                TextNode("pic", TextType.IMAGE, "/pic.png"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("docs", TextType.LINK, "/docs"),
+            ],
+            scan_inline("See **this** ![pic](/pic.png) and [docs](/docs)"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import unittest
+
+from builder import BuildConfig, Builder
+from listings import listing_html, paginate, tag_slug
+from metadata import read_metadata
+from sitetest import SiteTestCase
+
+
+class TestListings(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join("static", "index.css"), "body {}")
+        self.write(
+            os.path.join("content", "index.md"), "# Home\n\nNot a post; see [posts](/posts/) and [odd](/tags/odd/page/1/)"
+        )
+        for day in range(1, 6):
+            self.post(day, "odd" if day % 2 else "even")
+
+    def post(self, day, tag, draft="false"):
+        self.write(
+            os.path.join("content", "blog", f"day{day}.md"),
+            f"---\ndate: 2024-01-{day:02}\ntags: [all, {tag}]\ndraft: {draft}\n---\n"
+            f"# Day {day}\n\n- a list\n\nDay {day} **summary**.\n\nMore text",
+        )
+
+    def build(self):
+        config = BuildConfig(self.root, listings=True, per_page=2, explain=True, check_links=True)
+        manifest, errors, broken = Builder(config, None).build()
+        self.assertEqual((errors, broken), ([], []))
+        return manifest
+
+    def rebuilt_listings(self, manifest):
+        return sorted(
+            os.path.relpath(os.path.dirname(dest_path), self.public)
+            for dest_path in manifest.reasons
+            if not dest_path.startswith(os.path.join(self.public, "blog"))
+        )
+
+    def titles(self, *parts):
+        html = self.read(*parts, "index.html")
+        return [int(part.split("<")[0]) for part in html.split('">Day ')[1:]]
+
+    def test_summary_is_first_paragraph(self):
+        meta = read_metadata(os.path.join(self.root, "content", "blog", "day3.md"))
+        self.assertEqual(meta["summary"], "<p>Day 3 <b>summary</b>.</p>")
+
+    def test_paginate_from_oldest(self):
+        self.assertEqual(paginate([1, 2, 3, 4, 5], 2), [[1, 2], [3, 4], [5]])
+        self.assertEqual(paginate([], 2), [[]])
+        self.assertEqual(tag_slug("C++ & Rust"), "c-rust")
+        html = listing_html([["/a.html", "A <b>", "2024-01-01", "<p>x</p>"]], ["/page/1/", None])
+        self.assertEqual(
+            html,
+            '<ul class="listing"><li><a href="/a.html">A &lt;b&gt;</a> <time datetime="2024-01-01">2024-01-01</time>'
+            '<p>x</p></li></ul><nav class="pagination"><a rel="prev" href="/page/1/">Older</a></nav>',
+        )
+
+    def test_listing_pages(self):
+        self.build()
+        self.assertEqual(self.titles("posts"), [5, 4])
+        self.assertEqual(self.titles("posts", "page", "1"), [2, 1])
+        self.assertEqual(self.titles("posts", "page", "3"), [5])
+        self.assertIn('<a rel="next" href="/posts/page/3/">Newer</a>', self.read("posts", "page", "2", "index.html"))
+        self.assertIn("<p>Day 5 <b>summary</b>.</p>", self.read("posts", "index.html"))
+        self.assertEqual(self.titles("tags", "odd"), [5, 3])
+        self.assertEqual(self.titles("tags", "even", "page", "1"), [4, 2])
+        self.assertIn('<a href="/tags/all/">all (5)</a>', self.read("tags", "index.html"))
+        self.assertNotIn("Home", self.read("posts", "index.html"))
+
+    def test_failed_post_is_not_listed(self):
+        self.write(os.path.join("content", "blog", "broken.md"), "---\ndate: 2024-02-01\ntags: [all]\n---\nNo heading")
+        _, errors, _ = Builder(BuildConfig(self.root, listings=True, per_page=2), None).build()
+        self.assertEqual([os.path.basename(from_path) for from_path, _ in errors], ["broken.md"])
+        self.assertNotIn("broken", self.read("posts", "index.html"))
+        self.assertIn('<a href="/tags/all/">all (5)</a>', self.read("tags", "index.html"))
+
+    def test_new_post_rebuilds_only_affected_listings(self):
+        self.build()
+        self.assertEqual(self.rebuilt_listings(self.build()), [])
+
+        # Day 6 fills the newest posts page; Day 7 starts a new one, which
+        # also gives the page before it a link to the next.
+        self.post(6, "even")
+        self.assertEqual(
+            self.rebuilt_listings(self.build()),
+            [
+                "posts", "posts/page/3", "tags", "tags/all", "tags/all/page/3", "tags/even", "tags/even/page/1",
+                "tags/even/page/2",
+            ],
+        )
+        self.post(7, "odd")
+        self.assertEqual(
+            self.rebuilt_listings(self.build()),
+            [
+                "posts", "posts/page/3", "posts/page/4", "tags", "tags/all", "tags/all/page/3", "tags/all/page/4",
+                "tags/odd", "tags/odd/page/2",
+            ],
+        )
+
+        # A post turned draft leaves every page from the one it was on.
+        self.post(2, "even", draft="true")
+        manifest = self.build()
+        self.assertEqual(self.titles("posts", "page", "1"), [3, 1])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "posts", "page", "4")))
+        self.assertEqual(manifest.removed, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
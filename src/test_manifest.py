@@ -0,0 +1,83 @@
+import os
+import unittest
+
+from copystatic import sync_static
+from gencontent import generate_pages_recursive
+from manifest import BuildManifest
+from sitetest import SiteTestCase
+
+
+class TestBuildManifest(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.root, ".cache", "manifest.json")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join("content", "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join("content", "blog", "index.md"), "# Blog\n\nPosts")
+        self.write(os.path.join("static", "index.css"), "body {}")
+
+    def build(self):
+        manifest = BuildManifest.load(self.manifest_path)
+        sync_static(self.static, self.public, manifest)
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        manifest.remove_orphans()
+        manifest.save()
+        return manifest
+
+    def test_first_build_renders_everything(self):
+        manifest = self.build()
+        self.assertEqual((manifest.skipped, manifest.rebuilt, manifest.removed), (0, 3, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+
+    def test_unchanged_build_skips_everything(self):
+        self.build()
+        manifest = self.build()
+        self.assertEqual((manifest.skipped, manifest.rebuilt, manifest.removed), (3, 0, 0))
+
+    def test_changed_source_rebuilds_only_that_page(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        manifest = self.build()
+        self.assertEqual((manifest.skipped, manifest.rebuilt), (2, 1))
+        self.assertIn("Changed", self.read("index.html"))
+
+    def test_changed_template_rebuilds_every_page(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        manifest = self.build()
+        self.assertEqual((manifest.skipped, manifest.rebuilt), (1, 2))
+
+    def test_deleted_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.css"))
+        manifest = self.build()
+        self.assertEqual(manifest.rebuilt, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.css")))
+
+    def test_orphans_are_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        manifest = self.build()
+        self.assertEqual(manifest.removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+
+    def test_failed_page_keeps_its_output(self):
+        self.build()
+        self.write(os.path.join(self.content, "blog", "index.md"), "No title any more")
+        for jobs in (1, 2):
+            manifest = BuildManifest.load(self.manifest_path)
+            sync_static(self.static, self.public, manifest)
+            errors = generate_pages_recursive(self.content, self.template, self.public, manifest, jobs=jobs)
+            manifest.remove_orphans()
+            manifest.save()
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(manifest.removed, 0)
+            self.assertIn("Posts", self.read("blog", "index.html"))
+
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nFixed")
+        manifest = self.build()
+        self.assertEqual((manifest.skipped, manifest.rebuilt), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import threading
+import unittest
+
+import inline_markdown
+from inline_markdown import markdown_to_html_node, text_to_children, use_inline_cache
+from memo import MemoCache
+
+
+class TestMemoCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        calls = []
+
+        def square(n):
+            calls.append(n)
+            return n * n
+
+        cache = MemoCache(square, 2)
+        self.assertEqual([cache(1), cache(2), cache(1), cache(3), cache(2), cache(1)], [1, 4, 1, 9, 4, 1])
+        self.assertEqual(calls, [1, 2, 3, 2, 1])
+        self.assertEqual(cache.counts(), (1, 5))
+        self.assertEqual(len(cache), 2)
+
+    def test_worker_counts_are_folded_in(self):
+        cache = MemoCache(str, 8)
+        cache(1)
+        cache(1)
+        cache.add_counts(5, 2)
+        self.assertEqual(cache.counts(), (6, 3))
+        self.assertEqual(cache.hit_rate(), 6 / 9)
+
+    def test_shared_between_threads(self):
+        cache = MemoCache(str, 50)
+
+        def work(offset):
+            for i in range(2000):
+                self.assertEqual(cache((i + offset) % 80), str((i + offset) % 80))
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(cache.counts()), 16000)
+        self.assertLessEqual(len(cache), 50)
+
+
+class TestInlineCache(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, inline_markdown, "inline_cache", inline_markdown.inline_cache)
+        use_inline_cache(16)
+
+    def test_repeated_text_is_rendered_once(self):
+        text = "Footer with **bold** and a [link](/about)"
+        first = text_to_children(text)
+        second = text_to_children(text)
+        self.assertEqual(inline_markdown.inline_cache.counts(), (1, 1))
+        self.assertIsNot(first, second)
+        self.assertEqual([node.to_html() for node in first], [node.to_html() for node in second])
+
+    def test_cached_output_matches_uncached(self):
+        markdown = "# Title\n\n" + "\n\n".join(["Repeated *note* with `code`", "* a\n* b"] * 5)
+        cached = markdown_to_html_node(markdown).to_html()
+        self.assertGreater(inline_markdown.inline_cache.counts()[0], 0)
+        use_inline_cache(0)
+        self.assertIsNone(inline_markdown.inline_cache)
+        self.assertEqual(markdown_to_html_node(markdown).to_html(), cached)
+
+
+if __name__ == "__main__":
+    unittest.main()
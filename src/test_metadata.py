@@ -0,0 +1,137 @@
+import io
+import os
+import time
+import unittest
+
+from builder import BuildConfig, Builder
+from metadata import MetadataIndex, parse_front_matter, read_front_matter, read_metadata, split_front_matter
+from sitetest import SiteTestCase
+
+POST = """---
+title: "Second: a post"
+date: 2024-03-01
+tags: [python, web]
+# A comment
+draft: false
+extra: kept
+---
+# Heading
+
+Body text
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split_front_matter(self):
+        meta, body = split_front_matter(POST)
+        self.assertEqual(meta["title"], "Second: a post")
+        self.assertEqual(meta["date"], "2024-03-01")
+        self.assertEqual(meta["tags"], ["python", "web"])
+        self.assertEqual((meta["draft"], meta["template"], meta["extra"]), (False, None, "kept"))
+        self.assertEqual(body, "# Heading\n\nBody text\n")
+
+        f = io.StringIO(POST)
+        self.assertEqual(read_front_matter(f), meta)
+        self.assertEqual(f.read(), body)
+
+    def test_no_front_matter(self):
+        meta, body = split_front_matter("# Title\n\n---\n")
+        self.assertEqual((meta["title"], meta["tags"], body), (None, [], "# Title\n\n---\n"))
+        f = io.StringIO("# Title\n")
+        self.assertIsNone(read_front_matter(f)["title"])
+        self.assertEqual(f.read(), "# Title\n")
+
+    def test_values(self):
+        meta = parse_front_matter(["tags:\n", "  - one\n", "  - 'two'\n", "draft: true\n", "title:\n"])
+        self.assertEqual((meta["tags"], meta["draft"], meta["title"]), (["one", "two"], True, None))
+        self.assertEqual(parse_front_matter(["tags: a, b\n"])["tags"], ["a", "b"])
+        for lines in (["no colon\n"], ["two words: x\n"], ["date: March\n"], ["draft: maybe\n"]):
+            with self.assertRaises(ValueError):
+                parse_front_matter(lines)
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: x\n")
+
+
+class TestMetadataIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.clock = time.time_ns()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("post.html", "<h1>Post: {{ Title }}</h1>{{ Content }}")
+        self.write(os.path.join("static", "index.css"), "body {}")
+        self.write(os.path.join("content", "index.md"), "# Home\n")
+        self.write(os.path.join("content", "blog", "first.md"), "---\ndate: 2024-01-05\ntags: web\n---\n# First\n")
+        self.write(os.path.join("content", "blog", "second.md"), POST)
+        self.write(
+            os.path.join("content", "blog", "draft.md"), "---\ntitle: Draft\ndate: 2025-01-01\ndraft: true\n---\nText\n"
+        )
+
+    def write(self, name, text):
+        path = super().write(name, text)
+        # Each write gets a later mtime than the last, as the index trusts
+        # size and mtime.
+        self.clock += 10**9
+        os.utime(path, ns=(self.clock, self.clock))
+        return path
+
+    def content_path(self, *parts):
+        return os.path.normpath(os.path.join(self.content, *parts))
+
+    def build(self, **options):
+        builder = Builder(BuildConfig(self.root, **options), None)
+        manifest, errors, _ = builder.build()
+        self.assertEqual(errors, [])
+        return manifest
+
+    def test_read_metadata_takes_title_from_heading(self):
+        self.assertEqual(read_metadata(self.content_path("blog", "first.md"))["title"], "First")
+        self.assertEqual(read_metadata(self.content_path("blog", "second.md"))["title"], "Second: a post")
+
+    def test_index_reads_only_changed_pages(self):
+        path = os.path.join(self.root, "metadata.json")
+        index = MetadataIndex(path)
+        for name in ("index.md", "blog/first.md", "blog/second.md", "blog/draft.md"):
+            index.get(self.content_path(name))
+        self.assertEqual(index.read, 4)
+        self.assertEqual(
+            [os.path.relpath(from_path, self.content) for from_path, _ in index.listing()],
+            ["blog/second.md", "blog/first.md", "index.md"],
+        )
+        self.assertEqual(list(index.tags()), ["python", "web"])
+        self.assertEqual(len(index.tags()["web"]), 2)
+        self.assertEqual(index.skipped(), [self.content_path("blog", "draft.md")])
+        index.save()
+
+        index = MetadataIndex.load(path)
+        self.write(os.path.join("content", "index.md"), "---\ntags: [home]\n---\n# Home\n")
+        index.get(self.content_path("index.md"))
+        index.get(self.content_path("blog", "first.md"))
+        self.assertEqual(index.read, 1)
+        self.assertEqual(index.get(self.content_path("index.md"))["tags"], ["home"])
+        index.save()
+        self.assertEqual(len(MetadataIndex.load(path).pages), 2)
+
+    def test_build_uses_front_matter(self):
+        manifest = self.build()
+        self.assertEqual(manifest.rebuilt, 4)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "draft.html")))
+        self.assertTrue(self.read("blog", "second.html").startswith("<title>Second: a post</title><div><h1>Heading"))
+
+        self.write(
+            os.path.join("content", "blog", "first.md"), "---\ndate: 2024-01-05\ntemplate: post.html\n---\n# First\n"
+        )
+        manifest = self.build(drafts=True)
+        self.assertEqual((manifest.skipped, manifest.rebuilt), (3, 2))
+        self.assertTrue(self.read("blog", "first.html").startswith("<h1>Post: First</h1>"))
+        self.assertIn("Text", self.read("blog", "draft.html"))
+
+        # A page's own template is a dependency like the default one.
+        self.write("post.html", "<h2>{{ Title }}</h2>{{ Content }}")
+        manifest = self.build()
+        self.assertEqual((manifest.skipped, manifest.rebuilt, manifest.removed), (3, 1, 1))
+        self.assertTrue(self.read("blog", "first.html").startswith("<h2>First</h2>"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "draft.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
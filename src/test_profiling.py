@@ -0,0 +1,59 @@
+import json
+import os
+import unittest
+
+from gencontent import generate_pages_recursive
+from inline_markdown import markdown_to_html_node
+from profiling import PAGE_STAGES, BuildProfiler, PageTimer, percentile, timed_markdown_to_html_node
+from sitetest import SiteTestCase
+
+
+class TestProfiling(SiteTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_timed_render_matches_untimed(self):
+        md = "# Title\n\nSome **bold** text\n\n* a\n* b\n\n> quote"
+        timer = PageTimer()
+        node = timed_markdown_to_html_node(md, timer)
+        self.assertEqual(node.to_html(), markdown_to_html_node(md).to_html())
+        self.assertEqual(tuple(timer.timings), PAGE_STAGES)
+        self.assertGreater(timer.timings["inline"], 0)
+
+    def test_summary_and_trace(self):
+        profiler = BuildProfiler()
+        for i in range(1, 21):
+            profiler.add_page(f"page{i}.md", dict.fromkeys(PAGE_STAGES, i / 1000))
+        profiler.add_phase("pages", 1.0)
+        summary = profiler.summary(slowest=3)
+        self.assertIn("20 pages", summary)
+        self.assertIn("p50 70.00 ms", summary)
+        self.assertIn("max 140.00 ms", summary)
+        self.assertIn("slowest 3 pages", summary)
+        self.assertIn("page20.md", summary)
+        self.assertNotIn("page17.md", summary)
+        path = os.path.join(self.root, "trace.json")
+        profiler.write_trace(path)
+        with open(path) as f:
+            trace = json.load(f)
+        self.assertEqual(trace["pages"][0]["path"], "page20.md")
+        self.assertEqual(len(trace["pages"]), 20)
+
+    def test_build_records_every_page(self):
+        self.write("template.html", "{{ Title }}{{ Content }}")
+        for i in range(4):
+            self.write(os.path.join("content", f"page{i}.md"), f"# Page {i}\n\ntext")
+        for jobs in (1, 2):
+            profiler = BuildProfiler()
+            generate_pages_recursive(
+                self.content, self.template, os.path.join(self.root, f"public{jobs}"), jobs=jobs, profiler=profiler
+            )
+            self.assertEqual(len(profiler.pages), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import unittest
+
+from dependencies import PageDependencies
+from gencontent import collect_pages, generate_pages_recursive
+from manifest import BuildManifest
+from references import ReferenceIndex, resolve_url, scan_references
+from sitetest import SiteTestCase
+
+
+class TestReferenceIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index_path = os.path.join(self.root, ".cache", "references.json")
+        self.manifest_path = os.path.join(self.root, ".cache", "manifest.json")
+        self.write("template.html", "{{ Title }}|{{ Content }}")
+        self.write(
+            os.path.join("content", "index.md"),
+            "# Home\n\n[blog](/blog/) [post](blog/post) ![logo](/images/logo.png)\n\n"
+            "[gone](/gone) [wiki](https://example.com) [top](#top) ![missing](missing.png)",
+        )
+        self.write(os.path.join("content", "blog", "index.md"), "# Blog\n\n[post](post.html) [home](../)")
+        self.write(os.path.join("content", "blog", "post.md"), "# Post\n\n[up](../index.md)")
+        self.write(os.path.join("static", "images", "logo.png"), "png")
+
+    def build(self):
+        manifest = BuildManifest.load(self.manifest_path)
+        index = ReferenceIndex.load(self.index_path)
+        dependencies = PageDependencies(self.content, self.static, index)
+        generate_pages_recursive(self.content, self.template, self.public, manifest, dependencies=dependencies)
+        manifest.save()
+        broken = index.check(collect_pages(self.content, self.public), self.static, self.public)
+        index.save()
+        return index, broken
+
+    def test_scan_references(self):
+        self.assertEqual(
+            scan_references(os.path.join(self.content, "blog", "index.md")),
+            [["link", "post.html", 3], ["link", "../", 3]],
+        )
+
+    def test_resolve_url(self):
+        self.assertEqual(resolve_url("/", "blog"), ["index.html"])
+        self.assertEqual(resolve_url("../", "blog"), ["index.html"])
+        self.assertEqual(resolve_url("post#intro", "blog"), ["blog/post", "blog/post.html", "blog/post/index.html"])
+        self.assertEqual(resolve_url("/../etc", ""), [])
+        self.assertIsNone(resolve_url("mailto:me@example.com", ""))
+        self.assertIsNone(resolve_url("#top", ""))
+
+    def test_check_reports_broken_references(self):
+        index, broken = self.build()
+        home = os.path.normpath(os.path.join(self.content, "index.md"))
+        post = os.path.normpath(os.path.join(self.content, "blog", "post.md"))
+        self.assertEqual(
+            broken,
+            [
+                {"page": post, "line": 3, "kind": "link", "url": "../index.md"},
+                {"page": home, "line": 5, "kind": "link", "url": "/gone"},
+                {"page": home, "line": 5, "kind": "image", "url": "missing.png"},
+            ],
+        )
+        self.assertEqual(index.checked, 8)
+
+    def test_unchanged_pages_keep_their_references(self):
+        self.build()
+        self.write(os.path.join(self.content, "gone.md"), "# Gone no more")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        index, broken = self.build()
+        self.assertEqual(
+            sorted((reference["page"], reference["url"]) for reference in broken),
+            [
+                (os.path.normpath(os.path.join(self.content, "blog", "index.md")), "post.html"),
+                (os.path.normpath(os.path.join(self.content, "index.md")), "blog/post"),
+                (os.path.normpath(os.path.join(self.content, "index.md")), "missing.png"),
+            ],
+        )
+        self.assertNotIn(os.path.normpath(os.path.join(self.content, "blog", "post.md")), index.pages)
+        self.assertEqual(ReferenceIndex.load(self.index_path).pages, index.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+import search_index
+from ast_cache import ASTCache
+from gencontent import generate_pages_recursive
+from search_index import SearchIndex, page_terms, page_url, shard_name
+from sitetest import SiteTestCase
+
+
+class TestSearchIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = os.path.join(self.root, ".cache", "search")
+        self.output = os.path.join(self.public, "search")
+        self.write(
+            os.path.join("content", "index.md"),
+            "# Home Page\n\nWelcome to the **static** site. A [link](/about) here.",
+        )
+        self.write(os.path.join("content", "about.md"), "# About\n\nThe static site generator.\n\n```\ncode block\n```")
+        self.write(os.path.join("content", "blog", "index.md"), "# Blog\n\n- posts\n- welcome")
+
+    def pages(self):
+        pages = []
+        for root, _, filenames in os.walk(self.content):
+            for filename in filenames:
+                from_path = os.path.join(root, filename)
+                dest_path = os.path.join(self.public, os.path.relpath(from_path, self.content))
+                pages.append((from_path, dest_path[: -len(".md")] + ".html"))
+        return pages
+
+    def update(self):
+        index = SearchIndex(self.cache, self.output)
+        index.update(self.pages(), self.public)
+        index.save()
+        return index
+
+    def load(self, name):
+        return json.loads(self.read("search", name))
+
+    def lookup(self, term):
+        docs = self.load("docs.json")
+        postings = self.load(f"{shard_name(term, 2)}.json").get(term, [])
+        return sorted((docs[doc_id][0], count) for doc_id, count in zip(postings[::2], postings[1::2]))
+
+    def test_page_terms(self):
+        title, terms = page_terms(os.path.join(self.content, "index.md"))
+        self.assertEqual(title, "Home Page")
+        self.assertEqual(terms["static"], 1)
+        self.assertEqual(terms["link"], 1)
+        self.assertNotIn("a", terms)
+        self.assertNotIn("about", terms)
+
+    def test_terms_come_from_the_rendered_tree(self):
+        self.write(
+            os.path.join("content", "post.md"),
+            "---\ntags: [x]\n---\n# Post *one*\n\n> Quoted `code` and [a link](/x)\n\n1. item",
+        )
+        ast_cache = ASTCache(os.path.join(self.root, ".cache", "ast"))
+        self.write("template.html", "{{ Title }}{{ Content }}")
+        generate_pages_recursive(self.content, self.template, self.public, ast_cache=ast_cache)
+        for from_path, _ in self.pages():
+            parsed = page_terms(from_path)
+            with mock.patch.object(search_index, "iter_blocks", side_effect=AssertionError):
+                self.assertEqual(page_terms(from_path, ast_cache), parsed)
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join(self.public, "index.html"), self.public), "/")
+        self.assertEqual(page_url(os.path.join(self.public, "blog", "index.html"), self.public), "/blog/")
+        self.assertEqual(page_url(os.path.join(self.public, "about.html"), self.public), "/about.html")
+
+    def test_shards_hold_postings(self):
+        index = self.update()
+        self.assertEqual(index.tokenized, 3)
+        self.assertEqual(self.lookup("static"), [("/", 1), ("/about.html", 1)])
+        self.assertEqual(self.lookup("welcome"), [("/", 1), ("/blog/", 1)])
+        self.assertEqual(self.lookup("code"), [("/about.html", 1)])
+        manifest = self.load("index.json")
+        self.assertEqual(manifest["prefix_length"], 2)
+        self.assertIn("st", manifest["shards"])
+        self.assertEqual(shard_name("ünïcode", 2), "c3bc6e")
+
+    def test_only_changed_pages_are_tokenised(self):
+        self.update()
+        self.assertEqual(self.update().tokenized, 0)
+
+        self.write(os.path.join("content", "about.md"), "# About\n\nNothing else")
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        index = self.update()
+        self.assertEqual(index.tokenized, 1)
+        self.assertEqual(self.lookup("static"), [("/", 1)])
+        self.assertEqual(self.lookup("welcome"), [("/", 1)])
+        self.assertEqual(self.lookup("nothing"), [("/about.html", 1)])
+        self.assertNotIn("co", index.state["shards"])
+        self.assertFalse(os.path.exists(os.path.join(self.output, "co.json")))
+
+        self.write(os.path.join("content", "new.md"), "# New\n\nWelcome back")
+        self.assertEqual(self.update().tokenized, 1)
+        self.assertEqual(self.lookup("welcome"), [("/", 1), ("/new.html", 1)])
+        self.assertEqual(len(self.load("docs.json")), 3)
+
+    def test_unreadable_page_is_left_out(self):
+        self.update()
+        with open(os.path.join(self.content, "about.md"), "wb") as f:
+            f.write("# Caf\xe9".encode("latin-1"))
+        index = self.update()
+        self.assertEqual([os.path.basename(from_path) for from_path, _ in index.errors], ["about.md"])
+        self.assertEqual(self.lookup("static"), [("/", 1)])
+        self.assertEqual(self.load("docs.json")[0], None)
+
+    def test_missing_output_is_rewritten(self):
+        self.update()
+        for name in os.listdir(self.output):
+            os.remove(os.path.join(self.output, name))
+        self.assertEqual(self.update().tokenized, 0)
+        self.assertEqual(self.lookup("static"), [("/", 1), ("/about.html", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
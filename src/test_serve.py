@@ -0,0 +1,136 @@
+import json
+import os
+import unittest
+
+from builder import BuildConfig, Builder
+from manifest import BuildManifest
+from serve import ChangeWatcher, SiteRebuilder
+from sitetest import SiteTestCase
+
+
+class TestWatchRebuild(SiteTestCase):
+    watched = True
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "{{ Title }}|{{ Content }}")
+        self.write(os.path.join("content", "index.md"), "# Home")
+        self.write(os.path.join("content", "blog", "post.md"), "# Post")
+        self.write(os.path.join("static", "site.css"), "body {}")
+
+        builder = Builder(BuildConfig(self.root), None)
+        self.manifest, errors, _ = builder.build()
+        self.assertEqual(errors, [])
+        self.watcher = ChangeWatcher([self.content, self.static, self.template])
+        self.rebuilder = SiteRebuilder(builder, self.manifest)
+
+    def rebuild(self):
+        changed, removed = self.watcher.poll()
+        self.assertEqual(self.rebuilder.apply(changed, removed), [])
+        return changed, removed
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.poll(), (set(), set()))
+
+    def test_markdown_change_rebuilds_only_that_page(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Edited")
+        changed, _ = self.rebuild()
+        self.assertEqual(changed, {os.path.join(self.content, "blog", "post.md")})
+        self.assertEqual(self.manifest.rebuilt, 1)
+        self.assertEqual(self.read("blog", "post.html"), "Edited|<div><h1>Edited</h1></div>")
+
+    def test_template_change_rebuilds_every_page(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+        self.rebuild()
+        self.assertEqual(self.manifest.rebuilt, 2)
+        self.assertEqual(self.read("index.html"), "<h1>Home</h1>")
+
+    def test_new_static_file_is_copied(self):
+        self.write(os.path.join(self.static, "images", "logo.svg"), "<svg/>")
+        self.rebuild()
+        self.assertEqual(self.read("images", "logo.svg"), "<svg/>")
+
+    def test_removed_page_is_deleted(self):
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        _, removed = self.rebuild()
+        self.assertEqual(len(removed), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        reloaded = BuildManifest.load(self.manifest.path)
+        self.assertEqual(len(reloaded.entries), 2)
+
+
+class TestWatchFrontMatter(SiteTestCase):
+    watched = True
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("post.html", "<h1>Post: {{ Title }}</h1>{{ Content }}")
+        self.write(os.path.join("static", "site.css"), "body {}")
+        self.write(os.path.join("content", "index.md"), "# Home")
+        self.post("a", "x")
+        self.write(os.path.join("content", "blog", "draft.md"), "---\ndraft: true\n---\n# Draft")
+
+    def post(self, name, tag, extra=""):
+        self.write(
+            os.path.join("content", "blog", f"{name}.md"),
+            f"---\ndate: 2024-01-01\ntags: [{tag}]\n{extra}---\n# Post {name}\n\nSummary of {name}",
+        )
+
+    def read_source(self, name):
+        with open(os.path.join(self.content, "blog", f"{name}.md")) as f:
+            return f.read()
+
+    def serve(self, **options):
+        config = BuildConfig(self.root, **options)
+        self.watcher = ChangeWatcher([config.dir_path_content, config.dir_path_static, config.template_path])
+        builder = Builder(config, None)
+        manifest, errors, _ = builder.build()
+        self.assertEqual(errors, [])
+        self.rebuilder = SiteRebuilder(builder, manifest)
+        self.watcher.add_paths(self.rebuilder.template_paths())
+        return manifest
+
+    def rebuild(self):
+        changed, removed = self.watcher.poll()
+        self.assertEqual(self.rebuilder.apply(changed, removed), [])
+        self.watcher.add_paths(self.rebuilder.template_paths())
+        return self.rebuilder.manifest
+
+    def test_drafts_are_kept_when_built(self):
+        self.serve(drafts=True)
+        self.write(os.path.join("content", "blog", "draft.md"), "---\ndraft: true\n---\n# Draft edited")
+        manifest = self.rebuild()
+        self.assertEqual((manifest.rebuilt, manifest.removed), (1, 0))
+        self.assertIn("Draft edited", self.read("blog", "draft.html"))
+
+    def test_listings_follow_metadata(self):
+        self.serve(listings=True)
+        self.post("b", "y")
+        self.rebuild()
+        self.assertIn("Post b", self.read("posts", "index.html"))
+        self.assertIn("Post b", self.read("tags", "y", "index.html"))
+        with open(os.path.join(self.root, ".cache", "metadata.json")) as f:
+            self.assertIn(os.path.join(self.content, "blog", "b.md"), json.load(f)["pages"])
+
+        # Only the page is rebuilt when its metadata is unchanged.
+        self.write(os.path.join("content", "blog", "b.md"), self.read_source("b") + "\n\nMore text")
+        self.assertEqual(self.rebuild().rebuilt, 1)
+
+        os.remove(os.path.join(self.content, "blog", "b.md"))
+        self.rebuild()
+        self.assertNotIn("Post b", self.read("posts", "index.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tags", "y")))
+
+    def test_page_templates_are_watched(self):
+        self.serve()
+        self.post("a", "x", "template: post.html\n")
+        self.rebuild()
+        self.assertTrue(self.read("blog", "a.html").startswith("<h1>Post: Post a</h1>"))
+        self.write("post.html", "<h2>{{ Title }}</h2>{{ Content }}")
+        self.assertEqual(self.rebuild().rebuilt, 1)
+        self.assertTrue(self.read("blog", "a.html").startswith("<h2>Post a</h2>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from benchmarks.corpus import generate_corpus
+from builder import BuildConfig, Builder
+from gencontent import collect_pages
+from shard import parse_shard, select_shard, shard_of
+from sitetest import SiteTestCase, read_tree
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+class TestShard(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.single = os.path.join(self.root, "single")
+        self.sharded = os.path.join(self.root, "sharded")
+        for root in (self.single, self.sharded):
+            generate_corpus(root, "small-pages", 0.02, static_files=3)
+
+    def build(self, root, **options):
+        manifest, errors, _ = Builder(BuildConfig(root, **options), None).build()
+        self.assertEqual(errors, [])
+        return manifest
+
+    # Each shard runs in its own process, all at once, as on separate nodes.
+    def build_shards(self, count, *shards):
+        processes = [
+            subprocess.Popen([sys.executable, MAIN, "--shard", f"{index}/{count}"], cwd=self.sharded,
+                             stdout=subprocess.DEVNULL)
+            for index in shards or range(count)
+        ]
+        self.assertEqual([process.wait() for process in processes], [0] * len(processes))
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/5"), (2, 5))
+        for text in ("5/5", "1", "-1/2", "a/b", "0/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+        with self.assertRaises(ValueError):
+            BuildConfig(self.sharded, shard=(0, 2), search_index=True)
+
+    def test_partition_is_stable_and_complete(self):
+        self.assertEqual(shard_of("blog/post.md", 4), shard_of(os.path.join("blog", "post.md"), 4))
+        self.assertEqual(shard_of("blog/post.md", 4), 0)
+        content = os.path.join(self.sharded, "content")
+        pages = collect_pages(content, os.path.join(self.sharded, "public"))
+        shards = [select_shard(pages, content, (index, 3)) for index in range(3)]
+        self.assertEqual(sorted(page for shard in shards for page in shard), sorted(pages))
+        self.assertTrue(all(shards))
+
+    def test_merged_build_matches_single_node(self):
+        options = {"search_index": True, "precompress": True, "precompress_min_size": 0}
+        self.build(self.single, **options)
+        self.build_shards(3)
+        manifest = self.build(self.sharded, merge_shards=3, **options)
+        # Only static files were copied; every page came from a shard.
+        self.assertEqual(manifest.rebuilt, 3)
+        self.assertEqual(read_tree(os.path.join(self.sharded, "public")), read_tree(os.path.join(self.single, "public")))
+
+        # One edited page rebuilds one shard and its merge updates one output.
+        for root in (self.single, self.sharded):
+            pages = sorted(collect_pages(os.path.join(root, "content"), os.path.join(root, "public")))
+            with open(pages[0][0], "a") as f:
+                f.write("\nA late addition.\n")
+        self.build(self.single, **options)
+        self.build_shards(3)
+        manifest = self.build(self.sharded, merge_shards=3, **options)
+        self.assertEqual(manifest.rebuilt, 0)
+        self.assertEqual(read_tree(os.path.join(self.sharded, "public")), read_tree(os.path.join(self.single, "public")))
+
+    def test_missing_shard(self):
+        self.build_shards(2, 0)
+        with self.assertRaises(FileNotFoundError):
+            self.build(self.sharded, merge_shards=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import unittest
+from unittest import mock
+
+import staging
+from builder import BuildConfig, Builder
+from gencontent import write_output
+from sitetest import SiteTestCase
+
+
+class TestStagedBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.write(os.path.join("content", "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join("content", "blog", "post.md"), "# Post\n\nFirst version")
+        self.write(os.path.join("static", "index.css"), "body {}")
+
+    def build(self, log=None, **options):
+        manifest, errors, _ = Builder(BuildConfig(self.root, staging=True, **options), log).build()
+        self.assertEqual(errors, [])
+        return manifest
+
+    def test_public_changes_only_at_the_swap(self):
+        self.build()
+        kept = os.path.join(self.root, "kept.html")
+        os.link(os.path.join(self.public, "blog", "post.html"), kept)
+        self.write(os.path.join("content", "blog", "post.md"), "# Post\n\nSecond version")
+
+        seen = []
+
+        def log(line):
+            if line.startswith("Swapping"):
+                seen.append(self.read("blog", "post.html"))
+
+        manifest = self.build(log)
+        self.assertIn("First version", seen[0])
+        self.assertIn("Second version", self.read("blog", "post.html"))
+        # The staging copy was hardlinked, and the live file was replaced
+        # rather than written through.
+        with open(kept) as f:
+            self.assertIn("First version", f.read())
+        self.assertEqual((manifest.skipped, manifest.rebuilt), (2, 1))
+        self.assertIn(os.path.normpath(os.path.join(self.public, "index.html")), manifest.entries)
+        self.assertFalse(os.path.exists(self.public + ".staging"))
+
+    def test_swap_without_renameat2(self):
+        self.build()
+        os.remove(os.path.join(self.root, "content", "blog", "post.md"))
+        with mock.patch.object(staging, "exchange", return_value=False):
+            manifest = self.build()
+        self.assertEqual(manifest.removed, 1)
+        self.assertEqual(sorted(os.listdir(self.public)), ["index.css", "index.html"])
+        self.assertFalse(os.path.exists(self.public + ".old"))
+
+    def test_unfinished_staging_is_discarded(self):
+        self.build()
+        self.write(os.path.join("public.staging", "junk.html"), "junk")
+        self.write(os.path.join("content", "about.md"), "# About")
+        manifest = self.build(clean=True)
+        self.assertEqual(manifest.rebuilt, 4)
+        self.assertEqual(sorted(os.listdir(self.public)), ["about.html", "blog", "index.css", "index.html"])
+
+    def test_identical_output_is_not_rewritten(self):
+        dest_path = os.path.join(self.root, "out", "page.html")
+        self.assertTrue(write_output(dest_path, "<p>one</p>"))
+        inode = os.stat(dest_path).st_ino
+        self.assertFalse(write_output(dest_path, "<p>one</p>"))
+        self.assertEqual(os.stat(dest_path).st_ino, inode)
+        self.assertTrue(write_output(dest_path, "<p>two</p>"))
+        self.assertEqual(os.listdir(os.path.dirname(dest_path)), ["page.html"])
+
+        self.build()
+        os.remove(os.path.join(self.root, ".cache", "manifest.json"))
+        manifest = self.build()
+        self.assertEqual((manifest.rebuilt, manifest.unchanged), (3, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title> {{ Title }} </title><article>{{ Content }}</article>")
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": "<p>hi</p>"}),
+            "<title> Home </title><article><p>hi</p></article>",
+        )
+
+    def test_slots(self):
+        template = Template("{{ Title }} {{date}} {{ Content }} {{ nav }}")
+        self.assertEqual(template.slots, ["Title", "date", "Content", "nav"])
+
+    def test_missing_slot_renders_empty(self):
+        template = Template("<p>{{ description }}</p>")
+        self.assertEqual(template.render({}), "<p></p>")
+
+    def test_placeholder_in_content_is_not_replaced(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "write {{ Title }} here"}),
+            "<h1>T</h1>write {{ Title }} here",
+        )
+
+    def test_write_streams_nodes(self):
+        template = Template("<main>{{ Content }}</main>")
+        node = ParentNode("div", [LeafNode("p", "text")])
+
+        class Collector():
+            def __init__(self):
+                self.chunks = []
+
+            def write(self, chunk):
+                self.chunks.append(chunk)
+
+        out = Collector()
+        template.write(out, {"Content": node})
+        self.assertEqual("".join(out.chunks), "<main><div><p>text</p></div></main>")
+        self.assertEqual("".join(out.chunks), template.render({"Content": node}))
+
+    def test_load_template_is_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as f:
+                f.write("<b>{{ Title }}</b>")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(load_template(path).render({"Title": "x"}), "<b>x</b>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,11 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("Bold text node", TextType.BOLD)
         self.assertNotEqual(node, node2)
 
+    def test_slotted(self):
+        node = TextNode("link", TextType.LINK, "https://boot.dev")
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(repr(node), "TextNode(link, link, https://boot.dev)")
+
 
 if __name__ == "__main__":
     unittest.main()